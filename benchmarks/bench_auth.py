@@ -0,0 +1,59 @@
+"""对比每个请求重新读取配置 + 解析 CIDR 与预编译鉴权策略的单次开销。
+
+用法：python -m benchmarks.bench_auth [--rounds 20000] [--networks 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from smartlink.config import ConfigManager
+from smartlink.runtime import AppPaths, AppState
+from smartlink.services.network import ip_allowed
+
+CLIENTS = ["192.168.1.20", "10.0.5.7", "172.20.3.4", "8.8.8.8"]
+
+
+def legacy_check(config_manager: ConfigManager, token: str, client_ip: str) -> bool:
+    settings = config_manager.get_settings()
+    return token == settings.api_token and ip_allowed(client_ip, settings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--networks", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        config_manager = ConfigManager(Path(directory) / "bench_config.json")
+        networks = [f"10.{index}.0.0/16" for index in range(args.networks)]
+        settings = config_manager.update_settings(
+            {"allowed_networks": [*networks, "192.168.0.0/16"], "api_token": "bench-token"}
+        )
+        paths = AppPaths(root=Path(directory), config_file=config_manager.path, log_file=Path())
+        state = AppState(paths, None, config_manager, None, None, None, None)
+
+        def compiled_check(token: str, client_ip: str) -> bool:
+            policy = state.get_auth_policy()
+            return policy.token_valid(token) and policy.ip_allowed(client_ip)
+
+        cases = {
+            "legacy": lambda ip: legacy_check(config_manager, settings.api_token, ip),
+            "policy": lambda ip: compiled_check(settings.api_token, ip),
+        }
+        for name, check in cases.items():
+            started = time.perf_counter()
+            for index in range(args.rounds):
+                check(CLIENTS[index % len(CLIENTS)])
+            elapsed = time.perf_counter() - started
+            print(f"{name:<8} {elapsed / args.rounds * 1_000_000:>8.2f} us/request")
+        config_manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
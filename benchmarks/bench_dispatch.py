@@ -0,0 +1,80 @@
+"""对比刷卡 / MQTT 触发时线性扫描全部动作与查分发表的耗时。
+
+用法：python -m benchmarks.bench_dispatch [--actions 10000] [--lookups 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from smartlink.config import ConfigManager
+from smartlink.models import ActionConfig
+
+
+def linear_card(manager: ConfigManager, card_id: str) -> str | None:
+    for action in manager.list_actions():
+        if card_id in action.card_ids:
+            return action.name
+    return None
+
+
+def linear_topic(manager: ConfigManager, topic: str) -> str | None:
+    for action in manager.list_actions():
+        if action.bafy_topic == topic:
+            return action.name
+    return None
+
+
+def indexed_card(manager: ConfigManager, card_id: str) -> str | None:
+    action = manager.registry.for_card(card_id)
+    return action.name if action else None
+
+
+def indexed_topic(manager: ConfigManager, topic: str) -> str | None:
+    action = manager.registry.for_topic(topic)
+    return action.name if action else None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = ConfigManager(Path(directory) / "bench_config.json")
+        payload = manager.load()
+        payload["actions"] = [
+            ActionConfig(
+                name=f"动作{index}",
+                type="exe",
+                cmd="echo",
+                card_ids=[f"CARD{index}"],
+                bafy_topic=f"topic{index}",
+            ).to_dict()
+            for index in range(args.actions)
+        ]
+        manager.save(payload)
+        keys = [index * 7919 % args.actions for index in range(args.lookups)]
+
+        cases = {
+            "linear card": lambda key: linear_card(manager, f"CARD{key}"),
+            "linear topic": lambda key: linear_topic(manager, f"topic{key}"),
+            "index card": lambda key: indexed_card(manager, f"CARD{key}"),
+            "index topic": lambda key: indexed_topic(manager, f"topic{key}"),
+        }
+        for name, lookup in cases.items():
+            started = time.perf_counter()
+            for key in keys:
+                assert lookup(key) == f"动作{key}"
+            elapsed = time.perf_counter() - started
+            print(f"{name:<14} {elapsed / len(keys) * 1_000_000:>10.2f} us/trigger")
+        manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+"""对比各亮屏检测策略的传输字节数与耗时，需要已连接的 Android 设备。
+
+用法：python -m benchmarks.bench_screen_probe [--serial SERIAL] [--runs 20] [--backend socket]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import statistics
+import time
+
+from smartlink.models import AppSettings
+from smartlink.services.adb import SCREEN_PROBES, ADBService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--serial", default="")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--backend", choices=("subprocess", "socket"), default="subprocess")
+    parser.add_argument("--no-pool", action="store_true", help="禁用常驻 adb shell 会话")
+    args = parser.parse_args()
+
+    service = ADBService(logging.getLogger("bench"), use_shell_pool=not args.no_pool)
+    service.configure(AppSettings(adb_backend=args.backend))
+    if not service.is_available():
+        print("未找到 adb")
+        return 1
+
+    print(f"{'strategy':<10}{'state':<8}{'bytes':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    try:
+        for probe in SCREEN_PROBES:
+            timings: list[float] = []
+            transferred = 0
+            state = None
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                state, result = service.probe_screen(probe, args.serial)
+                timings.append((time.perf_counter() - started) * 1000)
+                transferred = result.data.get("bytes", 0)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{probe.name:<10}{str(state):<8}{transferred:>10}"
+                f"{statistics.median(timings):>10.1f}{p95:>10.1f}"
+            )
+    finally:
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+"""对比 Werkzeug 开发服务器与内置线程池服务器在并发长连接请求下的吞吐和延迟。
+
+用法：python -m benchmarks.bench_server [--clients 32] [--requests 50] [--modes dev,pool]
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import logging
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from smartlink import create_app
+from smartlink.models import AppSettings, split_csv
+from smartlink.server import create_server
+
+TOKEN = "bench-token"
+
+
+def run_client(port: int, requests: int, path: str, latencies: list[float]) -> None:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    headers = {"X-SmartLink-Token": TOKEN}
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            connection.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            # 开发服务器不保持连接时重新建连
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def bench(app, mode: str, clients: int, requests: int, threads: int, path: str) -> None:
+    settings = AppSettings(server_mode=mode, server_threads=threads)
+    server = create_server(app, "127.0.0.1", 0, settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    latencies: list[float] = []
+    workers = [
+        threading.Thread(target=run_client, args=(server.port, requests, path, latencies))
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    server.drain(1)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    print(
+        f"{mode:<8} ok={len(latencies):>6} rps={len(latencies) / elapsed:>8.1f} "
+        f"p50={statistics.median(latencies) * 1000:>6.1f}ms p95={p95 * 1000:>6.1f}ms"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--path", default="/api/actions")
+    parser.add_argument("--modes", default="dev,pool")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            config_path=Path(directory) / "bench_config.json", testing=True, log_dir=directory
+        )
+        state = app.extensions["smartlink"]
+        state.config_manager.update_settings({"api_token": TOKEN})
+        state.logger.disabled = True
+        logging.getLogger("werkzeug").disabled = True
+        for mode in split_csv(args.modes):
+            bench(app, mode, args.clients, args.requests, args.threads, args.path)
+        state.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,28 +6,52 @@ from pathlib import Path
 from flask import Flask, jsonify, request
 from werkzeug.exceptions import HTTPException
 
-from smartlink.config import DEFAULT_CONFIG_PATH, PROJECT_ROOT, ConfigManager
-from smartlink.logging_utils import setup_logging
+from smartlink.config import DEFAULT_CONFIG_PATH, DEFAULT_LOG_DIR, PROJECT_ROOT, ConfigManager
+from smartlink.logging_utils import get_log_pipeline, setup_logging
 from smartlink.routes.api import api_bp
 from smartlink.routes.web import web_bp
 from smartlink.runtime import AppPaths, AppState
 from smartlink.services.actions import ActionService
 from smartlink.services.adb import ADBService
+from smartlink.services.adb_keeper import ADBConnectionKeeper
+from smartlink.services.events import EventBus, bind_logger, subscriber_limit
 from smartlink.services.integrations import IntegrationManager
 from smartlink.services.network import get_client_ip
 from smartlink.services.system_control import SystemService
+from smartlink.structured_logs import IndexedJsonHandler, LogSearcher, log_fields
 
 
-def create_app(config_path: str | Path | None = None, testing: bool = False) -> Flask:
+def create_app(
+    config_path: str | Path | None = None,
+    testing: bool = False,
+    log_dir: str | Path | None = None,
+) -> Flask:
     root = PROJECT_ROOT
     config_file = Path(config_path or DEFAULT_CONFIG_PATH)
-    log_file = root / "logs" / "smartlink.log"
-    logger = setup_logging(log_file)
+    log_root = Path(log_dir or DEFAULT_LOG_DIR)
+    log_file = log_root / "smartlink.log"
+    json_log_file = log_root / "smartlink.jsonl"
     config_manager = ConfigManager(config_file)
+    structured = config_manager.get_settings().structured_logs
+    json_handlers = [IndexedJsonHandler(json_log_file)] if structured else []
+    logger = setup_logging(log_file, extra_handlers=json_handlers)
+    events = EventBus(
+        max_subscribers=subscriber_limit(config_manager.get_settings().server_threads)
+    )
+    bind_logger(logger, events)
     adb_service = ADBService(logger)
+    adb_service.configure(config_manager.get_settings())
+    config_manager.add_listener(
+        lambda _registry: adb_service.configure(config_manager.get_settings())
+    )
+    adb_keeper = ADBConnectionKeeper(config_manager, adb_service, logger)
+    adb_service.keeper = adb_keeper
+    adb_service.events = events
     system_service = SystemService(logger)
-    action_service = ActionService(config_manager, adb_service, system_service, logger)
-    integration_manager = IntegrationManager(config_manager, action_service, logger)
+    action_service = ActionService(
+        config_manager, adb_service, system_service, logger, events=events
+    )
+    integration_manager = IntegrationManager(config_manager, action_service, logger, events)
 
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.secret_key = "smartlink-console"
@@ -35,13 +59,19 @@ def create_app(config_path: str | Path | None = None, testing: bool = False) ->
     app.config["TESTING"] = testing
 
     state = AppState(
-        paths=AppPaths(root=root, config_file=config_file, log_file=log_file),
+        paths=AppPaths(
+            root=root, config_file=config_file, log_file=log_file, json_log_file=json_log_file
+        ),
         logger=logger,
         config_manager=config_manager,
         action_service=action_service,
         adb_service=adb_service,
         system_service=system_service,
         integration_manager=integration_manager,
+        adb_keeper=adb_keeper,
+        events=events,
+        log_pipeline=get_log_pipeline(logger),
+        log_search=LogSearcher(json_log_file),
     )
     app.extensions["smartlink"] = state
 
@@ -69,6 +99,7 @@ def create_app(config_path: str | Path | None = None, testing: bool = False) ->
             response.status_code,
             record["ip"],
             duration_ms,
+            extra=log_fields("request", **record),
         )
         return response
 
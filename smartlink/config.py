@@ -4,16 +4,22 @@ import json
 import os
 import secrets
 import threading
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
-from smartlink.models import ActionConfig, AppSettings, now_iso
+from smartlink.models import ActionConfig, AppSettings
+from smartlink.stats import RunStatsStore
+from smartlink.storage import atomic_write_text, backup_path
 
 CONFIG_VERSION = 2
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_CONFIG_PATH = Path(
     os.getenv("SMARTLINK_CONFIG_FILE", str(PROJECT_ROOT / "config" / "launcher_config.json"))
 )
+DEFAULT_LOG_DIR = Path(os.getenv("SMARTLINK_LOG_DIR", str(PROJECT_ROOT / "logs")))
 LEGACY_CONFIG_PATH = Path.home() / "launcher_config.json"
 
 
@@ -38,37 +44,152 @@ def default_actions() -> list[ActionConfig]:
     ]
 
 
+def _action_sort_key(action: ActionConfig) -> tuple[bool, str, str]:
+    return (not action.favorite, action.category, action.name.lower())
+
+
+def _group_names(pairs: Iterable[tuple[str, str]]) -> MappingProxyType:
+    grouped: dict[str, list[str]] = {}
+    for key, name in pairs:
+        grouped.setdefault(key, []).append(name)
+    return MappingProxyType({key: tuple(names) for key, names in grouped.items()})
+
+
+def _first_names(pairs: Iterable[tuple[str, str]]) -> MappingProxyType:
+    # 同一个卡号 / 主题配置在多个动作上时，与原来的线性扫描一样取排序后的第一个
+    first: dict[str, str] = {}
+    for key, name in pairs:
+        if key:
+            first.setdefault(key, name)
+    return MappingProxyType(first)
+
+
+@dataclass(frozen=True, slots=True)
+class ActionRegistry:
+    """某一版本配置的只读动作索引，save() 变更内容时整体替换。
+
+    条目与 by_card_id / by_topic 等索引共用，不能就地修改；ConfigManager 对外只返回副本。
+    """
+
+    version: int = 0
+    actions: tuple[ActionConfig, ...] = ()
+    by_name: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    by_category: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    by_tag: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    by_type: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    by_card_id: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    by_topic: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def build(cls, version: int, items: Iterable[dict[str, Any]]) -> ActionRegistry:
+        by_name: dict[str, ActionConfig] = {}
+        for item in items:
+            name = item.get("name")
+            if name and name not in by_name:
+                by_name[name] = ActionConfig.from_dict(name, item)
+        actions = tuple(sorted(by_name.values(), key=_action_sort_key))
+        return cls(
+            version=version,
+            actions=actions,
+            by_name=MappingProxyType(by_name),
+            by_category=_group_names((action.category, action.name) for action in actions),
+            by_tag=_group_names((tag, action.name) for action in actions for tag in action.tags),
+            by_type=_group_names((action.type, action.name) for action in actions),
+            by_card_id=_first_names(
+                (card_id, action.name) for action in actions for card_id in action.card_ids
+            ),
+            by_topic=_first_names((action.bafy_topic, action.name) for action in actions),
+        )
+
+    def get(self, name: str) -> ActionConfig | None:
+        return self.by_name.get(name)
+
+    def _resolve(self, names: tuple[str, ...]) -> list[ActionConfig]:
+        return [self.by_name[name] for name in names]
+
+    def in_category(self, category: str) -> list[ActionConfig]:
+        return self._resolve(self.by_category.get(category, ()))
+
+    def with_tag(self, tag: str) -> list[ActionConfig]:
+        return self._resolve(self.by_tag.get(tag, ()))
+
+    def of_type(self, action_type: str) -> list[ActionConfig]:
+        return self._resolve(self.by_type.get(action_type, ()))
+
+    def for_card(self, card_id: str) -> ActionConfig | None:
+        name = self.by_card_id.get(card_id)
+        return self.by_name[name] if name else None
+
+    def for_topic(self, topic: str) -> ActionConfig | None:
+        name = self.by_topic.get(topic)
+        return self.by_name[name] if name else None
+
+    @property
+    def topics(self) -> frozenset[str]:
+        return frozenset(self.by_topic)
+
+
 class ConfigManager:
-    def __init__(self, path: Path | str | None = None) -> None:
+    def __init__(self, path: Path | str | None = None, backup_count: int = 3) -> None:
         self.path = Path(path or DEFAULT_CONFIG_PATH)
+        self.backup_count = max(0, backup_count)
         self.path.parent.mkdir(parents=True, exist_ok=True)
         self._lock = threading.RLock()
         self._cached: dict[str, Any] | None = None
+        self._registry = ActionRegistry()
+        self._listeners: list[Callable[[ActionRegistry], None]] = []
+        self.stats = RunStatsStore(self.path.with_name(f"{self.path.stem}.stats.json"))
         self._ensure_initialized()
 
     def _ensure_initialized(self) -> None:
         if self.path.exists():
             self._cached = self._normalize(self._read_json(self.path))
-            self._write_json(self._cached)
-            return
-        if LEGACY_CONFIG_PATH.exists():
+        elif (recovered := self._recover_from_backups()) is not None:
+            self._cached = self._normalize(recovered)
+        elif LEGACY_CONFIG_PATH.exists():
             self._cached = self._normalize(self._read_json(LEGACY_CONFIG_PATH))
         else:
             self._cached = self._build_default_payload()
-        self._write_json(self._cached)
+        if not self.path.exists() or self._serialize(self._cached) != self.path.read_text(
+            encoding="utf-8", errors="ignore"
+        ):
+            self._write_json(self._cached)
+        self._rebuild_registry()
+
+    def _rebuild_registry(self) -> None:
+        self._registry = ActionRegistry.build(self._registry.version + 1, self._cached["actions"])
 
     def _read_json(self, path: Path) -> dict[str, Any]:
         try:
-            return json.loads(path.read_text(encoding="utf-8"))
-        except json.JSONDecodeError:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            if not isinstance(payload, dict):
+                raise json.JSONDecodeError("config root must be an object", "", 0)
+            return payload
+        except (json.JSONDecodeError, UnicodeDecodeError):
             broken = path.with_suffix(path.suffix + ".broken")
             path.replace(broken)
+            if path == self.path and (recovered := self._recover_from_backups()) is not None:
+                return recovered
             return self._build_default_payload()
         except FileNotFoundError:
             return self._build_default_payload()
 
+    def _recover_from_backups(self) -> dict[str, Any] | None:
+        for generation in range(1, self.backup_count + 1):
+            candidate = backup_path(self.path, generation)
+            try:
+                payload = json.loads(candidate.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(payload, dict):
+                return payload
+        return None
+
+    def _serialize(self, payload: dict[str, Any]) -> str:
+        return json.dumps(payload, ensure_ascii=False, indent=2)
+
     def _write_json(self, payload: dict[str, Any]) -> None:
-        self.path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        atomic_write_text(self.path, self._serialize(payload), backups=self.backup_count)
 
     def _build_default_payload(self) -> dict[str, Any]:
         settings = AppSettings(api_token=secrets.token_hex(16))
@@ -130,8 +251,34 @@ class ConfigManager:
 
     def save(self, payload: dict[str, Any]) -> None:
         with self._lock:
-            self._cached = self._normalize(payload)
+            normalized = self._normalize(payload)
+            if normalized == self._cached:
+                return
+            self._cached = normalized
             self._write_json(self._cached)
+            self._rebuild_registry()
+            registry = self._registry
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(registry)
+
+    def add_listener(self, listener: Callable[[ActionRegistry], None]) -> None:
+        """配置内容变化后（锁外）以新版本的动作索引回调；内容未变的 save() 不会触发。"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[ActionRegistry], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    @property
+    def registry(self) -> ActionRegistry:
+        return self._registry
+
+    @property
+    def version(self) -> int:
+        return self._registry.version
 
     def get_settings(self) -> AppSettings:
         payload = self.load()
@@ -157,21 +304,11 @@ class ConfigManager:
         return settings
 
     def list_actions(self) -> list[ActionConfig]:
-        payload = self.load()
-        actions = [
-            ActionConfig.from_dict(item.get("name", ""), item)
-            for item in payload["actions"]
-            if item.get("name")
-        ]
-        return sorted(
-            actions, key=lambda action: (not action.favorite, action.category, action.name.lower())
-        )
+        return [self.stats.apply(action.copy()) for action in self._registry.actions]
 
     def get_action(self, name: str) -> ActionConfig | None:
-        for action in self.list_actions():
-            if action.name == name:
-                return action
-        return None
+        action = self._registry.get(name)
+        return self.stats.apply(action.copy()) if action is not None else None
 
     def upsert_action(self, action: ActionConfig, old_name: str = "") -> None:
         payload = self.load()
@@ -195,6 +332,8 @@ class ConfigManager:
             normalized_actions.append(action)
         payload["actions"] = [item.to_dict() for item in normalized_actions]
         self.save(payload)
+        if old_name:
+            self.stats.rename(old_name, action.name)
 
     def delete_actions(self, names: list[str]) -> int:
         payload = self.load()
@@ -203,16 +342,17 @@ class ConfigManager:
         deleted = len(payload["actions"]) - len(filtered)
         payload["actions"] = filtered
         self.save(payload)
+        self.stats.discard(names)
         return deleted
 
     def export_payload(self, action_names: list[str] | None = None) -> dict[str, Any]:
         payload = self.load()
+        payload["actions"] = [self.stats.apply_dict(item) for item in payload["actions"]]
         if not action_names:
             return payload
         names_set = set(action_names)
-        exported = dict(payload)
-        exported["actions"] = [item for item in payload["actions"] if item.get("name") in names_set]
-        return exported
+        payload["actions"] = [item for item in payload["actions"] if item.get("name") in names_set]
+        return payload
 
     def import_payload(self, incoming: dict[str, Any], merge: bool = True) -> None:
         normalized = self._normalize(incoming)
@@ -244,8 +384,7 @@ class ConfigManager:
         action = self.get_action(name)
         if action is None:
             return
-        action.run_count += 1
-        action.last_run_at = now_iso()
-        action.last_result = success
-        action.last_message = message
-        self.upsert_action(action)
+        self.stats.record(action, success, message)
+
+    def close(self) -> None:
+        self.stats.close()
@@ -1,32 +1,217 @@
 from __future__ import annotations
 
 import logging
-from collections import deque
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+LOG_QUEUE_SIZE = 10_000
 
-def setup_logging(log_path: Path) -> logging.Logger:
+_pipelines: dict[str, LogPipeline] = {}
+# logger 名 -> (配置, 由 setup_logging 挂上的 Handler)，配置变化时据此拆掉旧的
+_installed: dict[str, tuple[tuple, list[logging.Handler]]] = {}
+
+
+class DroppingQueueHandler(QueueHandler):
+    """队列写满时丢弃新日志并计数，而不是阻塞请求线程。"""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class LogPipeline:
+    """文件和控制台 Handler 运行在独立的监听线程上，业务线程只负责入队。"""
+
+    def __init__(self, handlers: list[logging.Handler], queue_size: int = LOG_QUEUE_SIZE) -> None:
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.running = False
+
+    def start(self) -> None:
+        if not self.running:
+            self.listener.start()
+            self.running = True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待已入队的日志全部写出。"""
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.running and self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self) -> None:
+        if self.running:
+            self.running = False
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.flush()
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "running": self.running,
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "dropped": self.handler.dropped,
+        }
+
+
+def get_log_pipeline(logger: logging.Logger) -> LogPipeline | None:
+    return _pipelines.get(logger.name)
+
+
+def _handler_key(handler: logging.Handler) -> tuple[str, str | int]:
+    return type(handler).__name__, getattr(handler, "baseFilename", id(handler))
+
+
+def _config_key(
+    log_path: Path, queue_size: int | None, extra_handlers: Sequence[logging.Handler]
+) -> tuple:
+    return (
+        str(log_path.resolve()),
+        queue_size,
+        tuple(_handler_key(handler) for handler in extra_handlers),
+    )
+
+
+def _teardown(logger: logging.Logger) -> None:
+    pipeline = _pipelines.pop(logger.name, None)
+    if pipeline is not None:
+        pipeline.stop()
+    _config, handlers = _installed.pop(logger.name, ((), []))
+    for handler in handlers:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def setup_logging(
+    log_path: Path,
+    queue_size: int | None = LOG_QUEUE_SIZE,
+    extra_handlers: list[logging.Handler] | None = None,
+) -> logging.Logger:
+    """queue_size 为 None 时同步写日志，否则经由有界队列交给后台线程写出。
+
+    extra_handlers 与文本日志一起挂在同一条管道上，例如结构化 JSON 日志。
+    以相同参数重复调用时沿用已有的管道；参数不同则停掉旧管道、关闭旧 Handler 后按新参数重建。
+    """
     log_path.parent.mkdir(parents=True, exist_ok=True)
     logger = logging.getLogger("smartlink")
-    if logger.handlers:
+    extra_handlers = list(extra_handlers or [])
+    config = _config_key(log_path, queue_size, extra_handlers)
+    installed = _installed.get(logger.name)
+    if installed is not None and installed[0] == config:
+        # 新建的同类 Handler 用不上，关掉以免占着文件
+        for item in extra_handlers:
+            item.close()
+        pipeline = get_log_pipeline(logger)
+        if pipeline is not None:
+            pipeline.start()
         return logger
+    if installed is None and logger.handlers:
+        # 不是这里挂上的 Handler，保持原样
+        return logger
+    _teardown(logger)
     logger.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s", "%Y-%m-%d %H:%M:%S"
-    )
+    formatter = logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT)
     handler = RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=5, encoding="utf-8")
     handler.setFormatter(formatter)
     console = logging.StreamHandler()
     console.setFormatter(formatter)
-    logger.addHandler(handler)
-    logger.addHandler(console)
+    handlers = [handler, console, *extra_handlers]
+    if queue_size is None:
+        for item in handlers:
+            logger.addHandler(item)
+    else:
+        pipeline = LogPipeline(handlers, queue_size)
+        _pipelines[logger.name] = pipeline
+        logger.addHandler(pipeline.handler)
+        pipeline.start()
+        handlers = [pipeline.handler, *handlers]
+    _installed[logger.name] = (config, handlers)
     logger.propagate = False
     return logger
 
 
-def tail_log(log_path: Path, limit: int = 50) -> list[str]:
-    if not log_path.exists():
+def _split_lines(data: bytes) -> list[bytes]:
+    parts = data.split(b"\n")
+    lines = [part + b"\n" for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+def tail_log(log_path: Path, limit: int = 50, block_size: int = 8192) -> list[str]:
+    """从文件末尾按块倒读，只解码最后 limit 行，不随日志大小线性增长。"""
+    if limit <= 0 or not log_path.exists():
         return []
-    with log_path.open("r", encoding="utf-8", errors="ignore") as handle:
-        return list(deque(handle, maxlen=limit))
+    with log_path.open("rb") as handle:
+        position = handle.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0 and data.count(b"\n") <= limit:
+            step = min(block_size, position)
+            position -= step
+            handle.seek(position)
+            data = handle.read(step) + data
+    lines = _split_lines(data)[-limit:]
+    return [line.decode("utf-8", errors="ignore") for line in lines]
+
+
+def read_log_after(
+    log_path: Path, offset: int, limit: int = 200, max_bytes: int = 65536
+) -> tuple[list[str], int, bool]:
+    """从字节偏移 offset 起读取完整的新行，返回 (行, 下一次的偏移, 是否因轮转从头读)。"""
+    if not log_path.exists():
+        return [], 0, offset > 0
+    with log_path.open("rb") as handle:
+        size = handle.seek(0, os.SEEK_END)
+        reset = offset > size
+        start = 0 if reset else max(0, offset)
+        handle.seek(start)
+        data = handle.read(max_bytes)
+    lines = _split_lines(data)
+    if lines and not lines[-1].endswith(b"\n") and not (len(lines) == 1 and len(data) == max_bytes):
+        # 最后一行还没写完，留到下一次再取；单行超过 max_bytes 时只能分段返回
+        lines.pop()
+    lines = lines[:limit]
+    consumed = sum(len(line) for line in lines)
+    return [line.decode("utf-8", errors="ignore") for line in lines], start + consumed, reset
+
+
+def log_files(log_path: Path) -> list[Path]:
+    """按时间先后返回 RotatingFileHandler 的备份文件和当前日志文件。"""
+    backups = sorted(
+        (path for path in log_path.parent.glob(f"{log_path.name}.*") if path.suffix[1:].isdigit()),
+        key=lambda path: int(path.suffix[1:]),
+        reverse=True,
+    )
+    return [*backups, log_path] if log_path.exists() else backups
+
+
+def iter_log_bytes(log_path: Path, chunk_size: int = 65536) -> Iterator[bytes]:
+    for path in log_files(log_path):
+        try:
+            handle = path.open("rb")
+        except FileNotFoundError:
+            continue
+        with handle:
+            while chunk := handle.read(chunk_size):
+                yield chunk
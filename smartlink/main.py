@@ -6,9 +6,9 @@ import threading
 import time
 import webbrowser
 
-from werkzeug.serving import make_server
-
 from smartlink import create_app
+from smartlink.models import AppSettings
+from smartlink.server import create_server
 from smartlink.services.network import get_lan_addresses
 from smartlink.services.tray import TrayManager, tray_available
 
@@ -21,28 +21,12 @@ def resolve_access_host(listen_host: str) -> str:
     return normalized
 
 
-def start_adb_initializer(state, settings) -> threading.Thread:
-    """后台初始化 ADB，避免阻塞 Web 启动。"""
-
-    def _worker() -> None:
-        time.sleep(2)
-        state.logger.info("[SmartLink] adb init start")
-        try:
-            result = state.adb_service.connect_if_needed(settings)
-            outcome = "done" if result.success else "failed"
-            state.logger.info("[SmartLink] adb init %s message=%s", outcome, result.message)
-        except Exception as exc:  # pragma: no cover - defensive path
-            state.logger.error("[SmartLink] adb init failed error=%s", exc, exc_info=True)
-
-    thread = threading.Thread(target=_worker, daemon=True, name="smartlink-adb-init")
-    thread.start()
-    return thread
-
-
 class ServerThread(threading.Thread):
-    def __init__(self, app, host: str, port: int) -> None:
-        super().__init__(daemon=True)
-        self.server = make_server(host, port, app, threaded=True)
+    def __init__(self, app, host: str, port: int, settings: AppSettings) -> None:
+        super().__init__(daemon=True, name="smartlink-server")
+        self.server = create_server(app, host, port, settings)
+        self.drain_timeout = settings.server_drain_timeout
+        self.events = app.extensions["smartlink"].events
         self.ctx = app.app_context()
         self.ctx.push()
 
@@ -50,7 +34,9 @@ class ServerThread(threading.Thread):
         self.server.serve_forever()
 
     def shutdown(self) -> None:
-        self.server.shutdown()
+        # SSE 响应要等事件总线关闭才会结束，先关总线再等在途请求
+        self.events.close()
+        self.server.drain(self.drain_timeout)
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -88,21 +74,20 @@ def main() -> int:
 
     if settings.tray_enabled and not args.disable_tray and tray_available():
         try:
-            server = ServerThread(app, host, port)
+            server = ServerThread(app, host, port, settings)
             server.start()
         except OSError as exc:
             state.logger.error("service startup failed: %s", exc, exc_info=True)
-            state.integration_manager.stop()
-            state.action_service.shutdown()
+            state.shutdown()
             return 1
 
         state.logger.info("[SmartLink] web server ready")
-        start_adb_initializer(state, settings)
+        state.adb_service.start_tracking()
+        state.adb_keeper.start()
 
         def _shutdown() -> None:
-            state.integration_manager.stop()
-            state.action_service.shutdown()
             server.shutdown()
+            state.shutdown()
             os._exit(0)
 
         try:
@@ -111,21 +96,26 @@ def main() -> int:
         except Exception as exc:  # pragma: no cover - tray env dependent
             state.logger.error("tray runtime error: %s", exc, exc_info=True)
             server.shutdown()
-            state.integration_manager.stop()
-            state.action_service.shutdown()
+            state.shutdown()
             return 1
 
-    start_adb_initializer(state, settings)
-    state.logger.info("[SmartLink] web server ready")
     try:
-        app.run(host=host, port=port, threaded=True)
+        server = ServerThread(app, host, port, settings)
     except OSError as exc:
         state.logger.error("service startup failed: %s", exc, exc_info=True)
+        state.shutdown()
         return 1
+    state.adb_service.start_tracking()
+    state.adb_keeper.start()
+    state.logger.info("[SmartLink] web server ready mode=%s", settings.server_mode)
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        state.logger.info("[SmartLink] stopping...")
     except Exception as exc:
         state.logger.error("service runtime error: %s", exc, exc_info=True)
         return 1
     finally:
-        state.integration_manager.stop()
-        state.action_service.shutdown()
+        server.shutdown()
+        state.shutdown()
     return 0
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import UTC, datetime
 from typing import Any
 
 ACTION_TYPES = ("exe", "adb", "music", "brightness")
+ADB_BACKENDS = ("subprocess", "socket")
+SERVER_MODES = ("pool", "waitress", "dev")
 
 
 def now_iso() -> str:
@@ -21,6 +23,28 @@ def split_csv(value: str | list[str] | None) -> list[str]:
     return [item.strip() for item in raw_items if item and str(item).strip()]
 
 
+def parse_groups(value: str | dict[str, Any] | None) -> dict[str, list[str]]:
+    """解析设备分组，支持 {"客厅": ["a", "b"]} 或 "客厅=a,b; 卧室=c" 两种写法。"""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        items = value.items()
+    else:
+        items = (chunk.partition("=")[::2] for chunk in str(value).split(";"))
+    groups: dict[str, list[str]] = {}
+    for name, members in items:
+        key = str(name).strip()
+        serials = split_csv(members)
+        if key and serials:
+            groups[key] = serials
+    return groups
+
+
+def pick_choice(value: Any, choices: tuple[str, ...], default: str) -> str:
+    text = str(value or "").strip().lower()
+    return text if text in choices else default
+
+
 @dataclass(slots=True)
 class ActionConfig:
     name: str
@@ -29,6 +53,7 @@ class ActionConfig:
     uri_scheme: str = ""
     card_ids: list[str] = field(default_factory=list)
     bafy_topic: str = ""
+    adb_targets: list[str] = field(default_factory=list)
     category: str = "默认"
     tags: list[str] = field(default_factory=list)
     favorite: bool = False
@@ -49,6 +74,7 @@ class ActionConfig:
             uri_scheme=str(data.get("uri_scheme", "") or ""),
             card_ids=split_csv(data.get("card_ids") or data.get("card_id")),
             bafy_topic=str(data.get("bafy_topic", "") or ""),
+            adb_targets=split_csv(data.get("adb_targets")),
             category=str(data.get("category", "默认") or "默认"),
             tags=split_csv(data.get("tags")),
             favorite=bool(data.get("favorite", False)),
@@ -61,6 +87,15 @@ class ActionConfig:
             last_message=str(data.get("last_message", "") or ""),
         )
 
+    def copy(self) -> ActionConfig:
+        """连同列表字段一起复制，改副本不会影响原对象。"""
+        return replace(
+            self,
+            card_ids=list(self.card_ids),
+            adb_targets=list(self.adb_targets),
+            tags=list(self.tags),
+        )
+
     def to_dict(self) -> dict[str, Any]:
         return {
             "name": self.name,
@@ -69,6 +104,7 @@ class ActionConfig:
             "uri_scheme": self.uri_scheme,
             "card_ids": self.card_ids,
             "bafy_topic": self.bafy_topic,
+            "adb_targets": self.adb_targets,
             "category": self.category,
             "tags": self.tags,
             "favorite": self.favorite,
@@ -89,6 +125,10 @@ class ActionConfig:
     def tags_text(self) -> str:
         return ", ".join(self.tags)
 
+    @property
+    def adb_targets_text(self) -> str:
+        return ", ".join(self.adb_targets)
+
 
 @dataclass(slots=True)
 class AppSettings:
@@ -100,9 +140,33 @@ class AppSettings:
     )
     allowed_ips: list[str] = field(default_factory=list)
     request_timeout: int = 15
+    server_mode: str = "pool"
+    server_threads: int = 16
+    server_backlog: int = 128
+    server_keepalive: float = 5.0
+    server_drain_timeout: float = 5.0
     adb_ip: str = ""
+    adb_backend: str = "subprocess"
+    adb_server_port: int = 5037
+    adb_state_ttl: float = 5.0
+    adb_groups: dict[str, list[str]] = field(default_factory=dict)
+    adb_keepalive_interval: float = 5.0
+    adb_reconnect_max_backoff: float = 60.0
+    trigger_debounce_ms: int = 800
+    structured_logs: bool = True
     serial_port: str = "COM3"
+    serial_baudrate: int = 9600
+    card_terminator: str = "\n"
+    card_frame_length: int = 0
     bafy_uid: str = ""
+    mqtt_host: str = "bemfa.com"
+    mqtt_port: int = 9501
+    mqtt_qos: int = 0
+    mqtt_result_topic: str = ""
+    mqtt_result_host: str = ""
+    mqtt_result_port: int = 0
+    mqtt_result_batch: int = 20
+    mqtt_result_rate: float = 2.0
     enable_card_reader: bool = False
     enable_adb_connect: bool = False
     music_screen_on: bool = True
@@ -127,9 +191,35 @@ class AppSettings:
             or ["127.0.0.1/32", "192.168.0.0/16", "10.0.0.0/8", "172.16.0.0/12"],
             allowed_ips=split_csv(data.get("allowed_ips")),
             request_timeout=max(3, int(data.get("request_timeout", 15) or 15)),
+            server_mode=pick_choice(data.get("server_mode"), SERVER_MODES, "pool"),
+            server_threads=max(2, int(data.get("server_threads", 16) or 16)),
+            server_backlog=max(1, int(data.get("server_backlog", 128) or 128)),
+            server_keepalive=max(0.5, float(data.get("server_keepalive", 5.0) or 5.0)),
+            server_drain_timeout=max(0.0, float(data.get("server_drain_timeout", 5.0) or 0.0)),
             adb_ip=str(data.get("adb_ip", "") or ""),
+            adb_backend=pick_choice(data.get("adb_backend"), ADB_BACKENDS, "subprocess"),
+            adb_server_port=min(65535, max(1, int(data.get("adb_server_port", 5037) or 5037))),
+            adb_state_ttl=max(0.0, float(data.get("adb_state_ttl", 5.0) or 0.0)),
+            adb_groups=parse_groups(data.get("adb_groups")),
+            adb_keepalive_interval=max(1.0, float(data.get("adb_keepalive_interval", 5.0) or 5.0)),
+            adb_reconnect_max_backoff=max(
+                1.0, float(data.get("adb_reconnect_max_backoff", 60.0) or 60.0)
+            ),
+            trigger_debounce_ms=max(0, int(data.get("trigger_debounce_ms", 800) or 0)),
+            structured_logs=bool(data.get("structured_logs", True)),
             serial_port=str(data.get("serial_port", "COM3") or "COM3"),
+            serial_baudrate=max(300, int(data.get("serial_baudrate", 9600) or 9600)),
+            card_terminator=str(data.get("card_terminator", "\n") or "\n"),
+            card_frame_length=min(64, max(0, int(data.get("card_frame_length", 0) or 0))),
             bafy_uid=str(data.get("bafy_uid", "") or ""),
+            mqtt_host=str(data.get("mqtt_host", "bemfa.com") or "bemfa.com").strip(),
+            mqtt_port=min(65535, max(1, int(data.get("mqtt_port", 9501) or 9501))),
+            mqtt_qos=min(2, max(0, int(data.get("mqtt_qos", 0) or 0))),
+            mqtt_result_topic=str(data.get("mqtt_result_topic", "") or "").strip(),
+            mqtt_result_host=str(data.get("mqtt_result_host", "") or "").strip(),
+            mqtt_result_port=min(65535, max(0, int(data.get("mqtt_result_port", 0) or 0))),
+            mqtt_result_batch=max(1, int(data.get("mqtt_result_batch", 20) or 20)),
+            mqtt_result_rate=max(0.1, float(data.get("mqtt_result_rate", 2.0) or 2.0)),
             enable_card_reader=bool(data.get("enable_card_reader", False)),
             enable_adb_connect=bool(data.get("enable_adb_connect", False)),
             music_screen_on=bool(data.get("music_screen_on", True)),
@@ -153,9 +243,33 @@ class AppSettings:
             "allowed_networks": self.allowed_networks,
             "allowed_ips": self.allowed_ips,
             "request_timeout": self.request_timeout,
+            "server_mode": self.server_mode,
+            "server_threads": self.server_threads,
+            "server_backlog": self.server_backlog,
+            "server_keepalive": self.server_keepalive,
+            "server_drain_timeout": self.server_drain_timeout,
             "adb_ip": self.adb_ip,
+            "adb_backend": self.adb_backend,
+            "adb_server_port": self.adb_server_port,
+            "adb_state_ttl": self.adb_state_ttl,
+            "adb_groups": self.adb_groups,
+            "adb_keepalive_interval": self.adb_keepalive_interval,
+            "adb_reconnect_max_backoff": self.adb_reconnect_max_backoff,
+            "trigger_debounce_ms": self.trigger_debounce_ms,
+            "structured_logs": self.structured_logs,
             "serial_port": self.serial_port,
+            "serial_baudrate": self.serial_baudrate,
+            "card_terminator": self.card_terminator,
+            "card_frame_length": self.card_frame_length,
             "bafy_uid": self.bafy_uid,
+            "mqtt_host": self.mqtt_host,
+            "mqtt_port": self.mqtt_port,
+            "mqtt_qos": self.mqtt_qos,
+            "mqtt_result_topic": self.mqtt_result_topic,
+            "mqtt_result_host": self.mqtt_result_host,
+            "mqtt_result_port": self.mqtt_result_port,
+            "mqtt_result_batch": self.mqtt_result_batch,
+            "mqtt_result_rate": self.mqtt_result_rate,
             "enable_card_reader": self.enable_card_reader,
             "enable_adb_connect": self.enable_adb_connect,
             "music_screen_on": self.music_screen_on,
@@ -171,6 +285,12 @@ class AppSettings:
             "ssh_port": self.ssh_port,
         }
 
+    @property
+    def adb_groups_text(self) -> str:
+        return "; ".join(
+            f"{name}={', '.join(serials)}" for name, serials in self.adb_groups.items()
+        )
+
     @property
     def masked_token(self) -> str:
         if not self.api_token:
@@ -202,8 +322,12 @@ class TaskRecord:
     source: str
     action_name: str
     status: str = "queued"
+    lane: str = ""
     created_at: str = field(default_factory=now_iso)
+    started_at: str = ""
     finished_at: str = ""
+    wait_ms: float | None = None
+    coalesced: int = 0
     success: bool | None = None
     message: str = ""
     error: str | None = None
@@ -214,8 +338,12 @@ class TaskRecord:
             "source": self.source,
             "action_name": self.action_name,
             "status": self.status,
+            "lane": self.lane,
             "created_at": self.created_at,
+            "started_at": self.started_at,
             "finished_at": self.finished_at,
+            "wait_ms": self.wait_ms,
+            "coalesced": self.coalesced,
             "success": self.success,
             "message": self.message,
             "error": self.error,
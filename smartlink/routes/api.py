@@ -1,13 +1,27 @@
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request
+import json
 
-from smartlink.logging_utils import tail_log
+from flask import Blueprint, Response, jsonify, request
+
+from smartlink.logging_utils import read_log_after, tail_log
+from smartlink.models import split_csv
 from smartlink.runtime import get_state
-from smartlink.services.network import get_client_ip, ip_allowed
+from smartlink.services.events import SubscriberLimitError
+from smartlink.services.network import get_client_ip
+from smartlink.structured_logs import INDEXED_FIELDS
 
 api_bp = Blueprint("api", __name__)
 
+TASK_MESSAGES = {
+    "queued": "任务排队中。",
+    "running": "任务执行中。",
+    "finished": "任务已完成。",
+    "rejected": "任务被拒绝。",
+    "cancelled": "任务已取消。",
+    "failed": "任务执行异常。",
+}
+
 
 def api_response(
     success: bool, message: str, data=None, error: str | None = None, status: int = 200
@@ -23,17 +37,27 @@ def api_response(
 
 
 def require_token():
-    state = get_state()
-    settings = state.config_manager.get_settings()
+    policy = get_state().get_auth_policy()
     token = request.headers.get("X-SmartLink-Token") or request.args.get("token", "")
-    client_ip = get_client_ip(request)
-    if token != settings.api_token:
+    if not policy.token_valid(token):
         return api_response(False, "Token 无效。", error="unauthorized", status=401)
-    if not ip_allowed(client_ip, settings):
+    if not policy.ip_allowed(get_client_ip(request)):
         return api_response(False, "当前 IP 不在允许列表内。", error="ip_forbidden", status=403)
     return None
 
 
+def parse_brightness(payload: dict):
+    brightness_value = payload.get("brightness_value")
+    if brightness_value is None:
+        return None, None
+    try:
+        return int(brightness_value), None
+    except (TypeError, ValueError):
+        return None, api_response(
+            False, "brightness_value 必须是整数。", error="invalid_brightness", status=400
+        )
+
+
 @api_bp.before_request
 def before_api_request():
     failure = require_token()
@@ -46,6 +70,9 @@ def before_api_request():
 def health():
     state = get_state()
     adb_status = state.adb_service.list_devices()
+    adb_status["states"] = state.adb_service.device_states()
+    if state.adb_keeper is not None:
+        adb_status["keeper"] = state.adb_keeper.status()
     integration_status = state.integration_manager.status()
     settings = state.config_manager.get_settings()
     last_task = state.action_service.get_task_history(limit=1)
@@ -61,6 +88,9 @@ def health():
             },
             "adb": adb_status,
             "integrations": integration_status,
+            "scheduler": state.action_service.scheduler.metrics(),
+            "events": state.events.stats(),
+            "logging": state.log_pipeline.stats() if state.log_pipeline else {"running": False},
             "last_task": last_task[0].to_dict() if last_task else {},
         },
     )
@@ -87,8 +117,38 @@ def actions():
 @api_bp.get("/logs")
 def logs():
     state = get_state()
-    logs_data = [line.rstrip("\n") for line in tail_log(state.paths.log_file, limit=50)]
-    return api_response(True, "已返回最近日志。", {"logs": logs_data})
+    log_file = state.paths.log_file
+    try:
+        limit = min(1000, max(1, int(request.args.get("limit", 50))))
+        after = request.args.get("after")
+        offset = int(after) if after not in (None, "") else None
+    except ValueError:
+        return api_response(False, "after / limit 必须是整数。", error="invalid_cursor", status=400)
+    if offset is None:
+        next_offset = log_file.stat().st_size if log_file.exists() else 0
+        lines = tail_log(log_file, limit=limit)
+        reset = False
+    else:
+        lines, next_offset, reset = read_log_after(log_file, offset, limit=limit)
+    logs_data = [line.rstrip("\r\n") for line in lines]
+    return api_response(
+        True, "已返回最近日志。", {"logs": logs_data, "offset": next_offset, "reset": reset}
+    )
+
+
+@api_bp.get("/logs/search")
+def search_logs():
+    filters = {name: request.args.get(name, "").strip() for name in INDEXED_FIELDS}
+    try:
+        limit = min(1000, max(1, int(request.args.get("limit", 100))))
+        since = float(request.args["since"]) if request.args.get("since") else None
+        until = float(request.args["until"]) if request.args.get("until") else None
+    except ValueError:
+        return api_response(
+            False, "since / until / limit 必须是数字。", error="invalid_query", status=400
+        )
+    records = get_state().log_search.search(filters, since=since, until=until, limit=limit)
+    return api_response(True, "已返回匹配的日志。", {"records": records, "count": len(records)})
 
 
 @api_bp.post("/run")
@@ -97,14 +157,9 @@ def run_action():
     action_name = payload.get("action") or payload.get("name") or ""
     if not action_name:
         return api_response(False, "缺少 action 字段。", error="missing_action", status=400)
-    brightness_value = payload.get("brightness_value")
-    if brightness_value is not None:
-        try:
-            brightness_value = int(brightness_value)
-        except (TypeError, ValueError):
-            return api_response(
-                False, "brightness_value 必须是整数。", error="invalid_brightness", status=400
-            )
+    brightness_value, failure = parse_brightness(payload)
+    if failure is not None:
+        return failure
     result = get_state().action_service.run_action_sync(
         action_name,
         brightness_value=brightness_value,
@@ -119,14 +174,9 @@ def run_action():
 @api_bp.post("/run/<action_name>")
 def run_action_by_name(action_name: str):
     payload = request.get_json(silent=True) or {}
-    brightness_value = payload.get("brightness_value")
-    if brightness_value is not None:
-        try:
-            brightness_value = int(brightness_value)
-        except (TypeError, ValueError):
-            return api_response(
-                False, "brightness_value 必须是整数。", error="invalid_brightness", status=400
-            )
+    brightness_value, failure = parse_brightness(payload)
+    if failure is not None:
+        return failure
     result = get_state().action_service.run_action_sync(
         action_name,
         brightness_value=brightness_value,
@@ -138,6 +188,78 @@ def run_action_by_name(action_name: str):
     )
 
 
+@api_bp.post("/tasks")
+def create_task():
+    payload = request.get_json(silent=True) or {}
+    action_name = payload.get("action") or payload.get("name") or ""
+    if not action_name:
+        return api_response(False, "缺少 action 字段。", error="missing_action", status=400)
+    brightness_value, failure = parse_brightness(payload)
+    if failure is not None:
+        return failure
+    task = get_state().action_service.run_action_async(
+        action_name,
+        brightness_value=brightness_value,
+        source="api",
+        require_api_allowed=True,
+    )
+    if task.status == "rejected":
+        return api_response(False, task.message, task.to_dict(), task.error, 429)
+    if task.status == "finished" and not task.success:
+        status = 404 if task.error == "action_not_found" else 400
+        return api_response(False, task.message, task.to_dict(), task.error, status)
+    return api_response(True, "任务已提交。", task.to_dict(), status=202)
+
+
+@api_bp.get("/tasks/<task_id>")
+def get_task(task_id: str):
+    state = get_state()
+    try:
+        wait = float(request.args.get("wait", 0) or 0)
+    except ValueError:
+        return api_response(False, "wait 必须是数字。", error="invalid_wait", status=400)
+    wait = min(max(0.0, wait), float(state.config_manager.get_settings().request_timeout))
+    service = state.action_service
+    task = service.wait_for_task(task_id, wait) if wait else service.get_task(task_id)
+    if task is None:
+        return api_response(False, f"未找到任务: {task_id}", error="task_not_found", status=404)
+    return api_response(True, TASK_MESSAGES.get(task.status, task.status), task.to_dict())
+
+
+@api_bp.get("/events")
+def events():
+    state = get_state()
+    try:
+        subscription = state.events.subscribe(set(split_csv(request.args.get("topics"))))
+    except SubscriberLimitError as exc:
+        # SSE 连接会一直占用工作线程，超出上限直接拒绝，保证普通请求还有线程可用
+        return api_response(False, str(exc), {"limit": exc.limit}, "too_many_subscribers", 503)
+    try:
+        keepalive = min(60.0, max(1.0, float(request.args.get("keepalive", 15))))
+    except ValueError:
+        keepalive = 15.0
+
+    def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.closed:
+                batch, missed = subscription.get(timeout=keepalive)
+                if missed:
+                    yield f"event: overflow\ndata: {json.dumps({'dropped': missed})}\n\n"
+                if not batch:
+                    yield ": keep-alive\n\n"
+                for event in batch:
+                    yield event.to_sse()
+        finally:
+            subscription.close()
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @api_bp.post("/system/volume")
 def api_volume():
     payload = request.get_json(silent=True) or {}
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-import base64
+import hashlib
 import io
 import json
+from functools import lru_cache
 
 import qrcode
 from flask import Blueprint, Response, flash, redirect, render_template, request, send_file, url_for
 
-from smartlink.logging_utils import tail_log
+from smartlink.logging_utils import iter_log_bytes, tail_log
 from smartlink.runtime import get_state
 from smartlink.services.network import get_lan_addresses
 
@@ -24,7 +25,12 @@ def _settings_from_form() -> dict:
         "allowed_ips": form.get("allowed_ips", ""),
         "request_timeout": int(form.get("request_timeout", "15") or 15),
         "adb_ip": form.get("adb_ip", "").strip(),
+        "adb_backend": form.get("adb_backend", "subprocess"),
+        "adb_server_port": int(form.get("adb_server_port", "5037") or 5037),
+        "adb_state_ttl": float(form.get("adb_state_ttl", "5") or 0),
+        "adb_groups": form.get("adb_groups", ""),
         "serial_port": form.get("serial_port", "COM3").strip() or "COM3",
+        "serial_baudrate": int(form.get("serial_baudrate", "9600") or 9600),
         "bafy_uid": form.get("bafy_uid", "").strip(),
         "enable_card_reader": bool(form.get("enable_card_reader")),
         "enable_adb_connect": bool(form.get("enable_adb_connect")),
@@ -51,6 +57,7 @@ def _action_payload() -> dict:
         "uri_scheme": form.get("uri_scheme", ""),
         "card_ids": form.get("card_ids", ""),
         "bafy_topic": form.get("bafy_topic", ""),
+        "adb_targets": form.get("adb_targets", ""),
         "category": form.get("category", "默认"),
         "tags": form.get("tags", ""),
         "favorite": bool(form.get("favorite")),
@@ -60,11 +67,16 @@ def _action_payload() -> dict:
     }
 
 
-def _qr_data_uri(url: str) -> str:
+@lru_cache(maxsize=8)
+def _qr_png(url: str) -> bytes:
     image = qrcode.make(url)
     buffer = io.BytesIO()
     image.save(buffer, format="PNG")
-    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+    return buffer.getvalue()
+
+
+def _lan_base_url(settings) -> str:
+    return f"http://{get_lan_addresses()[-1]}:{settings.port}"
 
 
 @web_bp.get("/")
@@ -88,9 +100,9 @@ def dashboard():
         item for item in all_actions if item.favorite and item.allow_api and item.enabled
     ]
     lan_addresses = get_lan_addresses()
-    lan_host = lan_addresses[-1]
-    mobile_url = f"http://{lan_host}:{settings.port}{url_for('web.mobile')}"
-    api_base = f"http://{lan_host}:{settings.port}/api"
+    base_url = _lan_base_url(settings)
+    mobile_url = f"{base_url}{url_for('web.mobile')}"
+    api_base = f"{base_url}/api"
     preview_payload = state.config_manager.export_payload()
     preview_payload["actions"] = [
         item for item in preview_payload.get("actions", []) if item.get("type") != "music"
@@ -125,7 +137,7 @@ def dashboard():
         api_base=api_base,
         mobile_url=mobile_url,
         config_preview=config_preview,
-        qr_data_uri=_qr_data_uri(mobile_url),
+        qr_url=url_for("web.mobile_qr"),
         favorite_actions=favorite_actions,
         lan_addresses=lan_addresses,
         ssh_command=ssh_command,
@@ -263,9 +275,17 @@ def export_config():
 @web_bp.get("/logs")
 def logs_text():
     state = get_state()
-    return Response(
-        state.paths.log_file.read_text(encoding="utf-8", errors="ignore"), mimetype="text/plain"
-    )
+    return Response(iter_log_bytes(state.paths.log_file), mimetype="text/plain")
+
+
+@web_bp.get("/mobile/qr.png")
+def mobile_qr():
+    settings = get_state().config_manager.get_settings()
+    mobile_url = f"{_lan_base_url(settings)}{url_for('web.mobile')}"
+    response = Response(_qr_png(mobile_url), mimetype="image/png")
+    response.set_etag(hashlib.sha256(mobile_url.encode("utf-8")).hexdigest()[:16])
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @web_bp.get("/mobile")
@@ -280,11 +300,10 @@ def mobile():
         for action in get_state().action_service.list_actions()
         if action.type != "music" and action.allow_api and action.enabled
     ][:8]
-    lan_host = get_lan_addresses()[-1]
     return render_template(
         "mobile.html",
         actions=actions,
-        api_base=f"http://{lan_host}:{settings.port}/api",
+        api_base=f"{_lan_base_url(settings)}/api",
         token_hint=settings.masked_token,
         guide_url=url_for("web.dashboard"),
     )
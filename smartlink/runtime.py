@@ -9,12 +9,15 @@ from typing import Any
 
 from flask import current_app
 
+from smartlink.services.network import AuthPolicy
+
 
 @dataclass(slots=True)
 class AppPaths:
     root: Path
     config_file: Path
     log_file: Path
+    json_log_file: Path | None = None
 
 
 @dataclass(slots=True)
@@ -26,12 +29,38 @@ class AppState:
     adb_service: Any
     system_service: Any
     integration_manager: Any
+    adb_keeper: Any = None
+    events: Any = None
+    log_pipeline: Any = None
+    log_search: Any = None
+    auth_policy: AuthPolicy | None = None
     started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
     request_history: deque[dict[str, Any]] = field(default_factory=lambda: deque(maxlen=200))
 
+    def get_auth_policy(self) -> AuthPolicy:
+        """配置版本未变时复用已编译的鉴权策略，避免每个请求都重新读取和解析配置。"""
+        version = self.config_manager.version
+        policy = self.auth_policy
+        if policy is None or policy.version != version:
+            policy = AuthPolicy.from_settings(self.config_manager.get_settings(), version)
+            self.auth_policy = policy
+        return policy
+
     def record_request(self, record: dict[str, Any]) -> None:
         self.request_history.appendleft(record)
 
+    def shutdown(self) -> None:
+        if self.events is not None:
+            self.events.close()
+        if self.adb_keeper is not None:
+            self.adb_keeper.stop()
+        self.integration_manager.stop()
+        self.action_service.shutdown()
+        self.adb_service.shutdown()
+        self.config_manager.close()
+        if self.log_pipeline is not None:
+            self.log_pipeline.stop()
+
 
 def get_state() -> AppState:
     return current_app.extensions["smartlink"]
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import io
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler, make_server
+
+from smartlink.models import AppSettings
+
+try:
+    import waitress.server as waitress_server
+except ImportError:  # pragma: no cover
+    waitress_server = None
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """HTTP/1.1 长连接；每次只处理一个请求，请求之间的空闲等待交给服务器的 selector。
+
+    Werkzeug 的 run_wsgi 总是回 Connection: close，响应后还会把 socket 里剩余的数据读掉丢弃。
+    没有请求体的 HTTP/1.1 请求不需要这一步，这里去掉 close 头并让丢弃逻辑读一个空缓冲区，
+    连接里的下一个请求才能留给 handle_one_request；带请求体的请求仍按 Werkzeug 的方式关闭连接。
+    """
+
+    protocol_version = "HTTP/1.1"
+    keep_alive = False
+    _reuse = False
+
+    def setup(self) -> None:
+        self.timeout = self.server.keepalive_timeout
+        super().setup()
+
+    def handle(self) -> None:
+        self.keep_alive = False
+        self.close_connection = True
+        try:
+            self.handle_one_request()
+        except (ConnectionError, TimeoutError) as exc:
+            self.connection_dropped(exc)
+            return
+        self.keep_alive = self._reuse and not self.close_connection
+
+    def make_environ(self):
+        environ = super().make_environ()
+        self._reuse = (
+            self.request_version == "HTTP/1.1"
+            and not self.close_connection
+            and "Transfer-Encoding" not in self.headers
+            and self.headers.get("Content-Length", "0").strip() in ("", "0")
+        )
+        return environ
+
+    def run_wsgi(self) -> None:
+        self._reuse = False
+        rfile = self.rfile
+        try:
+            super().run_wsgi()
+        finally:
+            self.rfile = rfile
+
+    def send_header(self, keyword: str, value: str) -> None:
+        if self._reuse and keyword.lower() == "connection" and value.lower() == "close":
+            # 请求体已经确定为空，响应写完后连接可以继续用
+            self.rfile = io.BytesIO()
+            return
+        super().send_header(keyword, value)
+
+    def finish(self) -> None:
+        # 保持的连接在下一个请求之前还要用 rfile / wfile，等连接关闭时再关
+        if not self.keep_alive:
+            super().finish()
+
+    def resume(self) -> None:
+        try:
+            self.handle()
+        finally:
+            self.finish()
+
+    def pending(self) -> bool:
+        """rfile 缓冲区或 socket 里是否已经有下一个请求的数据，不阻塞。"""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return True
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def close(self) -> None:
+        self.keep_alive = False
+        super().finish()
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """固定大小线程池处理请求，可配置监听队列长度，停止时先等待在途请求处理完。
+
+    工作线程只在处理请求时占用：请求结束后长连接交给空闲监视线程用 selector 等待，
+    有新数据再提交回线程池，空闲超过 keepalive 秒的连接由监视线程关闭。
+    """
+
+    multithread = True
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app,
+        threads: int = 16,
+        backlog: int = 128,
+        keepalive_timeout: float = 5.0,
+    ) -> None:
+        self.request_queue_size = backlog
+        self.keepalive_timeout = keepalive_timeout
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="smartlink-http")
+        self._connections: set[socket.socket] = set()
+        self._idle = threading.Condition()
+        self._serving = threading.Event()
+        self._closing = False
+        self._parking: list[tuple[KeepAliveRequestHandler, float]] = []
+        super().__init__(host, port, app, handler=KeepAliveRequestHandler)
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._watcher = threading.Thread(
+            target=self._watch_idle, daemon=True, name="smartlink-http-idle"
+        )
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        self._serving.set()
+        self._watcher.start()
+        super().serve_forever(poll_interval=poll_interval)
+
+    def process_request(self, request, client_address) -> None:
+        with self._idle:
+            self._connections.add(request)
+        self.pool.submit(self._process, request, client_address)
+
+    def finish_request(self, request, client_address) -> KeepAliveRequestHandler:
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def _process(self, request, client_address, handler=None) -> None:
+        keep_alive = False
+        try:
+            if handler is None:
+                handler = self.finish_request(request, client_address)
+            else:
+                handler.resume()
+            keep_alive = handler.keep_alive
+        except Exception:
+            self.handle_error(request, client_address)
+        if keep_alive and self._park(handler):
+            return
+        if keep_alive:
+            handler.close()
+        self._release(request)
+
+    def _release(self, request) -> None:
+        self.shutdown_request(request)
+        with self._idle:
+            self._connections.discard(request)
+            self._idle.notify_all()
+
+    def _park(self, handler: KeepAliveRequestHandler) -> bool:
+        """把处理完请求的长连接交给监视线程；正在停止时返回 False，由调用方关闭连接。"""
+        pending = handler.pending()
+        with self._idle:
+            if self._closing:
+                return False
+            if pending:
+                # 流水线请求已经在缓冲区里，select 不会再提示，直接继续处理
+                self.pool.submit(self._process, handler.request, handler.client_address, handler)
+                return True
+            self._parking.append((handler, time.monotonic()))
+        self._wakeup()
+        return True
+
+    def _wakeup(self) -> None:
+        try:
+            self._wakeup_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _watch_idle(self) -> None:
+        selector = self._selector
+        while True:
+            with self._idle:
+                closing = self._closing
+                parking, self._parking = self._parking, []
+            for handler, parked_at in parking:
+                selector.register(handler.request, selectors.EVENT_READ, (handler, parked_at))
+            if closing:
+                break
+            now = time.monotonic()
+            for key in list(selector.get_map().values()):
+                if key.data is not None and now - key.data[1] > self.keepalive_timeout:
+                    selector.unregister(key.fileobj)
+                    self._close_parked(key.data[0])
+            for key, _events in selector.select(timeout=min(0.5, self.keepalive_timeout)):
+                if key.data is None:
+                    try:
+                        self._wakeup_r.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                selector.unregister(key.fileobj)
+                handler = key.data[0]
+                with self._idle:
+                    if not self._closing:
+                        self.pool.submit(
+                            self._process, handler.request, handler.client_address, handler
+                        )
+                        continue
+                self._close_parked(handler)
+        self._close_selector()
+
+    def _close_parked(self, handler: KeepAliveRequestHandler) -> None:
+        handler.close()
+        self._release(handler.request)
+
+    def _close_selector(self) -> None:
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                self._close_parked(key.data[0])
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """停止接受新连接并关闭空闲长连接，最多等待 timeout 秒让在途请求结束，超时的连接强制关闭。"""
+        if self._serving.is_set():
+            self.shutdown()
+        self.server_close()
+        with self._idle:
+            self._closing = True
+        if self._watcher.is_alive():
+            self._wakeup()
+            self._watcher.join()
+        elif self._watcher.ident is None:
+            self._close_selector()
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._connections and (remaining := deadline - time.monotonic()) > 0:
+                self._idle.wait(remaining)
+            leftover = list(self._connections)
+        for connection in leftover:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        return not leftover
+
+
+class DevServer:
+    """Werkzeug 开发服务器，每个连接一个线程，保留给调试使用。"""
+
+    def __init__(self, host: str, port: int, app) -> None:
+        self.server = make_server(host, port, app, threaded=True)
+        self.port = self.server.port
+        self._serving = threading.Event()
+
+    def serve_forever(self) -> None:
+        self._serving.set()
+        self.server.serve_forever()
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        if self._serving.is_set():
+            self.server.shutdown()
+        self.server.server_close()
+        return True
+
+
+class WaitressServer:
+    def __init__(self, host: str, port: int, app, settings: AppSettings) -> None:
+        self.server = waitress_server.create_server(
+            app,
+            host=host,
+            port=port,
+            threads=settings.server_threads,
+            backlog=settings.server_backlog,
+            channel_timeout=max(1, int(settings.server_keepalive)),
+        )
+        self.port = self.server.effective_port
+
+    def serve_forever(self) -> None:
+        self.server.run()
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        self.server.close()
+        return self.server.task_dispatcher.shutdown(cancel_pending=True, timeout=timeout)
+
+
+def create_server(app, host: str, port: int, settings: AppSettings):
+    mode = settings.server_mode
+    if mode == "waitress" and waitress_server is None:
+        app.extensions["smartlink"].logger.warning("waitress 未安装，改用内置线程池服务器")
+        mode = "pool"
+    if mode == "dev":
+        return DevServer(host, port, app)
+    if mode == "waitress":
+        return WaitressServer(host, port, app, settings)
+    return PooledWSGIServer(
+        host,
+        port,
+        app,
+        threads=settings.server_threads,
+        backlog=settings.server_backlog,
+        keepalive_timeout=settings.server_keepalive,
+    )
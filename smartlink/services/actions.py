@@ -5,10 +5,14 @@ import json
 import os
 import shlex
 import subprocess
+import threading
+import time
 import urllib.parse
 import uuid
 from collections import deque
-from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+from concurrent.futures import CancelledError, Future, wait
+from dataclasses import dataclass
 from typing import Any
 
 from smartlink.config import ConfigManager
@@ -21,6 +25,14 @@ from smartlink.models import (
     now_iso,
 )
 from smartlink.services.network import parse_lines
+from smartlink.services.scheduler import (
+    DEFAULT_PRIORITY,
+    SOURCE_PRIORITIES,
+    ActionScheduler,
+    LaneSpec,
+    SchedulerFullError,
+)
+from smartlink.structured_logs import log_fields
 
 MUSIC_SCHEMES = {
     "网易云音乐": "ncm://start.weixin",
@@ -30,6 +42,21 @@ MUSIC_SCHEMES = {
     "Apple Music": "applemusic://start.weixin",
 }
 
+# 同一台设备上的 ADB 命令串行执行；EXE 只是启动进程，可以高并发
+ACTION_LANES = {
+    "adb": LaneSpec(workers=1, max_queue=16),
+    "exe": LaneSpec(workers=8, max_queue=64),
+    "system": LaneSpec(workers=2, max_queue=16),
+}
+
+
+@dataclass(slots=True)
+class _Trigger:
+    future: Future
+    value: int | None = None
+    started_at: float = 0.0
+    task: TaskRecord | None = None
+
 
 class CommandLauncher:
     def launch(self, command_line: str) -> ExecutionResult:
@@ -77,17 +104,42 @@ class ActionService:
         system_service,
         logger,
         launcher: CommandLauncher | None = None,
+        scheduler: ActionScheduler | None = None,
+        events=None,
     ) -> None:
         self.config_manager = config_manager
         self.adb_service = adb_service
         self.system_service = system_service
         self.logger = logger
         self.launcher = launcher or CommandLauncher()
-        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="smartlink")
+        self.scheduler = scheduler or ActionScheduler(ACTION_LANES)
+        self.events = events
         self.task_history: deque[TaskRecord] = deque(maxlen=100)
+        self._task_index: dict[str, tuple[TaskRecord, threading.Event]] = {}
+        self._task_lock = threading.Lock()
+        self._task_listeners: list[Callable[[TaskRecord], None]] = []
+        self._triggers: dict[str, _Trigger] = {}
+        self._pending: dict[str, _Trigger] = {}
+        self._trigger_lock = threading.Lock()
+        self.configure(config_manager.get_settings())
+        config_manager.add_listener(self._on_config_changed)
+
+    def configure(self, settings: AppSettings) -> None:
+        self.trigger_debounce = settings.trigger_debounce_ms / 1000
+
+    def _on_config_changed(self, _registry) -> None:
+        self.configure(self.config_manager.get_settings())
 
     def shutdown(self) -> None:
-        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.config_manager.remove_listener(self._on_config_changed)
+        self.scheduler.shutdown()
+
+    def lane_for(self, action: ActionConfig) -> str:
+        if action.type == "exe":
+            return "exe"
+        if action.type == "brightness":
+            return "system"
+        return f"adb:{','.join(action.adb_targets) or 'default'}"
 
     def list_actions(self) -> list[ActionConfig]:
         return self.config_manager.list_actions()
@@ -99,6 +151,39 @@ class ActionService:
     def get_task_history(self, limit: int = 20) -> list[TaskRecord]:
         return list(self.task_history)[:limit]
 
+    def get_task(self, task_id: str) -> TaskRecord | None:
+        entry = self._task_index.get(task_id)
+        return entry[0] if entry else None
+
+    def wait_for_task(self, task_id: str, timeout: float) -> TaskRecord | None:
+        entry = self._task_index.get(task_id)
+        if entry is None:
+            return None
+        task, done = entry
+        done.wait(timeout)
+        return task
+
+    def _remember(self, task: TaskRecord) -> None:
+        with self._task_lock:
+            if len(self.task_history) == self.task_history.maxlen:
+                evicted = self.task_history.pop()
+                self._task_index.pop(evicted.task_id, None)
+            self.task_history.appendleft(task)
+            self._task_index[task.task_id] = (task, threading.Event())
+        self._publish_task(task)
+
+    def _publish_task(self, task: TaskRecord) -> None:
+        if self.events is not None:
+            self.events.publish("task", task.to_dict())
+
+    def add_task_listener(self, listener: Callable[[TaskRecord], None]) -> None:
+        """任务结束（完成、拒绝、取消）时回调，回调里不应做阻塞操作。"""
+        self._task_listeners.append(listener)
+
+    def remove_task_listener(self, listener: Callable[[TaskRecord], None]) -> None:
+        if listener in self._task_listeners:
+            self._task_listeners.remove(listener)
+
     def validate_action(self, action: ActionConfig) -> list[str]:
         errors: list[str] = []
         if not action.name.strip():
@@ -125,6 +210,7 @@ class ActionService:
                 "uri_scheme": payload.get("uri_scheme", ""),
                 "card_ids": payload.get("card_ids", ""),
                 "bafy_topic": payload.get("bafy_topic", ""),
+                "adb_targets": payload.get("adb_targets", ""),
                 "category": payload.get("category", "默认"),
                 "tags": payload.get("tags", ""),
                 "favorite": payload.get("favorite", False),
@@ -148,23 +234,82 @@ class ActionService:
         self.config_manager.upsert_action(action, old_name=old_name)
         return True, [], action
 
-    def run_action_sync(
-        self,
-        name: str,
-        brightness_value: int | None = None,
-        source: str = "web",
-        require_api_allowed: bool = False,
-    ) -> ExecutionResult:
+    def _resolve(
+        self, name: str, require_api_allowed: bool
+    ) -> tuple[ActionConfig | None, ExecutionResult | None]:
         action = self.config_manager.get_action(name)
         if action is None:
-            return ExecutionResult(False, f"未找到动作: {name}", error="action_not_found")
+            return None, ExecutionResult(False, f"未找到动作: {name}", error="action_not_found")
         if not action.enabled:
-            return ExecutionResult(False, f"动作已被禁用: {name}", error="action_disabled")
+            return None, ExecutionResult(False, f"动作已被禁用: {name}", error="action_disabled")
         if require_api_allowed and not action.allow_api:
-            return ExecutionResult(False, f"动作未开放给 API: {name}", error="action_not_allowed")
+            return None, ExecutionResult(
+                False, f"动作未开放给 API: {name}", error="action_not_allowed"
+            )
+        return action, None
+
+    def _join_trigger(
+        self, action: ActionConfig, brightness_value: int | None
+    ) -> tuple[_Trigger, bool]:
+        """返回 (触发, 是否由调用方执行)；重复触发会并入正在进行或刚结束的那一次。"""
+        now = time.monotonic()
+        window = self.trigger_debounce
+        with self._trigger_lock:
+            current = self._triggers.get(action.name)
+            in_flight = current is not None and not current.future.done()
+            if action.type == "brightness":
+                # 亮度取最后一次的值：执行中再来的请求合并成一个排队任务，只保留最新亮度；
+                # 不做防抖，否则滑块最后停下的位置会被丢掉
+                pending = self._pending.get(action.name)
+                if pending is not None:
+                    pending.value = brightness_value
+                    return pending, False
+                trigger = _Trigger(Future(), brightness_value)
+                if in_flight:
+                    self._pending[action.name] = trigger
+                else:
+                    trigger.started_at = now
+                    self._triggers[action.name] = trigger
+                return trigger, True
+            # 启动类动作：执行中或防抖窗口内的重复触发直接丢弃
+            if current is not None and (in_flight or now - current.started_at < window):
+                return current, False
+            trigger = _Trigger(Future(), brightness_value, started_at=now)
+            self._triggers[action.name] = trigger
+            return trigger, True
+
+    def _previous_run(self, action: ActionConfig, trigger: _Trigger) -> Future | None:
+        """排队的亮度触发要等上一次执行结束才能开始，返回上一次的 future；无需等待时返回 None。"""
+        with self._trigger_lock:
+            current = self._triggers.get(action.name)
+            if current is None or current is trigger or current.future.done():
+                return None
+            return current.future
 
-        settings = self.config_manager.get_settings()
-        result = self._execute(action, settings, brightness_value)
+    def _take_turn(self, action: ActionConfig, trigger: _Trigger) -> int | None:
+        with self._trigger_lock:
+            if self._pending.get(action.name) is trigger:
+                del self._pending[action.name]
+            self._triggers[action.name] = trigger
+            trigger.started_at = time.monotonic()
+            return trigger.value
+
+    def _release_trigger(self, action: ActionConfig, trigger: _Trigger) -> None:
+        with self._trigger_lock:
+            if self._pending.get(action.name) is trigger:
+                del self._pending[action.name]
+            if self._triggers.get(action.name) is trigger:
+                del self._triggers[action.name]
+
+    def _run_trigger(self, action: ActionConfig, trigger: _Trigger, source: str) -> ExecutionResult:
+        brightness_value = self._take_turn(action, trigger)
+        try:
+            settings = self.config_manager.get_settings()
+            result = self._execute(action, settings, brightness_value)
+        except BaseException as exc:
+            trigger.future.set_exception(exc)
+            raise
+        trigger.future.set_result(result)
         self.config_manager.update_action_result(action.name, result.success, result.message)
         self.logger.info(
             "action_run source=%s name=%s success=%s message=%s",
@@ -172,9 +317,71 @@ class ActionService:
             action.name,
             result.success,
             result.message,
+            extra=log_fields(
+                "action_run",
+                action=action.name,
+                source=source,
+                status="ok" if result.success else "fail",
+                error=result.error,
+            ),
         )
         return result
 
+    def _shared_result(self, trigger: _Trigger, timeout: float) -> ExecutionResult:
+        try:
+            result = trigger.future.result(timeout=timeout)
+        except CancelledError:
+            return ExecutionResult(False, "相同动作的排队任务已取消。", error="task_cancelled")
+        except TimeoutError:
+            return ExecutionResult(False, "等待相同动作的执行结果超时。", error="timeout")
+        return ExecutionResult(
+            result.success, result.message, {**result.data, "coalesced": True}, result.error
+        )
+
+    def run_action_sync(
+        self,
+        name: str,
+        brightness_value: int | None = None,
+        source: str = "web",
+        require_api_allowed: bool = False,
+    ) -> ExecutionResult:
+        action, failure = self._resolve(name, require_api_allowed)
+        if action is None:
+            return failure
+        trigger, owner = self._join_trigger(action, brightness_value)
+        if not owner:
+            self.logger.info(
+                "action_coalesced source=%s name=%s",
+                source,
+                action.name,
+                extra=log_fields("action_coalesced", action=action.name, source=source),
+            )
+            timeout = self.config_manager.get_settings().request_timeout
+            return self._shared_result(trigger, timeout)
+        previous = self._previous_run(action, trigger)
+        if previous is not None:
+            wait([previous])
+        return self._run_trigger(action, trigger, source)
+
+    def _finish_task(
+        self, task: TaskRecord, result: ExecutionResult | None, status: str = "finished"
+    ) -> None:
+        if result is not None:
+            task.success = result.success
+            task.message = result.message
+            task.error = result.error
+        task.status = status
+        task.finished_at = now_iso()
+        entry = self._task_index.get(task.task_id)
+        if entry is not None:
+            entry[1].set()
+        self._publish_task(task)
+        for listener in list(self._task_listeners):
+            try:
+                listener(task)
+            except Exception:
+                self.logger.exception("task listener failed task_id=%s", task.task_id)
+
     def run_action_async(
         self,
         name: str,
@@ -182,33 +389,116 @@ class ActionService:
         source: str = "background",
         require_api_allowed: bool = False,
     ) -> TaskRecord:
-        task = TaskRecord(task_id=uuid.uuid4().hex[:12], source=source, action_name=name)
-        self.task_history.appendleft(task)
-        future = self.executor.submit(
-            self.run_action_sync,
-            name,
-            brightness_value,
-            source,
-            require_api_allowed,
+        action, failure = self._resolve(name, require_api_allowed)
+        task = TaskRecord(
+            task_id=uuid.uuid4().hex[:12],
+            source=source,
+            action_name=name,
+            lane=self.lane_for(action) if action is not None else "",
         )
+        if action is None:
+            self._remember(task)
+            self._finish_task(task, failure)
+            return task
+
+        trigger, owner = self._join_trigger(action, brightness_value)
+        if not owner:
+            self.logger.info(
+                "action_coalesced source=%s name=%s",
+                source,
+                action.name,
+                extra=log_fields("action_coalesced", action=action.name, source=source),
+            )
+            if trigger.task is not None:
+                trigger.task.coalesced += 1
+                self._publish_task(trigger.task)
+                return trigger.task
+            trigger.task = task
+            self._remember(task)
+
+            def _follow(done) -> None:
+                if done.cancelled():
+                    self._finish_task(task, None, status="cancelled")
+                    return
+                try:
+                    self._finish_task(task, done.result())
+                except Exception as exc:
+                    self._finish_task(
+                        task,
+                        ExecutionResult(False, "后台执行异常。", error=str(exc)),
+                        status="failed",
+                    )
+
+            trigger.future.add_done_callback(_follow)
+            return task
+
+        trigger.task = task
+        self._remember(task)
+        enqueued_at = time.monotonic()
+
+        def _on_start() -> None:
+            task.status = "running"
+            task.started_at = now_iso()
+            task.wait_ms = round((time.monotonic() - enqueued_at) * 1000, 1)
+            self._publish_task(task)
 
-        def _done_callback(done) -> None:
+        def _submit() -> None:
             try:
-                result = done.result()
-                task.status = "finished"
-                task.finished_at = now_iso()
-                task.success = result.success
-                task.message = result.message
-                task.error = result.error
-            except Exception as exc:  # pragma: no cover
-                task.status = "failed"
-                task.finished_at = now_iso()
-                task.success = False
-                task.message = "后台执行异常。"
-                task.error = str(exc)
-                self.logger.exception("async action failed task=%s", task.task_id)
-
-        future.add_done_callback(_done_callback)
+                future = self.scheduler.submit(
+                    task.lane,
+                    lambda: self._run_trigger(action, trigger, source),
+                    priority=SOURCE_PRIORITIES.get(source, DEFAULT_PRIORITY),
+                    on_start=_on_start,
+                )
+            except SchedulerFullError as exc:
+                self._release_trigger(action, trigger)
+                rejected = ExecutionResult(False, str(exc), error="queue_full")
+                self._finish_task(task, rejected, status="rejected")
+                trigger.future.set_result(rejected)
+                self.logger.warning(
+                    "action_rejected source=%s name=%s lane=%s",
+                    source,
+                    name,
+                    task.lane,
+                    extra=log_fields(
+                        "action_rejected", action=name, source=source, status="rejected"
+                    ),
+                )
+                return
+
+            def _done_callback(done) -> None:
+                if done.cancelled():
+                    self._release_trigger(action, trigger)
+                    trigger.future.cancel()
+                    self._finish_task(task, None, status="cancelled")
+                    return
+                try:
+                    self._finish_task(task, done.result())
+                except Exception as exc:  # pragma: no cover
+                    self._finish_task(
+                        task,
+                        ExecutionResult(False, "后台执行异常。", error=str(exc)),
+                        status="failed",
+                    )
+                    self.logger.exception("async action failed task=%s", task.task_id)
+
+            future.add_done_callback(_done_callback)
+
+        previous = self._previous_run(action, trigger)
+        if previous is None:
+            _submit()
+            return task
+
+        def _submit_after(_previous) -> None:
+            # 上一次在通道里执行完才提交排队的这一次，通道的工作线程不用阻塞等待
+            try:
+                _submit()
+            except RuntimeError:
+                self._release_trigger(action, trigger)
+                trigger.future.cancel()
+                self._finish_task(task, None, status="cancelled")
+
+        previous.add_done_callback(_submit_after)
         return task
 
     def _execute(
@@ -220,17 +510,58 @@ class ActionService:
         if action.type == "exe":
             return self._run_exe_action(action)
         if action.type == "adb":
-            if settings.adb_screen_on:
-                self.adb_service.ensure_screen_on(settings)
-            return self.adb_service.run_action_lines(action.cmd)
+            return self._run_on_devices(
+                action,
+                settings,
+                settings.adb_screen_on,
+                lambda serial: self.adb_service.run_action_lines(action.cmd, serial=serial),
+            )
         if action.type == "music":
-            if settings.music_screen_on:
-                self.adb_service.ensure_screen_on(settings)
-            return self._run_music_action(action)
+            final_uri = self._music_uri(action)
+            return self._run_on_devices(
+                action,
+                settings,
+                settings.music_screen_on,
+                lambda serial: self.adb_service.open_uri(final_uri, serial=serial),
+            )
         if action.type == "brightness":
             return self._run_brightness_action(action, brightness_value)
         return ExecutionResult(False, f"未知动作类型: {action.type}", error="unknown_action_type")
 
+    def _run_on_devices(
+        self,
+        action: ActionConfig,
+        settings: AppSettings,
+        screen_on: bool,
+        job: Callable[[str], ExecutionResult],
+    ) -> ExecutionResult:
+        def _run(serial: str) -> ExecutionResult:
+            if self.adb_service.is_offline(serial):
+                return ExecutionResult(
+                    False,
+                    "ADB 设备已离线，后台正在重连。",
+                    {"serial": serial},
+                    "adb_offline",
+                )
+            with self.adb_service.device_lock(serial):
+                if screen_on:
+                    self.adb_service.ensure_screen_on(settings, serial=serial)
+                return job(serial)
+
+        if not action.adb_targets:
+            return _run("")
+        serials = self.adb_service.resolve_targets(action.adb_targets, settings)
+        if not serials:
+            return ExecutionResult(
+                False,
+                f"没有可用的目标设备: {action.adb_targets_text}",
+                {"targets": action.adb_targets},
+                "adb_no_targets",
+            )
+        if len(serials) == 1:
+            return _run(serials[0])
+        return self.adb_service.fan_out(serials, _run)
+
     def _run_exe_action(self, action: ActionConfig) -> ExecutionResult:
         last_result = ExecutionResult(True, "命令已执行。")
         for line in parse_lines(action.cmd):
@@ -239,7 +570,7 @@ class ActionService:
                 return last_result
         return ExecutionResult(True, "EXE/脚本动作已启动。")
 
-    def _run_music_action(self, action: ActionConfig) -> ExecutionResult:
+    def _music_uri(self, action: ActionConfig) -> str:
         raw_cmd = action.cmd.strip()
         if raw_cmd.startswith(
             (
@@ -252,15 +583,13 @@ class ActionService:
                 "applemusic://",
             )
         ):
-            final_uri = raw_cmd
-        else:
-            try:
-                payload = json.loads(raw_cmd)
-            except json.JSONDecodeError:
-                payload = ast.literal_eval(raw_cmd)
-            encoded = urllib.parse.quote(json.dumps(payload, ensure_ascii=False))
-            final_uri = f"{action.uri_scheme or MUSIC_SCHEMES['酷狗音乐']}?{encoded}"
-        return self.adb_service.open_uri(final_uri)
+            return raw_cmd
+        try:
+            payload = json.loads(raw_cmd)
+        except json.JSONDecodeError:
+            payload = ast.literal_eval(raw_cmd)
+        encoded = urllib.parse.quote(json.dumps(payload, ensure_ascii=False))
+        return f"{action.uri_scheme or MUSIC_SCHEMES['酷狗音乐']}?{encoded}"
 
     def _run_brightness_action(
         self, action: ActionConfig, brightness_value: int | None
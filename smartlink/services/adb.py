@@ -6,16 +6,176 @@ import re
 import shlex
 import shutil
 import subprocess
+import threading
 import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Any
 
 from smartlink.models import AppSettings, ExecutionResult
+from smartlink.services.adb_protocol import ADBProtocolError, ADBServerClient, DeviceTracker
+from smartlink.services.adb_session import SESSION_ERRORS, ADBSessionPool
 from smartlink.services.network import parse_lines
 
+SCREEN_POLL_INTERVAL = 0.15
+SCREEN_WAKE_TIMEOUT = 2.0
+UNLOCK_SETTLE_SECONDS = 0.5
+
+HOST_COMMANDS = {"connect", "disconnect", "pair", "devices", "start-server", "kill-server"}
+ALL_DEVICES = {"all", "*"}
+SCREEN_ON_TOKENS = {"ON", "AWAKE", "SCREEN_STATE_ON", "TRUE"}
+
+
+@dataclass(frozen=True, slots=True)
+class ScreenProbe:
+    name: str
+    command: str
+    pattern: re.Pattern[str]
+
+    def parse(self, output: str) -> bool | None:
+        match = self.pattern.search(output)
+        if not match:
+            return None
+        token = next(group for group in match.groups() if group)
+        return token.upper() in SCREEN_ON_TOKENS
+
+
+# 由轻到重：先在设备端 grep 只回传一行，最后才拉取完整 dumpsys display 并流式匹配。
+SCREEN_PROBES = (
+    ScreenProbe(
+        "power",
+        "dumpsys power | grep -m 1 -E 'mWakefulness=|Display Power: state='",
+        re.compile(r"mWakefulness=(\w+)|Display Power: state=(\w+)"),
+    ),
+    ScreenProbe(
+        "window",
+        "dumpsys window policy | grep -m 1 -E 'screenState=|mScreenOnFully='",
+        re.compile(r"screenState=(\w+)|mScreenOnFully=(\w+)"),
+    ),
+    ScreenProbe("display", "dumpsys display", re.compile(r"mState=(ON|OFF)")),
+)
+
+
+@dataclass(slots=True)
+class DeviceState:
+    screen_on: bool | None = None
+    unlocked: bool | None = None
+    connected: bool | None = None
+    checked_at: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "screen_on": self.screen_on,
+            "unlocked": self.unlocked,
+            "connected": self.connected,
+            "age_seconds": round(time.monotonic() - self.checked_at, 1)
+            if self.checked_at
+            else None,
+        }
+
 
 class ADBService:
-    def __init__(self, logger) -> None:
+    def __init__(self, logger, use_shell_pool: bool = True) -> None:
         self.logger = logger
+        self.use_shell_pool = use_shell_pool
+        self.sessions = ADBSessionPool(logger, process_kwargs=self._windows_process_kwargs())
+        self.backend = "subprocess"
+        self.server = ADBServerClient()
+        self.state_ttl = 5.0
+        self.keeper = None
+        self.events = None
+        self.tracker: DeviceTracker | None = None
+        self._states: dict[str, DeviceState] = {}
+        # 每台设备上次成功的亮屏探测方式；设备状态失效后仍然保留
+        self._screen_probes: dict[str, str] = {}
+        self._states_lock = threading.Lock()
+        self._device_locks: dict[str, threading.Lock] = {}
+
+    def configure(self, settings: AppSettings) -> None:
+        self.backend = settings.adb_backend
+        self.server.port = settings.adb_server_port
+        self.state_ttl = settings.adb_state_ttl
+        if self.tracker is not None and self.tracker.client.port != settings.adb_server_port:
+            self.tracker.stop()
+            self.tracker = None
+            self.start_tracking()
+
+    def _update_state(self, serial: str = "", **changes: Any) -> DeviceState:
+        with self._states_lock:
+            state = self._states.setdefault(serial, DeviceState())
+            for key, value in changes.items():
+                setattr(state, key, value)
+            state.checked_at = time.monotonic()
+            return state
+
+    def _fresh_state(self, serial: str = "") -> DeviceState | None:
+        with self._states_lock:
+            state = self._states.get(serial)
+            if state is None or time.monotonic() - state.checked_at > self.state_ttl:
+                return None
+            return DeviceState(state.screen_on, state.unlocked, state.connected, state.checked_at)
+
+    def is_offline(self, serial: str = "") -> bool:
+        if self.keeper is None or not self.keeper.is_offline(serial):
+            return False
+        self.keeper.request_check()
+        return True
+
+    def device_lock(self, serial: str = "") -> threading.Lock:
+        """同一台设备的动作互斥执行，不论来自哪个调度通道还是同步调用。"""
+        with self._states_lock:
+            return self._device_locks.setdefault(serial, threading.Lock())
+
+    def invalidate_state(self, serial: str | None = None) -> None:
+        with self._states_lock:
+            if serial is None:
+                self._states.clear()
+            else:
+                self._states.pop(serial, None)
+
+    def device_states(self) -> dict[str, dict[str, Any]]:
+        with self._states_lock:
+            return {serial or "default": state.to_dict() for serial, state in self._states.items()}
+
+    def shutdown(self) -> None:
+        if self.tracker is not None:
+            self.tracker.stop()
+        self.sessions.close_all()
+
+    def start_tracking(self) -> None:
+        if self.tracker is not None or not self.is_available():
+            return
+        self.tracker = DeviceTracker(
+            ADBServerClient(self.server.host, self.server.port),
+            self.logger,
+            start_server=lambda: self._run(["adb", "start-server"], timeout=10),
+        )
+        self.tracker.add_listener(self._on_devices_changed)
+        self.tracker.start()
+
+    def _on_devices_changed(self, devices: tuple[tuple[str, str], ...]) -> None:
+        online = {serial for serial, state in devices if state == "device"}
+        self.logger.info("adb_devices changed devices=%s", sorted(online))
+        with self._states_lock:
+            known = list(self._states)
+        for serial in known:
+            if serial and serial not in online:
+                self.invalidate_state(serial)
+                self.sessions.discard(serial)
+        if self.keeper is not None:
+            self.keeper.request_check()
+        if self.events is not None:
+            self.events.publish("devices", self._device_snapshot(devices))
+
+    def _device_snapshot(self, entries) -> dict[str, Any]:
+        devices = [serial for serial, state in entries if state == "device"]
+        return {
+            "available": True,
+            "connected": bool(devices),
+            "devices": devices,
+            "raw": "\n".join(f"{serial}\t{state}" for serial, state in entries),
+        }
 
     def is_available(self) -> bool:
         return shutil.which("adb") is not None
@@ -122,6 +282,111 @@ class ADBService:
             None if success else "adb_command_failed",
         )
 
+    def _run_streaming(
+        self, args: list[str], stop_pattern: re.Pattern[str], timeout: int = 5
+    ) -> ExecutionResult:
+        command = " ".join(args)
+        try:
+            process = subprocess.Popen(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="ignore",
+                **self._windows_process_kwargs(),
+            )
+        except OSError as exc:
+            return ExecutionResult(
+                False, f"adb command failed: {exc}", {"command": command}, type(exc).__name__
+            )
+        timed_out = threading.Event()
+
+        def _expire() -> None:
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, _expire)
+        timer.start()
+        lines: list[str] = []
+        matched = False
+        try:
+            assert process.stdout is not None
+            for line in process.stdout:
+                lines.append(line)
+                if stop_pattern.search(line):
+                    matched = True
+                    process.kill()
+                    break
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+        if timed_out.is_set() and not matched:
+            self.logger.error("adb timeout command=%s timeout=%s", command, timeout)
+            return ExecutionResult(False, "adb shell timeout", {"command": command}, "timeout")
+        stdout = "".join(lines)
+        if matched:
+            returncode = 0
+        success = returncode == 0
+        return ExecutionResult(
+            success,
+            stdout.strip() or ("ok" if success else "adb command failed"),
+            {
+                "args": args,
+                "stdout": stdout,
+                "stderr": "",
+                "returncode": returncode,
+                "bytes": len(stdout.encode("utf-8")),
+                "early_exit": matched,
+            },
+            None if success else "adb_command_failed",
+        )
+
+    def _shell(
+        self,
+        command: str,
+        serial: str = "",
+        timeout: int = 5,
+        stop_pattern: re.Pattern[str] | None = None,
+    ) -> ExecutionResult:
+        if "keyevent" in command:
+            self.invalidate_state(serial)
+        if self.backend == "socket":
+            result = self.server.shell(
+                command, serial=serial, timeout=timeout, stop_pattern=stop_pattern
+            )
+            if result.error != "adb_protocol_failed":
+                return result
+            self.logger.warning(
+                "adb server protocol unavailable serial=%s message=%s", serial, result.message
+            )
+        if self.use_shell_pool:
+            result = self.sessions.run(command, serial=serial, timeout=timeout)
+            if result.error not in SESSION_ERRORS:
+                return result
+            self.logger.warning(
+                "adb shell session unavailable serial=%s message=%s", serial, result.message
+            )
+            self.sessions.discard(serial)
+        prefix = ["adb", "-s", serial] if serial else ["adb"]
+        if stop_pattern is not None:
+            return self._run_streaming([*prefix, "shell", command], stop_pattern, timeout=timeout)
+        return self._run([*prefix, "shell", command], timeout=timeout)
+
+    def _target_args(self, args: list[str], serial: str) -> list[str]:
+        if not serial or len(args) < 2 or args[1] == "-s" or args[1] in HOST_COMMANDS:
+            return args
+        return [args[0], "-s", serial, *args[1:]]
+
+    def _split_shell_line(self, args: list[str]) -> tuple[str, str] | None:
+        rest = args[1:]
+        serial = ""
+        if len(rest) >= 2 and rest[0] == "-s":
+            serial, rest = rest[1], rest[2:]
+        if len(rest) >= 2 and rest[0] == "shell" and not rest[1].startswith("-"):
+            return serial, " ".join(rest[1:])
+        return None
+
     def connect(self, ip: str) -> ExecutionResult:
         target = (ip or "").strip()
         if not target:
@@ -215,6 +480,8 @@ class ADBService:
     def disconnect(self) -> ExecutionResult:
         if not self.is_available():
             return ExecutionResult(False, "未找到 adb，请先安装并加入 PATH。", error="adb_missing")
+        self.sessions.close_all()
+        self.invalidate_state()
         result = self._run(["adb", "disconnect"], timeout=5)
         self.logger.info(
             "adb_disconnect success=%s message=%s",
@@ -224,8 +491,18 @@ class ADBService:
         return ExecutionResult(result.success, result.message, result.data, result.error)
 
     def list_devices(self) -> dict[str, Any]:
+        if self.tracker is not None and self.tracker.running:
+            snapshot = self._device_snapshot(self.tracker.devices)
+            if not self.tracker.connected:
+                snapshot["raw"] = self.tracker.last_error or "adb server 未连接"
+            return snapshot
         if not self.is_available():
             return {"available": False, "connected": False, "devices": [], "raw": "adb not found"}
+        if self.backend == "socket":
+            try:
+                return self._device_snapshot(self.server.devices())
+            except ADBProtocolError as exc:
+                self.logger.warning("adb server protocol unavailable message=%s", exc)
         result = self._run(["adb", "devices"], timeout=5)
         output = (result.data.get("stdout") or result.data.get("stderr") or "").strip()
         devices: list[str] = []
@@ -240,31 +517,111 @@ class ADBService:
             "raw": output,
         }
 
-    def is_screen_on(self) -> bool | None:
+    def probe_screen(
+        self, probe: ScreenProbe, serial: str = ""
+    ) -> tuple[bool | None, ExecutionResult]:
+        result = self._shell(probe.command, serial=serial, timeout=5, stop_pattern=probe.pattern)
+        stdout = result.data.get("stdout", "") or ""
+        result.data.setdefault("bytes", len(stdout.encode("utf-8")))
+        return probe.parse(stdout), result
+
+    def is_screen_on(self, serial: str = "") -> bool | None:
         if not self.is_available():
             return None
-        result = self._run(["adb", "shell", "dumpsys", "display"], timeout=5)
-        if not result.success:
-            return None
-        stdout = result.data.get("stdout", "")
-        match = re.search(r"mState=(ON|OFF)", stdout)
-        if not match:
-            return None
-        return match.group(1) == "ON"
+        with self._states_lock:
+            preferred = self._screen_probes.get(serial, SCREEN_PROBES[0].name)
+        probes = sorted(SCREEN_PROBES, key=lambda probe: probe.name != preferred)
+        for probe in probes:
+            screen_on, result = self.probe_screen(probe, serial)
+            if screen_on is not None:
+                with self._states_lock:
+                    self._screen_probes[serial] = probe.name
+                self._update_state(serial, screen_on=screen_on, connected=True)
+                return screen_on
+            if result.error not in (None, "adb_command_failed"):
+                return None
+        return None
+
+    def screen_state(self, serial: str = "") -> bool | None:
+        cached = self._fresh_state(serial)
+        if cached is not None and cached.screen_on is not None:
+            return cached.screen_on
+        return self.is_screen_on(serial)
+
+    def wait_for_screen_on(self, serial: str = "", timeout: float = SCREEN_WAKE_TIMEOUT) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.is_screen_on(serial) is True:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(SCREEN_POLL_INTERVAL)
 
-    def ensure_screen_on(self, settings: AppSettings) -> None:
+    def ensure_screen_on(self, settings: AppSettings, serial: str = "") -> None:
         if not self.is_available():
             return
-        screen_on = self.is_screen_on()
-        if screen_on is True:
+        if self.screen_state(serial) is True:
             return
-        self._run(["adb", "shell", "input", "keyevent", "KEYCODE_POWER"], timeout=5)
-        time.sleep(1)
+        self._shell("input keyevent KEYCODE_POWER", serial=serial, timeout=5)
+        if not self.wait_for_screen_on(serial):
+            self.logger.warning("adb screen wake not confirmed serial=%s", serial)
+        self._update_state(serial, unlocked=False)
         if settings.unlock_after_screen_on and settings.device_password:
-            self._run(["adb", "shell", "input", "text", settings.device_password], timeout=5)
-            time.sleep(1)
+            self._shell(
+                f"input text {shlex.quote(settings.device_password)}", serial=serial, timeout=5
+            )
+            time.sleep(UNLOCK_SETTLE_SECONDS)
+            self._update_state(serial, unlocked=True)
+
+    def resolve_targets(self, targets: list[str], settings: AppSettings) -> list[str]:
+        serials: list[str] = []
+        for target in targets:
+            if target.lower() in ALL_DEVICES:
+                members = self.list_devices()["devices"]
+            else:
+                members = settings.adb_groups.get(target, [target])
+            serials.extend(member for member in members if member not in serials)
+        return serials
+
+    def fan_out(self, serials: list[str], job: Callable[[str], ExecutionResult]) -> ExecutionResult:
+        started = time.perf_counter()
+
+        def _timed(serial: str) -> tuple[str, ExecutionResult, float]:
+            job_started = time.perf_counter()
+            try:
+                result = job(serial)
+            except Exception as exc:  # pragma: no cover - defensive path
+                self.logger.exception("adb fan-out job failed serial=%s", serial)
+                result = ExecutionResult(False, f"执行异常: {exc}", error=type(exc).__name__)
+            return serial, result, round((time.perf_counter() - job_started) * 1000, 1)
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, len(serials)), thread_name_prefix="smartlink-adb-fanout"
+        ) as executor:
+            outcomes = list(executor.map(_timed, serials))
+
+        devices = {
+            serial: {
+                "success": result.success,
+                "message": result.message,
+                "error": result.error,
+                "elapsed_ms": elapsed_ms,
+            }
+            for serial, result, elapsed_ms in outcomes
+        }
+        succeeded = sum(1 for item in devices.values() if item["success"])
+        success = succeeded == len(devices)
+        return ExecutionResult(
+            success,
+            f"{succeeded}/{len(devices)} 台设备执行成功。",
+            {
+                "devices": devices,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            },
+            None if success else "adb_partial_failure",
+        )
 
-    def run_action_lines(self, command_text: str) -> ExecutionResult:
+    def run_action_lines(self, command_text: str, serial: str = "") -> ExecutionResult:
         if not self.is_available():
             return ExecutionResult(False, "未找到 adb，请先安装并加入 PATH。", error="adb_missing")
         lines = parse_lines(command_text)
@@ -275,18 +632,23 @@ class ADBService:
                     f"ADB 动作只允许 adb 开头的命令: {line}",
                     error="invalid_adb",
                 )
-            args = shlex.split(line, posix=False)
-            result = self._run(args, timeout=5)
+            args = self._target_args(shlex.split(line, posix=False), serial)
+            shell_line = self._split_shell_line(args)
+            if shell_line is not None:
+                result = self._shell(shell_line[1], serial=shell_line[0], timeout=5)
+            else:
+                result = self._run(args, timeout=5)
             if not result.success:
                 self.logger.warning("ADB action failed line=%s message=%s", line, result.message)
                 return ExecutionResult(False, result.message, {"command": line, **result.data}, result.error)
         return ExecutionResult(True, "ADB 命令已执行。")
 
-    def open_uri(self, uri: str) -> ExecutionResult:
+    def open_uri(self, uri: str, serial: str = "") -> ExecutionResult:
         if not self.is_available():
             return ExecutionResult(False, "未找到 adb，请先安装并加入 PATH。", error="adb_missing")
-        result = self._run(
-            ["adb", "shell", "am", "start", "-a", "android.intent.action.VIEW", "-d", uri],
+        result = self._shell(
+            f"am start -a android.intent.action.VIEW -d {shlex.quote(uri)}",
+            serial=serial,
             timeout=5,
         )
         return ExecutionResult(
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from smartlink.models import AppSettings, now_iso, split_csv
+
+DEFAULT_ADB_PORT = "5555"
+# adb connect 失败时的输出，例如 "failed to connect to ..."、"cannot connect to ..."、
+# "unable to connect to ..."、"failed to authenticate to ..."
+CONNECT_FAILURE_MARKERS = ("cannot", "failed", "unable")
+
+
+def target_serial(target: str) -> str:
+    """adb connect 192.168.1.8 之后设备序列号是 192.168.1.8:5555。"""
+    text = target.strip()
+    return text if ":" in text else f"{text}:{DEFAULT_ADB_PORT}"
+
+
+@dataclass(slots=True)
+class TargetHealth:
+    serial: str
+    state: str = "unknown"
+    failures: int = 0
+    next_attempt_at: float = 0.0
+    down_since: float = 0.0
+    last_error: str = ""
+    last_reconnect_ms: float | None = None
+    changed_at: str = ""
+
+    def to_dict(self, now: float) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": round(max(0.0, self.next_attempt_at - now), 1)
+            if self.state == "backoff"
+            else None,
+            "last_error": self.last_error,
+            "last_reconnect_ms": self.last_reconnect_ms,
+            "changed_at": self.changed_at,
+        }
+
+
+class ADBConnectionKeeper:
+    """后台监视 adb 设备列表，掉线后按指数退避 + 抖动自动重连。"""
+
+    def __init__(
+        self,
+        config_manager,
+        adb_service,
+        logger,
+        base_delay: float = 1.0,
+        jitter: float = 0.5,
+    ) -> None:
+        self.config_manager = config_manager
+        self.adb_service = adb_service
+        self.logger = logger
+        self.base_delay = base_delay
+        self.jitter = jitter
+        self.thread: threading.Thread | None = None
+        self.transitions: deque[dict[str, Any]] = deque(maxlen=50)
+        self._targets: dict[str, TargetHealth] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._random = random.Random()  # noqa: S311 - 仅用于重连抖动
+        self._clock = time.monotonic
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="smartlink-adb-keeper")
+        self.thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def request_check(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            settings = self.config_manager.get_settings()
+            try:
+                self.check_once(settings)
+            except Exception as exc:  # pragma: no cover - defensive path
+                self.logger.error("adb keeper check failed error=%s", exc, exc_info=True)
+            self._wake.wait(settings.adb_keepalive_interval)
+            self._wake.clear()
+
+    def targets_from(self, settings: AppSettings) -> list[str]:
+        if not settings.enable_adb_connect:
+            return []
+        return [
+            target
+            for target in split_csv(settings.adb_ip)
+            if self.adb_service.validate_connect_target(target)
+        ]
+
+    def _transition(self, health: TargetHealth, state: str, **details: Any) -> None:
+        if health.state == state:
+            return
+        self.logger.info(
+            "adb_keeper serial=%s state=%s->%s details=%s",
+            health.serial,
+            health.state,
+            state,
+            details,
+        )
+        self.transitions.appendleft(
+            {"serial": health.serial, "from": health.state, "to": state, "at": now_iso(), **details}
+        )
+        health.state = state
+        health.changed_at = now_iso()
+
+    def _backoff(self, failures: int, max_delay: float) -> float:
+        delay = min(max_delay, self.base_delay * (2 ** max(0, failures - 1)))
+        return delay * (1 - self.jitter * self._random.random())
+
+    def check_once(self, settings: AppSettings) -> None:
+        now = self._clock()
+        targets = self.targets_from(settings)
+        with self._lock:
+            wanted = {target_serial(target): target for target in targets}
+            for serial in list(self._targets):
+                if serial not in wanted:
+                    del self._targets[serial]
+            for serial in wanted:
+                self._targets.setdefault(serial, TargetHealth(serial))
+        if not targets or not self.adb_service.is_available():
+            return
+
+        connected = set(self.adb_service.list_devices()["devices"])
+        for serial, target in wanted.items():
+            health = self._targets[serial]
+            if serial in connected or target in connected:
+                if health.state != "connected":
+                    if health.down_since:
+                        health.last_reconnect_ms = round((now - health.down_since) * 1000, 1)
+                    self._transition(health, "connected", reconnect_ms=health.last_reconnect_ms)
+                health.failures = 0
+                health.down_since = 0.0
+                continue
+            if health.state in ("connected", "unknown"):
+                health.down_since = now
+                self._transition(health, "disconnected")
+            if now < health.next_attempt_at:
+                continue
+            self._reconnect(health, target, settings)
+
+    def _reconnect(self, health: TargetHealth, target: str, settings: AppSettings) -> None:
+        self._transition(health, "reconnecting", attempt=health.failures + 1)
+        result = self.adb_service.connect(target)
+        now = self._clock()
+        # adb connect 连接失败时也可能返回 0，需要再看输出内容
+        message = result.message.lower()
+        if result.success and not any(marker in message for marker in CONNECT_FAILURE_MARKERS):
+            health.last_reconnect_ms = round((now - health.down_since) * 1000, 1)
+            health.failures = 0
+            health.down_since = 0.0
+            health.last_error = ""
+            self._transition(health, "connected", reconnect_ms=health.last_reconnect_ms)
+            return
+        health.failures += 1
+        health.last_error = result.message
+        delay = self._backoff(health.failures, settings.adb_reconnect_max_backoff)
+        health.next_attempt_at = now + delay
+        self._transition(health, "backoff", retry_in=round(delay, 1))
+
+    def is_offline(self, serial: str = "") -> bool:
+        with self._lock:
+            if serial:
+                health = self._targets.get(serial)
+            elif len(self._targets) == 1:
+                health = next(iter(self._targets.values()))
+            else:
+                health = None
+            return health is not None and health.state in ("disconnected", "backoff")
+
+    def status(self) -> dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            targets = {serial: health.to_dict(now) for serial, health in self._targets.items()}
+        return {
+            "running": self.thread is not None and self.thread.is_alive(),
+            "targets": targets,
+            "transitions": list(self.transitions)[:10],
+        }
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import re
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+from smartlink.models import ExecutionResult
+
+DEFAULT_ADB_SERVER_HOST = "127.0.0.1"
+DEFAULT_ADB_SERVER_PORT = 5037
+
+
+class ADBProtocolError(Exception):
+    pass
+
+
+def parse_device_list(text: str) -> list[tuple[str, str]]:
+    entries: list[tuple[str, str]] = []
+    for line in text.splitlines():
+        serial, _, state = line.partition("\t")
+        if serial:
+            entries.append((serial, state.strip()))
+    return entries
+
+
+class ADBServerClient:
+    """直接通过 adb server 的 TCP 协议（默认 127.0.0.1:5037）收发请求，不再启动 adb 进程。"""
+
+    def __init__(
+        self,
+        host: str = DEFAULT_ADB_SERVER_HOST,
+        port: int = DEFAULT_ADB_SERVER_PORT,
+        timeout: float = 5,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def _open(self, timeout: float | None = None) -> socket.socket:
+        try:
+            return socket.create_connection((self.host, self.port), timeout=timeout or self.timeout)
+        except OSError as exc:
+            raise ADBProtocolError(f"无法连接 adb server: {exc}") from exc
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        chunks: list[bytes] = []
+        remaining = size
+        while remaining:
+            chunk = sock.recv(remaining)
+            if not chunk:
+                raise ADBProtocolError("adb server 提前关闭了连接")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    def _send(self, sock: socket.socket, service: str) -> None:
+        data = service.encode("utf-8")
+        sock.sendall(f"{len(data):04x}".encode("ascii") + data)
+        status = self._recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise ADBProtocolError(self.read_length_prefixed(sock))
+        raise ADBProtocolError(f"adb server 返回了未知状态: {status!r}")
+
+    def read_length_prefixed(self, sock: socket.socket) -> str:
+        length = int(self._recv_exact(sock, 4), 16)
+        return self._recv_exact(sock, length).decode("utf-8", errors="ignore")
+
+    def _select_device(self, sock: socket.socket, serial: str) -> None:
+        self._send(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+
+    def host_query(self, service: str) -> str:
+        with self._open() as sock:
+            self._send(sock, service)
+            return self.read_length_prefixed(sock)
+
+    def devices(self) -> list[tuple[str, str]]:
+        return parse_device_list(self.host_query("host:devices"))
+
+    def open_tracker(self) -> socket.socket:
+        sock = self._open()
+        try:
+            self._send(sock, "host:track-devices")
+        except ADBProtocolError:
+            sock.close()
+            raise
+        sock.settimeout(None)
+        return sock
+
+    def shell(
+        self,
+        command: str,
+        serial: str = "",
+        timeout: float | None = None,
+        stop_pattern: re.Pattern[str] | None = None,
+    ) -> ExecutionResult:
+        marker = f"__SMARTLINK_{uuid.uuid4().hex}__"
+        framed = f"{command} 2>&1; printf '\\n{marker}:%s\\n' $?"
+        deadline = time.monotonic() + (timeout or self.timeout)
+        try:
+            with self._open(timeout) as sock:
+                self._select_device(sock, serial)
+                self._send(sock, f"shell:{framed}")
+                raw = bytearray()
+                scanned = 0
+                while True:
+                    sock.settimeout(max(0.01, deadline - time.monotonic()))
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    raw.extend(chunk)
+                    end = raw.rfind(b"\n")
+                    if stop_pattern is None or end < scanned:
+                        continue
+                    # 和 _run_streaming 一样只匹配完整的行，避免把半行里的值当成结果
+                    lines = raw[scanned:end].decode("utf-8", errors="ignore").splitlines()
+                    scanned = end + 1
+                    if any(stop_pattern.search(line) for line in lines):
+                        return self._early_result(command, bytes(raw))
+        except TimeoutError:
+            return ExecutionResult(False, "adb shell timeout", {"command": command}, "timeout")
+        except (ADBProtocolError, OSError) as exc:
+            return ExecutionResult(
+                False, f"adb server 请求失败: {exc}", {"command": command}, "adb_protocol_failed"
+            )
+        result = self._parse_shell_output(command, raw.decode("utf-8", errors="ignore"), marker)
+        result.data["bytes"] = len(raw)
+        return result
+
+    @staticmethod
+    def _early_result(command: str, raw: bytes) -> ExecutionResult:
+        stdout = raw.decode("utf-8", errors="ignore").replace("\r\n", "\n")
+        return ExecutionResult(
+            True,
+            stdout.strip() or "ok",
+            {
+                "command": command,
+                "stdout": stdout,
+                "stderr": "",
+                "returncode": 0,
+                "bytes": len(raw),
+                "early_exit": True,
+            },
+        )
+
+    @staticmethod
+    def _parse_shell_output(command: str, text: str, marker: str) -> ExecutionResult:
+        text = text.replace("\r\n", "\n")
+        body, found, tail = text.rpartition(f"\n{marker}:")
+        if not found:
+            body, tail = text, ""
+        code_text = tail.strip()
+        returncode = int(code_text) if code_text.lstrip("-").isdigit() else 1
+        success = returncode == 0
+        return ExecutionResult(
+            success,
+            body.strip() or ("ok" if success else "adb command failed"),
+            {"command": command, "stdout": body, "stderr": "", "returncode": returncode},
+            None if success else "adb_command_failed",
+        )
+
+
+class DeviceTracker:
+    """长连接订阅 host:track-devices，设备列表变化时更新内存快照并回调监听者。"""
+
+    def __init__(
+        self,
+        client: ADBServerClient,
+        logger,
+        start_server: Callable[[], object] | None = None,
+        retry_delay: float = 2.0,
+    ) -> None:
+        self.client = client
+        self.logger = logger
+        self.start_server = start_server
+        self.retry_delay = retry_delay
+        self.devices: tuple[tuple[str, str], ...] = ()
+        self.connected = False
+        self.last_error = ""
+        self._listeners: list[Callable[[tuple[tuple[str, str], ...]], None]] = []
+        self._stop = threading.Event()
+        self._socket: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_listener(self, callback: Callable[[tuple[tuple[str, str], ...]], None]) -> None:
+        self._listeners.append(callback)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="smartlink-adb-track")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _publish(self, devices: tuple[tuple[str, str], ...]) -> None:
+        if devices == self.devices:
+            return
+        self.devices = devices
+        for callback in list(self._listeners):
+            try:
+                callback(devices)
+            except Exception:  # pragma: no cover - defensive path
+                self.logger.exception("adb device listener failed")
+
+    def _loop(self) -> None:
+        server_started = False
+        while not self._stop.is_set():
+            try:
+                self._socket = self.client.open_tracker()
+                self.connected = True
+                server_started = False
+                self.last_error = ""
+                while not self._stop.is_set():
+                    payload = self.client.read_length_prefixed(self._socket)
+                    self._publish(tuple(parse_device_list(payload)))
+            except (ADBProtocolError, OSError) as exc:
+                if self._stop.is_set():
+                    break
+                self.connected = False
+                self.last_error = str(exc)
+                self._publish(())
+                if self.start_server is not None and not server_started:
+                    server_started = True
+                    self.start_server()
+                    continue
+                self.logger.warning("adb track-devices error=%s", exc)
+                self._stop.wait(self.retry_delay)
+            finally:
+                if self._socket is not None:
+                    self._socket.close()
+                    self._socket = None
+        self.connected = False
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import queue
+import shlex
+import subprocess
+import threading
+import time
+import uuid
+from typing import Any
+
+from smartlink.models import ExecutionResult
+
+# 会话超时后进程已被杀掉，和原来的一次性 adb 调用一样再给命令一次完整的机会
+SESSION_ERRORS = ("session_failed", "session_closed", "timeout")
+
+
+class ADBShellSession:
+    """常驻的 adb shell 进程，每条命令后追加唯一标记行来取回输出和退出码。"""
+
+    def __init__(self, args: list[str], logger, process_kwargs: dict[str, Any] | None = None):
+        self.args = args
+        self.logger = logger
+        self.process_kwargs = process_kwargs or {}
+        self._process: subprocess.Popen | None = None
+        self._lines: queue.Queue[str | None] = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self) -> None:
+        self._lines = queue.Queue()
+        self._process = subprocess.Popen(
+            self.args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="ignore",
+            bufsize=1,
+            **self.process_kwargs,
+        )
+        threading.Thread(
+            target=self._pump,
+            args=(self._process, self._lines),
+            daemon=True,
+            name="smartlink-adb-shell",
+        ).start()
+
+    @staticmethod
+    def _pump(process: subprocess.Popen, lines: queue.Queue[str | None]) -> None:
+        assert process.stdout is not None
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def execute(self, command: str, timeout: float = 5) -> ExecutionResult:
+        with self._lock:
+            try:
+                if not self.alive:
+                    self._start()
+                assert self._process is not None and self._process.stdin is not None
+                marker = f"__SMARTLINK_{uuid.uuid4().hex}__"
+                # 命令放进独立的 sh -c 执行：读 stdin、exit 或引号不配对都不会影响会话和标记行
+                self._process.stdin.write(
+                    f"sh -c {shlex.quote(command)} </dev/null 2>&1; printf '\\n{marker}:%s\\n' $?\n"
+                )
+                self._process.stdin.flush()
+            except (OSError, ValueError) as exc:
+                self._kill()
+                return ExecutionResult(
+                    False, f"adb shell 会话不可用: {exc}", {"command": command}, "session_failed"
+                )
+            return self._collect(command, marker, timeout)
+
+    def _collect(self, command: str, marker: str, timeout: float) -> ExecutionResult:
+        deadline = time.monotonic() + timeout
+        output: list[str] = []
+        while True:
+            try:
+                line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self.logger.error("adb shell timeout command=%s timeout=%s", command, timeout)
+                self._kill()
+                return ExecutionResult(False, "adb shell timeout", {"command": command}, "timeout")
+            if line is None:
+                self._kill()
+                return ExecutionResult(
+                    False,
+                    "adb shell 会话已断开。",
+                    {"command": command, "stdout": "".join(output)},
+                    "session_closed",
+                )
+            text = line.rstrip("\r\n")
+            if text.startswith(f"{marker}:"):
+                break
+            output.append(line)
+        stdout = "".join(output)
+        if stdout.endswith("\n"):
+            stdout = stdout[:-1]
+        code_text = text.partition(":")[2]
+        returncode = int(code_text) if code_text.lstrip("-").isdigit() else 1
+        success = returncode == 0
+        return ExecutionResult(
+            success,
+            stdout.strip() or ("ok" if success else "adb command failed"),
+            {"command": command, "stdout": stdout, "stderr": "", "returncode": returncode},
+            None if success else "adb_command_failed",
+        )
+
+    def _kill(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.kill()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):  # pragma: no cover - defensive path
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._kill()
+
+
+class ADBSessionPool:
+    """按设备序列号复用 adb shell 会话，空序列号表示 adb 的默认设备。"""
+
+    def __init__(self, logger, adb_path: str = "adb", process_kwargs: dict[str, Any] | None = None):
+        self.logger = logger
+        self.adb_path = adb_path
+        self.process_kwargs = process_kwargs or {}
+        self._sessions: dict[str, ADBShellSession] = {}
+        self._lock = threading.Lock()
+
+    def session_args(self, serial: str = "") -> list[str]:
+        if serial:
+            return [self.adb_path, "-s", serial, "shell"]
+        return [self.adb_path, "shell"]
+
+    def session(self, serial: str = "") -> ADBShellSession:
+        with self._lock:
+            current = self._sessions.get(serial)
+            if current is None:
+                current = ADBShellSession(
+                    self.session_args(serial), self.logger, self.process_kwargs
+                )
+                self._sessions[serial] = current
+            return current
+
+    def run(self, command: str, serial: str = "", timeout: float = 5) -> ExecutionResult:
+        return self.session(serial).execute(command, timeout=timeout)
+
+    def discard(self, serial: str = "") -> None:
+        with self._lock:
+            current = self._sessions.pop(serial, None)
+        if current is not None:
+            current.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for current in sessions:
+            current.close()
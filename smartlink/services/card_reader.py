@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from smartlink.models import AppSettings, split_csv
+
+try:
+    import serial
+except ImportError:  # pragma: no cover
+    serial = None
+
+READ_TIMEOUT = 0.1
+RETRY_DELAY = 3.0
+MAX_FRAME_BUFFER = 256
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+@dataclass(frozen=True, slots=True)
+class ReaderConfig:
+    port: str
+    baudrate: int = 9600
+    terminator: bytes = b"\n"
+    frame_length: int = 0
+
+
+def reader_configs(settings: AppSettings) -> dict[str, ReaderConfig]:
+    """serial_port 可以用逗号分隔多个串口，每个串口一个读卡线程。"""
+    if not settings.enable_card_reader:
+        return {}
+    terminator = settings.card_terminator.encode() or b"\n"
+    return {
+        port: ReaderConfig(port, settings.serial_baudrate, terminator, settings.card_frame_length)
+        for port in split_csv(settings.serial_port)
+    }
+
+
+def _open_serial(port: str, baudrate: int, timeout: float):
+    return serial.Serial(port, baudrate, timeout=timeout)
+
+
+def _card_text(frame: bytes) -> str:
+    text = frame.decode("ascii", errors="replace").strip()
+    if text.isprintable() and "\ufffd" not in text:
+        return text
+    # 定长帧可能是原始二进制卡号，统一转成十六进制
+    return frame.hex().upper()
+
+
+class CardFramer:
+    """把串口读到的字节流切成卡号：frame_length > 0 时按定长切，否则按结束符切。"""
+
+    def __init__(self, terminator: bytes = b"\n", frame_length: int = 0) -> None:
+        self.terminator = terminator or b"\n"
+        self.frame_length = frame_length
+        self._buffer = b""
+
+    def feed(self, data: bytes) -> list[str]:
+        self._buffer += data
+        if self.frame_length > 0:
+            size = self.frame_length
+            count = len(self._buffer) // size
+            frames = [self._buffer[index * size : (index + 1) * size] for index in range(count)]
+            self._buffer = self._buffer[count * size :]
+        else:
+            *frames, self._buffer = self._buffer.split(self.terminator)
+        if len(self._buffer) > MAX_FRAME_BUFFER:
+            # 长时间收不到结束符多半是波特率或分帧配置不对，丢掉避免无限增长
+            self._buffer = b""
+        return [card_id for frame in frames if (card_id := _card_text(frame))]
+
+
+class LatencyHistogram:
+    """刷卡到分发完成的耗时分布，桶上限单位为毫秒。"""
+
+    def __init__(self, buckets_ms: tuple[int, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        value = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, value)] += 1
+            self.count += 1
+            self.total_ms += value
+            self.max_ms = max(self.max_ms, value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+            return {
+                "count": self.count,
+                "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+                "max_ms": round(self.max_ms, 2),
+                "buckets": dict(zip(labels, self.counts, strict=True)),
+            }
+
+
+class CardReader:
+    """单个串口的读卡线程：有数据就立即读出并分帧，超时只用于检查停止信号。"""
+
+    def __init__(
+        self,
+        config: ReaderConfig,
+        on_card: Callable[[CardReader, str, float], None],
+        on_state: Callable[..., None],
+        logger,
+        opener: Callable[[str, int, float], Any] = _open_serial,
+    ) -> None:
+        self.config = config
+        self.on_card = on_card
+        self.on_state = on_state
+        self.logger = logger
+        self.opener = opener
+        self.alive = False
+        self.last_error = ""
+        self.last_card_id = ""
+        self.frames = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name=f"smartlink-card-{config.port}"
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "port": self.config.port,
+            "baudrate": self.config.baudrate,
+            "alive": self.alive,
+            "last_error": self.last_error,
+            "last_card_id": self.last_card_id,
+            "frames": self.frames,
+        }
+
+    def _set(self, bump: tuple[str, ...] = (), **values: Any) -> None:
+        for key, value in values.items():
+            setattr(self, key, value)
+        self.on_state(bump=bump)
+
+    def _run(self) -> None:
+        config = self.config
+        failed = False
+        while not self._stop.is_set():
+            try:
+                with self.opener(config.port, config.baudrate, READ_TIMEOUT) as port:
+                    self._set(bump=("reconnects",) if failed else (), alive=True, last_error="")
+                    framer = CardFramer(config.terminator, config.frame_length)
+                    while not self._stop.is_set():
+                        data = port.read(port.in_waiting or 1)
+                        if not data:
+                            continue
+                        received = time.perf_counter()
+                        for card_id in framer.feed(data):
+                            self.frames += 1
+                            self.last_card_id = card_id
+                            self.on_card(self, card_id, received)
+            except Exception as exc:
+                failed = True
+                self._set(bump=("errors",), alive=False, last_error=str(exc))
+                self.logger.warning("card reader error port=%s: %s", config.port, exc)
+                self._stop.wait(RETRY_DELAY)
+        self._set(alive=False)
+
+
+class CardReaderEngine:
+    """按配置管理一组读卡线程，配置变化时只重启串口参数有变化的读卡器。"""
+
+    def __init__(
+        self,
+        config_manager,
+        dispatch: Callable[[str], Any],
+        logger,
+        on_status: Callable[..., None] | None = None,
+        opener: Callable[[str, int, float], Any] | None = None,
+    ) -> None:
+        self.config_manager = config_manager
+        self.dispatch = dispatch
+        self.logger = logger
+        self.on_status = on_status
+        self.opener = opener or _open_serial
+        self.latency = LatencyHistogram()
+        self.readers: dict[str, CardReader] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return serial is not None or self.opener is not _open_serial
+
+    def start(self) -> None:
+        self.config_manager.add_listener(self._on_config_changed)
+        self.reload(self.config_manager.get_settings())
+
+    def stop(self) -> None:
+        self.config_manager.remove_listener(self._on_config_changed)
+        with self._lock:
+            readers, self.readers = list(self.readers.values()), {}
+        for reader in readers:
+            reader.stop()
+
+    def _on_config_changed(self, _registry) -> None:
+        self.reload(self.config_manager.get_settings())
+
+    def reload(self, settings: AppSettings) -> None:
+        desired = reader_configs(settings)
+        with self._lock:
+            stale = [
+                reader
+                for port, reader in self.readers.items()
+                if desired.get(port) != reader.config
+            ]
+            for reader in stale:
+                del self.readers[reader.config.port]
+            fresh = [
+                CardReader(config, self._on_card, self._report, self.logger, self.opener)
+                for port, config in desired.items()
+                if port not in self.readers
+            ]
+            for reader in fresh:
+                self.readers[reader.config.port] = reader
+        for reader in stale:
+            reader.stop()
+        for reader in fresh:
+            reader.start()
+        self._report(enabled=settings.enable_card_reader)
+
+    def _on_card(self, reader: CardReader, card_id: str, received: float) -> None:
+        bump: tuple[str, ...] = ("received",)
+        try:
+            if self.dispatch(card_id):
+                bump = ("received", "dispatched")
+        except Exception:
+            bump = ("received", "errors")
+            self.logger.exception("card dispatch failed port=%s", reader.config.port)
+        elapsed = time.perf_counter() - received
+        self.latency.observe(elapsed)
+        self._report(bump=bump, last_card_id=card_id, last_latency_ms=round(elapsed * 1000, 3))
+
+    def _report(self, **values: Any) -> None:
+        if self.on_status is None:
+            return
+        with self._lock:
+            readers = list(self.readers.values())
+        errors = [reader.last_error for reader in readers if reader.last_error]
+        self.on_status(
+            alive=any(reader.alive for reader in readers),
+            last_error=errors[0] if errors else "",
+            **values,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            readers = list(self.readers.values())
+        return {
+            "readers": [reader.status() for reader in readers],
+            "latency": self.latency.snapshot(),
+        }
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from smartlink.logging_utils import LOG_DATE_FORMAT, LOG_FORMAT
+
+
+def subscriber_limit(server_threads: int) -> int:
+    """每个 SSE 连接会一直占着一个工作线程，最多给它们四分之一，其余留给普通请求。"""
+    return max(1, server_threads // 4)
+
+
+class SubscriberLimitError(RuntimeError):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"实时推送连接数已达上限 ({limit})")
+        self.limit = limit
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    id: int
+    kind: str
+    data: dict[str, Any]
+
+    def to_sse(self) -> str:
+        payload = json.dumps(self.data, ensure_ascii=False)
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """单个订阅者的有界缓冲区，写满后丢弃最旧的事件并计数，慢客户端不会拖垮发布方。"""
+
+    def __init__(self, bus: EventBus, kinds: set[str] | None, buffer_size: int) -> None:
+        self.bus = bus
+        self.kinds = kinds
+        self.dropped = 0
+        self.closed = False
+        self._missed = 0
+        self._buffer: deque[Event] = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+
+    def wants(self, kind: str) -> bool:
+        return self.kinds is None or kind in self.kinds
+
+    def push(self, event: Event) -> None:
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+                self._missed += 1
+            self._buffer.append(event)
+            self._cond.notify()
+
+    def get(self, timeout: float) -> tuple[list[Event], int]:
+        """返回 (新事件, 自上次读取以来因缓冲区溢出丢弃的数量)。"""
+        with self._cond:
+            if not self._buffer and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._buffer)
+            self._buffer.clear()
+            missed, self._missed = self._missed, 0
+            return events, missed
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """进程内发布 / 订阅，供 /api/events 推送任务、日志、集成状态和设备变化。"""
+
+    def __init__(self, buffer_size: int = 200, max_subscribers: int = 0) -> None:
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.published = 0
+        self.rejected = 0
+        self.closed = False
+        self._ids = itertools.count(1)
+        self._subscribers: list[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, kinds: set[str] | None = None) -> Subscription:
+        """max_subscribers > 0 时超出上限抛 SubscriberLimitError；总线关闭后返回已关闭的订阅。"""
+        subscription = Subscription(self, kinds or None, self.buffer_size)
+        with self._lock:
+            if self.closed:
+                subscription.closed = True
+                return subscription
+            if 0 < self.max_subscribers <= len(self._subscribers):
+                self.rejected += 1
+                raise SubscriberLimitError(self.max_subscribers)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, kind: str, data: dict[str, Any]) -> Event:
+        with self._lock:
+            event = Event(next(self._ids), kind, data)
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.wants(kind):
+                subscription.push(event)
+        return event
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "max_subscribers": self.max_subscribers,
+            "rejected": self.rejected,
+            "published": self.published,
+            "dropped": sum(subscription.dropped for subscription in subscribers),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self.closed = True
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.close()
+
+
+class EventLogHandler(logging.Handler):
+    def __init__(self, bus: EventBus) -> None:
+        super().__init__()
+        self.bus = bus
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.bus.publish("log", {"level": record.levelname, "line": self.format(record)})
+        except Exception:  # pragma: no cover - 与标准 Handler 一致，不让日志异常外泄
+            self.handleError(record)
+
+
+def bind_logger(logger: logging.Logger, bus: EventBus) -> None:
+    """把日志行转发到事件总线；重复创建应用时替换掉旧的转发器。"""
+    for handler in list(logger.handlers):
+        if isinstance(handler, EventLogHandler):
+            logger.removeHandler(handler)
+    handler = EventLogHandler(bus)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+    logger.addHandler(handler)
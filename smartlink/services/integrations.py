@@ -1,133 +1,247 @@
 from __future__ import annotations
 
+import dataclasses
 import threading
 import time
+from dataclasses import dataclass
+from typing import Any
 
 try:
     import paho.mqtt.client as mqtt
 except ImportError:  # pragma: no cover
     mqtt = None
 
-try:
-    import serial
-except ImportError:  # pragma: no cover
-    serial = None
+from smartlink.services.card_reader import CardReaderEngine
+from smartlink.services.mqtt_publisher import ResultPublisher
+
+
+@dataclass(frozen=True, slots=True)
+class IntegrationStatus:
+    """某一时刻的集成状态快照，只读；更新时生成新对象并整体替换引用。"""
+
+    enabled: bool = False
+    last_error: str = ""
+    received: int = 0
+    dispatched: int = 0
+    errors: int = 0
+    reconnects: int = 0
+    last_latency_ms: float | None = None
+    updated_at: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class MqttStatus(IntegrationStatus):
+    connected: bool = False
+    topics: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class CardReaderStatus(IntegrationStatus):
+    alive: bool = False
+    last_card_id: str = ""
 
 
 class IntegrationManager:
-    def __init__(self, config_manager, action_service, logger) -> None:
+    def __init__(self, config_manager, action_service, logger, events=None) -> None:
         self.config_manager = config_manager
         self.action_service = action_service
         self.logger = logger
+        self.events = events
         self.stop_event = threading.Event()
+        self.mqtt_changed = threading.Event()
+        self.mqtt_client = None
+        self.results = ResultPublisher(
+            config_manager, logger, shared_client=lambda: self.mqtt_client
+        )
+        self.card_readers = CardReaderEngine(
+            config_manager,
+            self.dispatch_card,
+            logger,
+            on_status=lambda **values: self._update_status("card_reader", **values),
+        )
         self.threads: list[threading.Thread] = []
-        self.status_info = {
-            "mqtt": {"connected": False, "enabled": False, "last_error": ""},
-            "card_reader": {"enabled": False, "alive": False, "last_error": "", "last_card_id": ""},
+        self._mqtt_sessions = 0
+        # 读取方直接拿当前引用，不加锁；写入方串行地生成新快照后替换整个字典
+        self._snapshots: dict[str, IntegrationStatus] = {
+            "mqtt": MqttStatus(),
+            "card_reader": CardReaderStatus(),
         }
+        self._status_lock = threading.Lock()
 
     def start(self) -> None:
         self._start_card_reader()
         self._start_mqtt_listener()
+        self.results.start()
+        self.action_service.add_task_listener(self.results.submit)
 
     def stop(self) -> None:
         self.stop_event.set()
+        self.mqtt_changed.set()
+        self.config_manager.remove_listener(self._on_config_changed)
+        self.action_service.remove_task_listener(self.results.submit)
+        self.results.stop()
+        self.card_readers.stop()
+
+    def snapshot(self, section: str) -> IntegrationStatus:
+        return self._snapshots[section]
 
     def status(self) -> dict:
-        return self.status_info
+        snapshots = self._snapshots
+        return {
+            **{name: snapshot.to_dict() for name, snapshot in snapshots.items()},
+            "card_readers": self.card_readers.stats(),
+            "mqtt_results": self.results.stats(),
+        }
+
+    def _update_status(self, section: str, bump: tuple[str, ...] = (), **changes) -> None:
+        """bump 中的计数器各加一；内容没有变化时不替换快照也不发事件。"""
+        with self._status_lock:
+            current = self._snapshots[section]
+            for name in bump:
+                changes[name] = getattr(current, name) + 1
+            if all(getattr(current, key) == value for key, value in changes.items()):
+                return
+            updated = dataclasses.replace(current, updated_at=time.time(), **changes)
+            self._snapshots = {**self._snapshots, section: updated}
+        if self.events is not None:
+            self.events.publish("integration", {"name": section, **updated.to_dict()})
+
+    def dispatch_card(self, card_id: str) -> str | None:
+        """按卡号查当前配置的分发表，命中时异步执行对应动作并返回动作名。"""
+        action = self.config_manager.registry.for_card(card_id)
+        if action is None:
+            return None
+        self.logger.info("card matched action=%s card_id=%s", action.name, card_id)
+        self.action_service.run_action_async(action.name, source="card")
+        return action.name
+
+    def dispatch_topic(self, topic: str, payload: str) -> str | None:
+        action = self.config_manager.registry.for_topic(topic)
+        if action is None:
+            return None
+        brightness_value = None
+        if action.type == "brightness":
+            text = payload.removeprefix("on#")
+            if text.isdigit():
+                brightness_value = int(text)
+        self.action_service.run_action_async(
+            action.name, brightness_value=brightness_value, source="mqtt"
+        )
+        return action.name
 
     def _start_card_reader(self) -> None:
-        if serial is None:
-            self.status_info["card_reader"]["last_error"] = "pyserial 未安装"
+        if not self.card_readers.available:
+            self._update_status("card_reader", last_error="pyserial 未安装")
             return
+        self.card_readers.start()
 
-        def worker() -> None:
-            while not self.stop_event.is_set():
-                settings = self.config_manager.get_settings()
-                self.status_info["card_reader"]["enabled"] = settings.enable_card_reader
-                if not settings.enable_card_reader:
-                    time.sleep(1)
-                    continue
-                try:
-                    with serial.Serial(settings.serial_port, 9600, timeout=1) as ser:
-                        self.status_info["card_reader"]["alive"] = True
-                        while not self.stop_event.is_set():
-                            card_id = ser.readline().decode(errors="ignore").strip()
-                            if not card_id:
-                                time.sleep(0.2)
-                                continue
-                            self.status_info["card_reader"]["last_card_id"] = card_id
-                            for action in self.action_service.list_actions():
-                                if card_id in action.card_ids:
-                                    self.logger.info(
-                                        "card matched action=%s card_id=%s", action.name, card_id
-                                    )
-                                    self.action_service.run_action_async(action.name, source="card")
-                                    break
-                except Exception as exc:  # pragma: no cover
-                    self.status_info["card_reader"]["alive"] = False
-                    self.status_info["card_reader"]["last_error"] = str(exc)
-                    self.logger.warning("card reader loop error: %s", exc)
-                    time.sleep(3)
-
-        thread = threading.Thread(target=worker, daemon=True, name="card-reader")
-        thread.start()
-        self.threads.append(thread)
+    def _on_config_changed(self, _registry) -> None:
+        self.mqtt_changed.set()
 
     def _start_mqtt_listener(self) -> None:
         if mqtt is None:
-            self.status_info["mqtt"]["last_error"] = "paho-mqtt 未安装"
+            self._update_status("mqtt", last_error="paho-mqtt 未安装")
             return
+        self.config_manager.add_listener(self._on_config_changed)
 
         def worker() -> None:
             while not self.stop_event.is_set():
+                self.mqtt_changed.clear()
                 settings = self.config_manager.get_settings()
-                topics = {
-                    action.bafy_topic
-                    for action in self.action_service.list_actions()
-                    if action.bafy_topic
-                }
-                self.status_info["mqtt"]["enabled"] = bool(settings.bafy_uid and topics)
+                topics = self.config_manager.registry.topics
+                self._update_status("mqtt", enabled=bool(settings.bafy_uid and topics))
                 if not settings.bafy_uid or not topics:
-                    time.sleep(5)
+                    self.mqtt_changed.wait(5)
                     continue
-                client = mqtt.Client(client_id=settings.bafy_uid)
-
-                def on_connect(
-                    bound_client, _userdata, _flags, rc, _props=None, *, bound_topics=topics
-                ):
-                    self.status_info["mqtt"]["connected"] = rc == 0
-                    for topic in bound_topics:
-                        bound_client.subscribe(topic)
-
-                def on_message(_client, _userdata, msg):
-                    payload = msg.payload.decode(errors="ignore")
-                    for action in self.action_service.list_actions():
-                        if action.bafy_topic != msg.topic:
-                            continue
-                        brightness_value = None
-                        if action.type == "brightness":
-                            text = payload.removeprefix("on#")
-                            if text.isdigit():
-                                brightness_value = int(text)
-                        self.action_service.run_action_async(
-                            action.name,
-                            brightness_value=brightness_value,
-                            source="mqtt",
-                        )
-                        break
-
-                client.on_connect = on_connect
-                client.on_message = on_message
                 try:
-                    client.connect("bemfa.com", 9501, 60)
-                    client.loop_forever()
+                    self._run_mqtt(settings)
                 except Exception as exc:  # pragma: no cover
-                    self.status_info["mqtt"]["connected"] = False
-                    self.status_info["mqtt"]["last_error"] = str(exc)
+                    self._update_status(
+                        "mqtt", bump=("errors",), connected=False, last_error=str(exc)
+                    )
                     self.logger.warning("mqtt loop error: %s", exc)
-                    time.sleep(5)
+                    self.stop_event.wait(5)
 
         thread = threading.Thread(target=worker, daemon=True, name="mqtt-listener")
         thread.start()
         self.threads.append(thread)
+
+    def _run_mqtt(self, settings) -> None:
+        """保持一条连接；配置变化时只增量订阅 / 退订，账号或服务器变化才重新连接。"""
+        endpoint = mqtt_endpoint(settings)
+        qos = settings.mqtt_qos
+        subscribed: set[str] = set()
+        client = mqtt.Client(client_id=settings.bafy_uid)
+
+        def on_connect(bound_client, _userdata, _flags, rc, _props=None):
+            if rc != 0:
+                self._update_status("mqtt", connected=False, last_error=f"MQTT 连接被拒绝：{rc}")
+                return
+            # 新会话里之前的订阅都已失效
+            subscribed.clear()
+            sync_topics(bound_client, subscribed, self.config_manager.registry.topics, qos)
+            self._mqtt_sessions += 1
+            self.mqtt_client = bound_client
+            self._update_status(
+                "mqtt",
+                bump=("reconnects",) if self._mqtt_sessions > 1 else (),
+                connected=True,
+                last_error="",
+                topics=len(subscribed),
+            )
+
+        def on_message(_client, _userdata, msg):
+            received = time.perf_counter()
+            name = self.dispatch_topic(msg.topic, msg.payload.decode(errors="ignore"))
+            self._update_status(
+                "mqtt",
+                bump=("received", "dispatched") if name else ("received",),
+                last_latency_ms=round((time.perf_counter() - received) * 1000, 3),
+            )
+
+        client.on_connect = on_connect
+        client.on_message = on_message
+        client.connect(settings.mqtt_host, settings.mqtt_port, 60)
+        try:
+            while not self.stop_event.is_set():
+                if client.loop(timeout=1.0) != mqtt.MQTT_ERR_SUCCESS:
+                    raise ConnectionError("MQTT 连接已断开")
+                if not self.mqtt_changed.is_set():
+                    continue
+                self.mqtt_changed.clear()
+                settings = self.config_manager.get_settings()
+                topics = self.config_manager.registry.topics
+                if mqtt_endpoint(settings) != endpoint or not topics:
+                    return
+                if settings.mqtt_qos != qos:
+                    qos = settings.mqtt_qos
+                    subscribed.clear()
+                if client.is_connected():
+                    added, removed = sync_topics(client, subscribed, topics, qos)
+                    if added or removed:
+                        self.logger.info("mqtt topics added=%s removed=%s", added, removed)
+                    self._update_status("mqtt", topics=len(subscribed))
+        finally:
+            self.mqtt_client = None
+            client.disconnect()
+            self._update_status("mqtt", connected=False)
+
+
+def mqtt_endpoint(settings) -> tuple[str, str, int]:
+    return settings.bafy_uid, settings.mqtt_host, settings.mqtt_port
+
+
+def sync_topics(client, subscribed: set[str], desired, qos: int) -> tuple[list[str], list[str]]:
+    """对比主题集合，只对差异部分调用 subscribe / unsubscribe，返回 (新增, 移除)。"""
+    added = sorted(set(desired) - subscribed)
+    removed = sorted(subscribed - set(desired))
+    if added:
+        client.subscribe([(topic, qos) for topic in added])
+    if removed:
+        client.unsubscribe(removed)
+    subscribed.difference_update(removed)
+    subscribed.update(added)
+    return added, removed
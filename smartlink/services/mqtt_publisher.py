@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from smartlink.models import AppSettings, TaskRecord
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:  # pragma: no cover
+    mqtt = None
+
+RESULT_QUEUE_SIZE = 1000
+MQTT_ERR_SUCCESS = 0
+
+
+def result_endpoint(settings: AppSettings) -> tuple[str, int, str]:
+    """返回 (host, port, topic)；host 为空表示与监听是同一个服务器，借用监听的连接发布。
+
+    巴法云要求 client id 等于私钥，同一私钥只能有一条连接，所以不能再单独连一次。
+    """
+    host = settings.mqtt_result_host
+    port = settings.mqtt_result_port or settings.mqtt_port
+    if not host or (host, port) == (settings.mqtt_host, settings.mqtt_port):
+        return "", 0, settings.mqtt_result_topic
+    return host, port, settings.mqtt_result_topic
+
+
+def _default_client(client_id: str):
+    client = mqtt.Client(client_id=client_id)
+    client.reconnect_delay_set(min_delay=1, max_delay=30)
+    return client
+
+
+class ResultPublisher:
+    """把任务结果攒批后发布到 MQTT 结果主题。
+
+    队列有界，写满时丢弃最旧的结果并计数；发布失败或连接断开时结果留在队列里，
+    重连后按原顺序补发。两次发布之间至少间隔 1 / mqtt_result_rate 秒。
+    结果服务器与监听相同时通过 shared_client 取监听当前的连接发布，否则单独连接 mqtt_result_host。
+    """
+
+    def __init__(
+        self,
+        config_manager,
+        logger,
+        client_factory: Callable[[str], Any] | None = None,
+        shared_client: Callable[[], Any] | None = None,
+        queue_size: int = RESULT_QUEUE_SIZE,
+        linger: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config_manager = config_manager
+        self.logger = logger
+        self.client_factory = client_factory or _default_client
+        self.shared_client = shared_client
+        self.linger = linger
+        self.clock = clock
+        self.client = None
+        self.endpoint: tuple[str, int, str] = ("", 0, "")
+        self.shared = False
+        self.batch_size = 20
+        self.interval = 0.5
+        self.qos = 0
+        self.published = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failures = 0
+        self._queue: deque[dict[str, Any]] = deque(maxlen=queue_size)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._last_publish = float("-inf")
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoint[2] and (self.endpoint[0] or self.shared))
+
+    def configure(self, settings: AppSettings) -> None:
+        endpoint = result_endpoint(settings)
+        with self._cond:
+            changed = endpoint != self.endpoint
+            if changed and self.client is not None:
+                self._disconnect()
+            self.endpoint = endpoint
+            self.shared = bool(
+                not endpoint[0] and self.shared_client is not None and settings.bafy_uid
+            )
+            self.batch_size = settings.mqtt_result_batch
+            self.interval = 1.0 / settings.mqtt_result_rate
+            self.qos = settings.mqtt_qos
+            self._cond.notify_all()
+        if changed and endpoint[2] and not self.enabled:
+            self.logger.warning(
+                "mqtt result publishing disabled: set mqtt_result_host or bafy_uid for topic=%s",
+                endpoint[2],
+            )
+
+    def _on_config_changed(self, _registry) -> None:
+        self.configure(self.config_manager.get_settings())
+
+    def start(self) -> None:
+        if mqtt is None and self.client_factory is _default_client:
+            return
+        self.configure(self.config_manager.get_settings())
+        self.config_manager.add_listener(self._on_config_changed)
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="smartlink-mqtt-results"
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self.config_manager.remove_listener(self._on_config_changed)
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._disconnect()
+
+    def submit(self, task: TaskRecord) -> None:
+        """ActionService 的任务完成回调，只入队，不在执行线程上做网络 IO。"""
+        if not self.enabled:
+            return
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(
+                {
+                    "task_id": task.task_id,
+                    "action": task.action_name,
+                    "source": task.source,
+                    "status": task.status,
+                    "success": task.success,
+                    "message": task.message,
+                    "error": task.error,
+                    "finished_at": task.finished_at,
+                }
+            )
+            self._cond.notify()
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            queued = len(self._queue)
+        host, port, topic = self.endpoint
+        client = self._current_client()
+        return {
+            "enabled": self.enabled,
+            "connected": bool(client is not None and client.is_connected()),
+            "shared": self.shared,
+            "broker": f"{host}:{port}" if host else "",
+            "topic": topic,
+            "queued": queued,
+            "published": self.published,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failures": self.failures,
+        }
+
+    def _next_batch(self) -> list[dict[str, Any]]:
+        with self._cond:
+            while not self._stop.is_set() and not (self._queue and self.enabled):
+                self._cond.wait()
+            # 稍等片刻让同一时间段的结果合并到一条消息里
+            deadline = self.clock() + self.linger
+            while not self._stop.is_set() and len(self._queue) < self.batch_size:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _requeue(self, batch: list[dict[str, Any]]) -> None:
+        with self._cond:
+            for item in reversed(batch):
+                if len(self._queue) == self._queue.maxlen:
+                    self.dropped += 1
+                    continue
+                self._queue.appendleft(item)
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            wait = self._last_publish + self.interval - self.clock()
+            if wait > 0 and self._stop.wait(wait):
+                self._requeue(batch)
+                break
+            if self._send(batch):
+                backoff = 1.0
+                continue
+            self._requeue(batch)
+            self._stop.wait(backoff)
+            # paho 自己负责重连，这里只需要别太频繁地重试
+            backoff = min(backoff * 2, 5.0)
+
+    def _current_client(self):
+        if self.shared:
+            return self.shared_client()
+        return self.client
+
+    def _connect(self):
+        host, port, _topic = self.endpoint
+        client = self.client_factory(f"smartlink-results-{socket.gethostname()}")
+
+        def on_connect(_client, _userdata, _flags, rc, _props=None):
+            if rc != 0:
+                self.logger.warning(
+                    "mqtt result broker refused connection %s:%s rc=%s", host, port, rc
+                )
+
+        client.on_connect = on_connect
+        client.connect_async(host, port, 60)
+        client.loop_start()
+        self.client = client
+        return client
+
+    def _disconnect(self) -> None:
+        client, self.client = self.client, None
+        if client is not None:
+            client.disconnect()
+            client.loop_stop()
+
+    def _send(self, batch: list[dict[str, Any]]) -> bool:
+        try:
+            client = self._current_client()
+            if client is None and not self.shared:
+                client = self._connect()
+            if client is None or not client.is_connected():
+                return False
+            payload = json.dumps({"results": batch}, ensure_ascii=False)
+            info = client.publish(self.endpoint[2], payload, qos=self.qos)
+        except Exception as exc:
+            self.failures += 1
+            self.logger.warning("mqtt result publish error: %s", exc)
+            return False
+        if info.rc != MQTT_ERR_SUCCESS:
+            self.failures += 1
+            return False
+        self._last_publish = self.clock()
+        self.published += len(batch)
+        self.batches += 1
+        return True
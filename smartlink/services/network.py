@@ -1,15 +1,50 @@
 from __future__ import annotations
 
+import hmac
 import ipaddress
 import socket
+import threading
+import time
 from collections.abc import Iterable
 
 from flask import Request
 
 from smartlink.models import AppSettings
 
+LAN_CACHE_TTL = 60.0
+_lan_cache: tuple[float, tuple, list[str]] | None = None
+_lan_lock = threading.Lock()
 
-def get_lan_addresses() -> list[str]:
+
+def _interface_fingerprint() -> tuple:
+    try:
+        return tuple(socket.if_nameindex())
+    except (OSError, AttributeError):
+        return ()
+
+
+def get_lan_addresses(max_age: float = LAN_CACHE_TTL) -> list[str]:
+    """带缓存的局域网地址列表，超过 max_age 秒或网卡列表变化时重新探测。"""
+    global _lan_cache
+    now = time.monotonic()
+    fingerprint = _interface_fingerprint()
+    with _lan_lock:
+        cached = _lan_cache
+    if cached is not None and cached[1] == fingerprint and now - cached[0] < max_age:
+        return list(cached[2])
+    addresses = discover_lan_addresses()
+    with _lan_lock:
+        _lan_cache = (now, fingerprint, addresses)
+    return list(addresses)
+
+
+def clear_lan_cache() -> None:
+    global _lan_cache
+    with _lan_lock:
+        _lan_cache = None
+
+
+def discover_lan_addresses() -> list[str]:
     addresses = {"127.0.0.1"}
     try:
         hostname = socket.gethostname()
@@ -34,22 +69,81 @@ def get_client_ip(request: Request) -> str:
     return request.remote_addr or "127.0.0.1"
 
 
-def ip_allowed(client_ip: str, settings: AppSettings) -> bool:
-    try:
-        ip_obj = ipaddress.ip_address(client_ip)
-    except ValueError:
-        return False
-    if client_ip in settings.allowed_ips:
-        return True
-    if not settings.allowed_networks and not settings.allowed_ips:
-        return True
-    for network in settings.allowed_networks:
+class AuthPolicy:
+    """预先解析好的 Token / IP 白名单，只在配置版本变化时重建，请求路径上不再解析 CIDR。
+
+    网段按前缀长度分组存成整数集合，判断时每个前缀长度只做一次移位和集合查找；
+    每个客户端 IP 的判断结果会缓存下来。
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(
+        self,
+        token: str,
+        allowed_ips: Iterable[str] = (),
+        allowed_networks: Iterable[str] = (),
+        version: int = 0,
+    ) -> None:
+        allowed_ips = list(allowed_ips)
+        allowed_networks = list(allowed_networks)
+        self.version = version
+        # 两个列表都为空时不限制来源 IP，与旧行为一致
+        self.open = not allowed_ips and not allowed_networks
+        self._token = token.encode()
+        self._ips: set[str] = set()
+        self._prefixes: dict[int, list[tuple[int, set[int]]]] = {4: [], 6: []}
+        self._decisions: dict[str, bool] = {}
+        self._lock = threading.Lock()
+        for item in allowed_ips:
+            try:
+                self._ips.add(str(ipaddress.ip_address(item)))
+            except ValueError:
+                self._ips.add(item)
+        grouped: dict[tuple[int, int], set[int]] = {}
+        networks = []
+        for item in allowed_networks:
+            try:
+                networks.append(ipaddress.ip_network(item, strict=False))
+            except ValueError:
+                continue
+        for network in networks:
+            shift = network.max_prefixlen - network.prefixlen
+            key = (network.version, shift)
+            grouped.setdefault(key, set()).add(int(network.network_address) >> shift)
+        for (ip_version, shift), values in sorted(grouped.items()):
+            self._prefixes[ip_version].append((shift, values))
+
+    @classmethod
+    def from_settings(cls, settings: AppSettings, version: int = 0) -> AuthPolicy:
+        return cls(settings.api_token, settings.allowed_ips, settings.allowed_networks, version)
+
+    def token_valid(self, token: str) -> bool:
+        return hmac.compare_digest(token.encode(), self._token)
+
+    def ip_allowed(self, client_ip: str) -> bool:
+        decision = self._decisions.get(client_ip)
+        if decision is None:
+            decision = self._decide(client_ip)
+            with self._lock:
+                if len(self._decisions) >= self.CACHE_SIZE:
+                    self._decisions.clear()
+                self._decisions[client_ip] = decision
+        return decision
+
+    def _decide(self, client_ip: str) -> bool:
         try:
-            if ip_obj in ipaddress.ip_network(network, strict=False):
-                return True
+            ip_obj = ipaddress.ip_address(client_ip)
         except ValueError:
-            continue
-    return False
+            return False
+        if self.open or client_ip in self._ips or str(ip_obj) in self._ips:
+            return True
+        value = int(ip_obj)
+        return any(value >> shift in values for shift, values in self._prefixes[ip_obj.version])
+
+
+def ip_allowed(client_ip: str, settings: AppSettings) -> bool:
+    return AuthPolicy.from_settings(settings).ip_allowed(client_ip)
 
 
 def parse_lines(value: str | Iterable[str]) -> list[str]:
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any
+
+# 数值越小越先执行：实体卡片和 MQTT 是用户当面触发的，后台任务最后
+SOURCE_PRIORITIES = {"card": 0, "mqtt": 0, "api": 1, "web": 1, "background": 2}
+DEFAULT_PRIORITY = 1
+
+
+class SchedulerFullError(RuntimeError):
+    def __init__(self, lane: str, limit: int) -> None:
+        super().__init__(f"执行队列已满: {lane} (上限 {limit})")
+        self.lane = lane
+        self.limit = limit
+
+
+@dataclass(frozen=True, slots=True)
+class LaneSpec:
+    workers: int
+    max_queue: int
+
+
+DEFAULT_LANE = LaneSpec(workers=2, max_queue=32)
+
+
+@dataclass(slots=True)
+class _Job:
+    future: Future
+    fn: Callable[[], Any]
+    enqueued_at: float
+    on_start: Callable[[], None] | None
+
+
+class _Lane:
+    def __init__(self, name: str, spec: LaneSpec, idle_timeout: float) -> None:
+        self.name = name
+        self.spec = spec
+        self.idle_timeout = idle_timeout
+        self._heap: list[tuple[int, int, _Job]] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._threads = 0
+        self._idle = 0
+        self._closed = False
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def submit(self, job: _Job, priority: int) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("调度器已关闭。")
+            if len(self._heap) >= self.spec.max_queue:
+                self.rejected += 1
+                raise SchedulerFullError(self.name, self.spec.max_queue)
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, len(self._heap))
+            if self._idle < len(self._heap) and self._threads < self.spec.workers:
+                self._threads += 1
+                threading.Thread(
+                    target=self._work, daemon=True, name=f"smartlink-{self.name}"
+                ).start()
+            else:
+                self._cond.notify()
+
+    def _next(self) -> _Job | None:
+        with self._cond:
+            while not self._heap:
+                if self._closed:
+                    self._threads -= 1
+                    return None
+                self._idle += 1
+                notified = self._cond.wait(self.idle_timeout)
+                self._idle -= 1
+                if not notified and not self._heap:
+                    self._threads -= 1
+                    return None
+            _priority, _seq, job = heapq.heappop(self._heap)
+            waited = time.monotonic() - job.enqueued_at
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.running += 1
+            return job
+
+    def _work(self) -> None:
+        while (job := self._next()) is not None:
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    if job.on_start is not None:
+                        job.on_start()
+                    try:
+                        job.future.set_result(job.fn())
+                    except BaseException as exc:
+                        job.future.set_exception(exc)
+            finally:
+                with self._cond:
+                    self.running -= 1
+                    self.completed += 1
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            pending = [job for _priority, _seq, job in self._heap]
+            self._heap.clear()
+            self._cond.notify_all()
+        for job in pending:
+            job.future.cancel()
+
+    def metrics(self) -> dict[str, Any]:
+        with self._cond:
+            started = self.completed + self.running
+            return {
+                "workers": self.spec.workers,
+                "threads": self._threads,
+                "running": self.running,
+                "depth": len(self._heap),
+                "max_depth": self.max_depth,
+                "queue_limit": self.spec.max_queue,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / started * 1000, 1) if started else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 1),
+            }
+
+
+class ActionScheduler:
+    """按通道调度动作：每个通道有独立的并发上限、优先级队列和队列长度上限。"""
+
+    def __init__(
+        self,
+        lanes: dict[str, LaneSpec] | None = None,
+        default: LaneSpec = DEFAULT_LANE,
+        idle_timeout: float = 30.0,
+    ) -> None:
+        self.specs = dict(lanes or {})
+        self.default = default
+        self.idle_timeout = idle_timeout
+        self._lanes: dict[str, _Lane] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def spec_for(self, lane: str) -> LaneSpec:
+        prefix = lane.partition(":")[0]
+        return self.specs.get(lane) or self.specs.get(prefix) or self.default
+
+    def _lane(self, name: str) -> _Lane:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("调度器已关闭。")
+            current = self._lanes.get(name)
+            if current is None:
+                current = _Lane(name, self.spec_for(name), self.idle_timeout)
+                self._lanes[name] = current
+            return current
+
+    def submit(
+        self,
+        lane: str,
+        fn: Callable[[], Any],
+        priority: int = DEFAULT_PRIORITY,
+        on_start: Callable[[], None] | None = None,
+    ) -> Future:
+        future: Future = Future()
+        self._lane(lane).submit(_Job(future, fn, time.monotonic(), on_start), priority)
+        return future
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            lanes = dict(self._lanes)
+        return {name: lane.metrics() for name, lane in sorted(lanes.items())}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            lanes = list(self._lanes.values())
+        for lane in lanes:
+            lane.close()
@@ -77,6 +77,7 @@ function openActionModal(mode, actionName) {
     document.getElementById("uri_scheme").value = action.uri_scheme || "";
     document.getElementById("bafy_topic").value = action.bafy_topic || "";
     document.getElementById("card_ids").value = (action.card_ids || []).join(", ");
+    document.getElementById("adb_targets").value = (action.adb_targets || []).join(", ");
     document.getElementById("description").value = action.description || "";
     document.getElementById("cmd").value = action.cmd || "";
     document.getElementById("favorite").checked = Boolean(action.favorite);
@@ -232,4 +233,44 @@ document.addEventListener("DOMContentLoaded", () => {
       event.currentTarget
     );
   });
+
+  const taskList = document.getElementById("task-history-list");
+  const logBox = document.getElementById("recent-log-box");
+  const dashboardToken = document.getElementById("dashboard-token-input")?.value;
+  if ((taskList || logBox) && dashboardToken && window.EventSource) {
+    const params = new URLSearchParams({ token: dashboardToken, topics: "task,log" });
+    const connect = () => {
+      const source = new EventSource(`/api/events?${params}`);
+
+      source.addEventListener("task", (event) => {
+        if (!taskList) return;
+        const task = JSON.parse(event.data);
+        let item = taskList.querySelector(`[data-task-id="${task.task_id}"]`);
+        if (!item) {
+          item = document.createElement("li");
+          item.dataset.taskId = task.task_id;
+          item.append(document.createElement("strong"), document.createElement("span"), document.createElement("small"));
+          taskList.prepend(item);
+          while (taskList.children.length > 5) taskList.lastElementChild.remove();
+          document.getElementById("task-history-empty")?.setAttribute("hidden", "");
+        }
+        item.querySelector("strong").textContent = task.action_name;
+        item.querySelector("span").textContent = task.status;
+        item.querySelector("small").textContent = task.message || "等待结果";
+      });
+
+      source.addEventListener("log", (event) => {
+        if (!logBox) return;
+        const lines = logBox.textContent === "暂无日志" ? [] : logBox.textContent.split("\n");
+        lines.push(JSON.parse(event.data).line);
+        logBox.textContent = lines.slice(-50).join("\n");
+      });
+
+      // 推送连接数已满时服务端返回 503，EventSource 不会自动重连，稍后再试
+      source.addEventListener("error", () => {
+        if (source.readyState === EventSource.CLOSED) setTimeout(connect, 30000);
+      });
+    };
+    connect();
+  }
 });
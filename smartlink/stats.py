@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+
+from smartlink.models import ActionConfig, now_iso
+from smartlink.storage import atomic_write_text
+
+STATS_FIELDS = ("run_count", "last_run_at", "last_result", "last_message")
+
+
+class RunStatsStore:
+    """动作运行统计，写入内存后由后台线程按时间或数量批量落盘。"""
+
+    def __init__(self, path: Path, flush_interval: float = 5.0, max_pending: int = 50) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats: dict[str, dict[str, Any]] = self._read()
+        self._pending = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _read(self) -> dict[str, dict[str, Any]]:
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if not isinstance(payload, dict):
+            return {}
+        return {
+            str(name): {key: item.get(key) for key in STATS_FIELDS}
+            for name, item in payload.get("actions", {}).items()
+            if isinstance(item, dict)
+        }
+
+    def _write(self, snapshot: dict[str, dict[str, Any]]) -> None:
+        content = json.dumps({"actions": snapshot}, ensure_ascii=False)
+        atomic_write_text(self.path, content)
+
+    def get(self, name: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._stats.get(name)
+            return dict(entry) if entry else None
+
+    def apply(self, action: ActionConfig) -> ActionConfig:
+        entry = self._stats.get(action.name)
+        if entry is None:
+            return action
+        return replace(action, **entry)
+
+    def apply_dict(self, item: dict[str, Any]) -> dict[str, Any]:
+        entry = self._stats.get(item.get("name", ""))
+        return {**item, **entry} if entry else item
+
+    def record(self, action: ActionConfig, success: bool, message: str) -> None:
+        with self._lock:
+            entry = self._stats.get(action.name)
+            run_count = entry["run_count"] if entry else action.run_count
+            self._stats[action.name] = {
+                "run_count": int(run_count or 0) + 1,
+                "last_run_at": now_iso(),
+                "last_result": success,
+                "last_message": message,
+            }
+            self._pending += 1
+            flush_now = self._pending >= self.max_pending
+        self._ensure_flusher()
+        if flush_now:
+            self._wake.set()
+
+    def rename(self, old_name: str, new_name: str) -> None:
+        with self._lock:
+            if old_name in self._stats and old_name != new_name:
+                self._stats[new_name] = self._stats.pop(old_name)
+                self._pending += 1
+        self._ensure_flusher()
+
+    def discard(self, names: list[str]) -> None:
+        with self._lock:
+            removed = [name for name in names if self._stats.pop(name, None) is not None]
+            self._pending += len(removed)
+        if removed:
+            self._ensure_flusher()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                snapshot = {name: dict(entry) for name, entry in self._stats.items()}
+                flushed = self._pending
+            self._write(snapshot)
+            with self._lock:
+                self._pending -= flushed
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def _ensure_flusher(self) -> None:
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._flush_loop, daemon=True, name="smartlink-stats-flush"
+            )
+            self._thread.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError:  # pragma: no cover - 写盘失败时保留待写计数，下个周期重试
+                continue
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+
+def backup_path(path: Path, generation: int) -> Path:
+    return path.with_name(f"{path.name}.bak{generation}")
+
+
+def _fsync_directory(directory: Path) -> None:
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _rotate_backups(path: Path, backups: int) -> None:
+    for generation in range(backups, 1, -1):
+        older = backup_path(path, generation - 1)
+        if older.exists():
+            os.replace(older, backup_path(path, generation))
+    shutil.copyfile(path, backup_path(path, 1))
+
+
+def atomic_write_text(path: Path, content: str, backups: int = 0) -> None:
+    """先写临时文件并 fsync，再用 os.replace 原子替换，避免中途断电留下半截文件。"""
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(content)
+            handle.flush()
+            os.fsync(handle.fileno())
+        if backups > 0 and path.exists():
+            _rotate_backups(path, backups)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+    _fsync_directory(path.parent)
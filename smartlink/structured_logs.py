@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, TextIO
+
+from smartlink.logging_utils import log_files
+
+# 这些字段会写进旁路索引，可以在 /api/logs/search 中按值过滤
+INDEXED_FIELDS = ("event", "action", "source", "status", "ip", "method", "path")
+
+
+def index_path(path: Path | str) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.name}.idx")
+
+
+def log_fields(event: str, **fields: Any) -> dict[str, Any]:
+    """给 logger 的 extra 参数用：logger.info(..., extra=log_fields("action_run", action=name))。"""
+    return {"fields": {"event": event, **fields}}
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        fields = getattr(record, "fields", None) or {}
+        payload = {
+            "ts": round(record.created, 3),
+            "time": datetime.fromtimestamp(record.created)
+            .astimezone()
+            .isoformat(timespec="seconds"),
+            "level": record.levelname,
+            "event": fields.get("event") or message.partition(" ")[0],
+            "message": message,
+        }
+        payload.update({key: value for key, value in fields.items() if key != "event"})
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def index_keys(fields: dict[str, Any]) -> list[str]:
+    return [
+        f"{name}:{fields[name]}" for name in INDEXED_FIELDS if fields.get(name) not in (None, "")
+    ]
+
+
+class IndexedJsonHandler(RotatingFileHandler):
+    """写 JSON-lines 日志，同时在 .idx 旁路文件里追加 [偏移, 时间, 索引键]，并与日志一起轮转。"""
+
+    def __init__(self, path: Path, max_bytes: int = 2_000_000, backup_count: int = 5) -> None:
+        super().__init__(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        self.setFormatter(JsonLineFormatter())
+        self._index: TextIO | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            if self._index is None:
+                self._index = index_path(self.baseFilename).open("a", encoding="utf-8")
+            line = self.format(record)
+            payload = json.loads(line)
+            self.stream.seek(0, os.SEEK_END)
+            offset = self.stream.tell()
+            self.stream.write(line + "\n")
+            self.stream.flush()
+            entry = [offset, int(payload["ts"]), index_keys(payload)]
+            self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index.flush()
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self) -> None:  # noqa: N802 - 覆盖标准库方法
+        super().doRollover()
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        base = self.baseFilename
+        for generation in range(self.backupCount - 1, 0, -1):
+            source = index_path(f"{base}.{generation}")
+            if source.exists():
+                os.replace(source, index_path(f"{base}.{generation + 1}"))
+        if index_path(base).exists():
+            os.replace(index_path(base), index_path(f"{base}.1"))
+
+    def close(self) -> None:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        super().close()
+
+
+@dataclass(slots=True)
+class _FileIndex:
+    identity: tuple[int, int] = (0, 0)
+    position: int = 0
+    first: int = 0
+    last: int = 0
+    times: dict[int, int] = field(default_factory=dict)
+    postings: dict[str, list[int]] = field(default_factory=dict)
+
+
+class LogSearcher:
+    """读取 .idx 旁路索引定位日志行，只回读命中的行；已解析的索引按文件缓存并增量更新。"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._cache: dict[Path, _FileIndex] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, log_path: Path) -> _FileIndex:
+        sidecar = index_path(log_path)
+        try:
+            stat = sidecar.stat()
+        except FileNotFoundError:
+            return _FileIndex()
+        identity = (stat.st_ino, stat.st_dev)
+        cached = self._cache.get(log_path)
+        if cached is None or cached.identity != identity or stat.st_size < cached.position:
+            cached = _FileIndex(identity)
+            self._cache[log_path] = cached
+        if stat.st_size == cached.position:
+            return cached
+        with sidecar.open("rb") as handle:
+            handle.seek(cached.position)
+            data = handle.read()
+        complete = data.rpartition(b"\n")[0]
+        if not complete:
+            return cached
+        cached.position += len(complete) + 1
+        for raw in complete.split(b"\n"):
+            try:
+                offset, ts, keys = json.loads(raw)
+            except (ValueError, TypeError):
+                continue
+            cached.times[offset] = ts
+            cached.first = min(cached.first or ts, ts)
+            cached.last = max(cached.last, ts)
+            for key in keys:
+                cached.postings.setdefault(key, []).append(offset)
+        return cached
+
+    def search(
+        self,
+        filters: dict[str, str],
+        since: float | None = None,
+        until: float | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        keys = [f"{name}:{value}" for name, value in filters.items() if value]
+        results: list[dict[str, Any]] = []
+        with self._lock:
+            files = list(reversed(log_files(self.path)))
+            self._cache = {path: self._cache[path] for path in files if path in self._cache}
+            # 在锁内取出命中的偏移，避免并发搜索的 _load 同时往同一份索引里追加
+            candidates = [
+                (path, self._match(self._load(path), keys, since, until)) for path in files
+            ]
+        for log_path, matched in candidates:
+            results.extend(self._read_lines(log_path, matched[: limit - len(results)]))
+            if len(results) >= limit:
+                break
+        return results
+
+    @staticmethod
+    def _match(
+        file_index: _FileIndex, keys: list[str], since: float | None, until: float | None
+    ) -> list[int]:
+        if (since is not None and file_index.last < since) or (
+            until is not None and file_index.times and file_index.first > until
+        ):
+            # 整个文件都在时间窗口之外，连索引都不用看
+            return []
+        if keys:
+            offsets = set.intersection(*(set(file_index.postings.get(key, ())) for key in keys))
+        else:
+            offsets = set(file_index.times)
+        return sorted(
+            (
+                offset
+                for offset in offsets
+                if (since is None or file_index.times[offset] >= since)
+                and (until is None or file_index.times[offset] <= until)
+            ),
+            reverse=True,
+        )
+
+    @staticmethod
+    def _read_lines(log_path: Path, offsets: list[int]) -> list[dict[str, Any]]:
+        records: list[dict[str, Any]] = []
+        try:
+            handle = log_path.open("rb")
+        except FileNotFoundError:
+            return records
+        with handle:
+            for offset in offsets:
+                handle.seek(offset)
+                try:
+                    records.append(json.loads(handle.readline()))
+                except ValueError:
+                    continue
+        return records
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from pathlib import Path
 
 import pytest
@@ -8,10 +9,31 @@ from smartlink import create_app
 from smartlink.models import ActionConfig, ExecutionResult
 
 
+def _wait_until(predicate, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture()
+def wait_until():
+    """轮询等待后台线程里的状态变化，超时返回 False。"""
+    return _wait_until
+
+
+@pytest.fixture(scope="session")
+def log_dir(tmp_path_factory) -> Path:
+    # 日志 logger 是进程级的，整个测试会话共用一个目录，不写进仓库的 logs/
+    return tmp_path_factory.mktemp("logs")
+
+
 @pytest.fixture()
-def app(tmp_path: Path):
+def app(tmp_path: Path, log_dir: Path):
     config_path = tmp_path / "launcher_config.json"
-    app = create_app(config_path=config_path, testing=True)
+    app = create_app(config_path=config_path, testing=True, log_dir=log_dir)
     state = app.extensions["smartlink"]
     state.config_manager.update_settings(
         {
@@ -75,6 +97,7 @@ def app(tmp_path: Path):
         f"亮度已设置为 {value}%",
         {"value": value},
     )
+    state.log_pipeline.flush()
     state.paths.log_file.write_text(
         "\n".join(f"log line {index}" for index in range(80)),
         encoding="utf-8",
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import threading
+import time
 from pathlib import Path
 
 from smartlink import create_app
+from smartlink.models import ActionConfig, ExecutionResult
 
 
-def test_action_validation_rules(tmp_path: Path):
-    app = create_app(config_path=tmp_path / "launcher_config.json", testing=True)
+def test_action_validation_rules(tmp_path: Path, log_dir: Path):
+    app = create_app(config_path=tmp_path / "launcher_config.json", testing=True, log_dir=log_dir)
     service = app.extensions["smartlink"].action_service
 
     ok, errors, _action = service.save_action(
@@ -39,3 +42,201 @@ def test_action_list_reading(app):
     names = {action.name for action in actions}
     assert "打开记事本" in names
     assert "私有动作" in names
+
+
+def test_adb_action_fans_out_to_group(app):
+    state = app.extensions["smartlink"]
+    state.config_manager.update_settings({"adb_groups": "客厅=tv-1, tv-2; 卧室=tv-3"})
+    state.config_manager.upsert_action(
+        ActionConfig(
+            name="全屋投屏",
+            type="adb",
+            cmd="adb shell input keyevent 26",
+            adb_targets=["客厅", "tv-3", "tv-1"],
+        )
+    )
+    adb = state.adb_service
+    adb.is_available = lambda: True
+    calls: list[str] = []
+
+    def fake_lines(command_text: str, serial: str = ""):
+        calls.append(serial)
+        time.sleep(0.2)
+        if serial == "tv-3":
+            return ExecutionResult(False, "device offline", error="adb_command_failed")
+        return ExecutionResult(True, "ok")
+
+    adb.run_action_lines = fake_lines
+    adb.ensure_screen_on = lambda _settings, serial="": None
+
+    started = time.perf_counter()
+    result = state.action_service.run_action_sync("全屋投屏")
+
+    assert time.perf_counter() - started < 0.5
+    assert sorted(calls) == ["tv-1", "tv-2", "tv-3"]
+    assert result.success is False
+    assert result.error == "adb_partial_failure"
+    assert result.message == "2/3 台设备执行成功。"
+    assert result.data["devices"]["tv-3"]["message"] == "device offline"
+    assert result.data["devices"]["tv-1"]["elapsed_ms"] >= 200
+
+
+def test_repeated_card_triggers_collapse_into_one_run(app):
+    state = app.extensions["smartlink"]
+    service = state.action_service
+    calls: list[str] = []
+
+    def fake_execute(action, _settings, _value=None):
+        calls.append(action.name)
+        time.sleep(0.1)
+        return ExecutionResult(True, "ok")
+
+    service._execute = fake_execute
+    finished: list[str] = []
+    service.add_task_listener(lambda task: finished.append(task.status))
+    tasks = [service.run_action_async("打开记事本", source="card") for _ in range(5)]
+    assert len({task.task_id for task in tasks}) == 1
+    assert tasks[0].coalesced == 4
+
+    time.sleep(0.3)
+    assert tasks[0].status == "finished"
+    assert finished == ["finished"]
+    # 防抖窗口内再刷一次卡仍然并入上一次
+    assert service.run_action_async("打开记事本", source="card") is tasks[0]
+
+    state.config_manager.update_settings({"trigger_debounce_ms": 0})
+    result = service.run_action_sync("打开记事本")
+    assert result.success
+    assert calls == ["打开记事本", "打开记事本"]
+
+
+def test_brightness_triggers_keep_latest_value(app):
+    service = app.extensions["smartlink"].action_service
+    gate = threading.Event()
+    applied: list[int | None] = []
+
+    def fake_execute(_action, _settings, value=None):
+        if not applied:
+            gate.wait(1)
+        applied.append(value)
+        return ExecutionResult(True, f"亮度 {value}")
+
+    service._execute = fake_execute
+    first = threading.Thread(target=service.run_action_sync, args=("亮度模板", 10))
+    first.start()
+    time.sleep(0.05)
+    results: dict[int, ExecutionResult] = {}
+
+    def slide(value: int) -> None:
+        results[value] = service.run_action_sync("亮度模板", value)
+
+    followers = []
+    for value in (20, 30, 40):
+        follower = threading.Thread(target=slide, args=(value,))
+        follower.start()
+        followers.append(follower)
+        time.sleep(0.05)
+    gate.set()
+    first.join(1)
+    for follower in followers:
+        follower.join(1)
+
+    assert applied == [10, 40]
+    assert {result.message for result in results.values()} == {"亮度 40"}
+
+
+def test_queued_brightness_does_not_hold_a_lane_worker(app, wait_until):
+    state = app.extensions["smartlink"]
+    service = state.action_service
+    state.config_manager.upsert_action(
+        ActionConfig(name="副屏亮度", type="brightness", cmd="brightness XXX", enabled=True)
+    )
+    gate = threading.Event()
+    applied: list[tuple[str, int | None]] = []
+
+    def fake_execute(action, _settings, value=None):
+        if action.name == "亮度模板" and not applied:
+            gate.wait(2)
+        applied.append((action.name, value))
+        return ExecutionResult(True, f"亮度 {value}")
+
+    service._execute = fake_execute
+    first = service.run_action_async("亮度模板", 10)
+    assert wait_until(lambda: first.status == "running", 1)
+    queued = service.run_action_async("亮度模板", 20)
+    other = service.run_action_async("副屏亮度", 30)
+
+    # 排队的亮度任务不占用 system 通道的第二个工作线程，另一个亮度动作照常执行
+    assert wait_until(lambda: other.status == "finished", 1)
+    assert queued.status == "queued"
+    gate.set()
+    assert wait_until(lambda: queued.status == "finished", 1)
+    assert applied == [("副屏亮度", 30), ("亮度模板", 10), ("亮度模板", 20)]
+
+
+def test_coalesced_task_fails_with_owner(app):
+    service = app.extensions["smartlink"].action_service
+    gate = threading.Event()
+
+    def fake_execute(_action, _settings, _value=None):
+        gate.wait(1)
+        raise RuntimeError("boom")
+
+    service._execute = fake_execute
+    errors: list[Exception] = []
+
+    def run_owner() -> None:
+        try:
+            service.run_action_sync("打开记事本")
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    owner = threading.Thread(target=run_owner)
+    owner.start()
+    time.sleep(0.05)
+    task = service.run_action_async("打开记事本", source="card")
+    assert task.status == "queued"
+    gate.set()
+    owner.join(1)
+
+    finished = service.wait_for_task(task.task_id, 1)
+    assert finished.status == "failed"
+    assert finished.error == "boom"
+    assert [str(exc) for exc in errors] == ["boom"]
+
+
+def test_adb_actions_serialize_per_device(app):
+    state = app.extensions["smartlink"]
+    state.config_manager.update_settings({"adb_groups": "客厅=tv-1, tv-2"})
+    for name, targets in (("客厅投屏", ["客厅"]), ("电视关机", ["tv-1"])):
+        state.config_manager.upsert_action(
+            ActionConfig(
+                name=name, type="adb", cmd="adb shell input keyevent 26", adb_targets=targets
+            )
+        )
+    adb = state.adb_service
+    adb.is_available = lambda: True
+    adb.ensure_screen_on = lambda _settings, serial="": None
+    running: dict[str, int] = {}
+    overlaps: list[str] = []
+    lock = threading.Lock()
+
+    def fake_lines(command_text: str, serial: str = ""):
+        with lock:
+            running[serial] = running.get(serial, 0) + 1
+            if running[serial] > 1:
+                overlaps.append(serial)
+        time.sleep(0.1)
+        with lock:
+            running[serial] -= 1
+        return ExecutionResult(True, "ok")
+
+    adb.run_action_lines = fake_lines
+    service = state.action_service
+    # 两个动作的 adb_targets 写法不同，落在不同的调度通道，但都会下发到 tv-1
+    task = service.run_action_async("客厅投屏", source="card")
+    result = service.run_action_sync("电视关机")
+
+    assert result.success
+    assert service.wait_for_task(task.task_id, 1).status == "finished"
+    assert overlaps == []
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from smartlink.models import AppSettings, ExecutionResult
+from smartlink.services.adb import ADBService
+from smartlink.services.adb_keeper import ADBConnectionKeeper
+
+
+class Logger:
+    def info(self, *_args, **_kwargs):
+        return None
+
+    def warning(self, *_args, **_kwargs):
+        return None
+
+    def error(self, *_args, **_kwargs):
+        return None
+
+
+class FakeADB(ADBService):
+    def __init__(self) -> None:
+        super().__init__(Logger(), use_shell_pool=False)
+        self.devices: list[str] = []
+        self.connect_ok = False
+        self.connect_calls = 0
+
+    def is_available(self) -> bool:
+        return True
+
+    def list_devices(self):
+        return {"available": True, "connected": bool(self.devices), "devices": list(self.devices)}
+
+    def connect(self, ip: str) -> ExecutionResult:
+        self.connect_calls += 1
+        if self.connect_ok:
+            self.devices.append(ip)
+            return ExecutionResult(True, f"connected to {ip}")
+        return ExecutionResult(False, f"failed to connect to {ip}", error="adb_command_failed")
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def build_keeper():
+    adb = FakeADB()
+    keeper = ADBConnectionKeeper(None, adb, Logger(), base_delay=1.0, jitter=0.0)
+    keeper._clock = Clock()
+    adb.keeper = keeper
+    settings = AppSettings(
+        enable_adb_connect=True, adb_ip="192.168.1.8:5555", adb_reconnect_max_backoff=4
+    )
+    return adb, keeper, settings
+
+
+def test_keeper_backs_off_exponentially_until_reconnected() -> None:
+    adb, keeper, settings = build_keeper()
+    clock = keeper._clock
+
+    keeper.check_once(settings)
+    assert adb.connect_calls == 1
+    assert keeper.status()["targets"]["192.168.1.8:5555"]["state"] == "backoff"
+    assert adb.is_offline() is True
+
+    retry_at = [clock.now]
+    for _ in range(4):
+        calls = adb.connect_calls
+        while adb.connect_calls == calls:
+            clock.now += 0.5
+            keeper.check_once(settings)
+        retry_at.append(clock.now)
+    gaps = [
+        round(later - earlier, 1) for earlier, later in zip(retry_at, retry_at[1:], strict=False)
+    ]
+    assert gaps == [1.0, 2.0, 4.0, 4.0]
+    assert keeper.status()["targets"]["192.168.1.8:5555"]["failures"] == 5
+
+    adb.connect_ok = True
+    clock.now += 4
+    keeper.check_once(settings)
+    status = keeper.status()["targets"]["192.168.1.8:5555"]
+    assert status["state"] == "connected"
+    assert status["last_reconnect_ms"] == round((clock.now - 100.0) * 1000, 1)
+    assert adb.is_offline() is False
+    assert keeper.status()["transitions"][0]["to"] == "connected"
+
+
+def test_keeper_detects_drop_and_skips_when_disabled() -> None:
+    adb, keeper, settings = build_keeper()
+    adb.devices = ["192.168.1.8:5555"]
+    keeper.check_once(settings)
+    assert keeper.status()["targets"]["192.168.1.8:5555"]["state"] == "connected"
+    assert adb.connect_calls == 0
+
+    adb.devices = []
+    keeper.check_once(settings)
+    assert [item["to"] for item in keeper.status()["transitions"][:3]] == [
+        "backoff",
+        "reconnecting",
+        "disconnected",
+    ]
+
+    keeper.check_once(AppSettings(enable_adb_connect=False, adb_ip="192.168.1.8:5555"))
+    assert keeper.status()["targets"] == {}
+    assert adb.is_offline() is False
+
+
+def test_keeper_treats_zero_exit_failure_output_as_failed() -> None:
+    adb, keeper, settings = build_keeper()
+    outputs = iter(
+        [
+            "failed to connect to '192.168.1.8:5555': Connection refused",
+            "unable to connect to 192.168.1.8:5555",
+            "Cannot connect to 192.168.1.8:5555",
+        ]
+    )
+
+    def connect(ip: str) -> ExecutionResult:
+        adb.connect_calls += 1
+        # adb connect 连不上时退出码也可能是 0
+        return ExecutionResult(True, next(outputs))
+
+    adb.connect = connect
+    for _ in range(3):
+        keeper._clock.now += 10
+        keeper.check_once(settings)
+        assert keeper.status()["targets"]["192.168.1.8:5555"]["state"] == "backoff"
+    assert adb.connect_calls == 3
+    assert keeper.status()["targets"]["192.168.1.8:5555"]["failures"] == 3
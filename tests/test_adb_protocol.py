@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import re
+import socketserver
+import threading
+import time
+
+import pytest
+
+from smartlink.models import AppSettings
+from smartlink.services.adb import ADBService
+from smartlink.services.adb_protocol import ADBProtocolError, ADBServerClient
+
+
+class Logger:
+    def info(self, *_args, **_kwargs):
+        return None
+
+    def warning(self, *_args, **_kwargs):
+        return None
+
+    def error(self, *_args, **_kwargs):
+        return None
+
+
+class FakeADBHandler(socketserver.BaseRequestHandler):
+    def _read_service(self) -> str:
+        length = int(self.request.recv(4), 16)
+        data = b""
+        while len(data) < length:
+            data += self.request.recv(length - len(data))
+        return data.decode("utf-8")
+
+    def _okay(self, payload: str | None = None) -> None:
+        self.request.sendall(b"OKAY")
+        if payload is not None:
+            body = payload.encode("utf-8")
+            self.request.sendall(f"{len(body):04x}".encode() + body)
+
+    def _fail(self, message: str) -> None:
+        body = message.encode("utf-8")
+        self.request.sendall(b"FAIL" + f"{len(body):04x}".encode() + body)
+
+    def handle(self) -> None:
+        server = self.server
+        service = self._read_service()
+        server.services.append(service)
+        if service == "host:devices":
+            self._okay("tv-1\tdevice\ntablet-2\toffline\n")
+            return
+        if service == "host:track-devices":
+            self._okay("tv-1\tdevice\n")
+            server.track_next.wait(2)
+            body = b"tv-1\tdevice\ntv-2\tdevice\n"
+            self.request.sendall(f"{len(body):04x}".encode() + body)
+            server.track_done.wait(2)
+            return
+        if service.startswith("host:transport"):
+            if service.endswith(":missing"):
+                self._fail("device 'missing' not found")
+                return
+            self._okay()
+            command = self._read_service()
+            server.services.append(command)
+            self._okay()
+            marker = command.rsplit("printf '\\n", 1)[1].split(":%s", 1)[0]
+            if "dumpsys power" in command:
+                # 值被拆在两个 TCP 包里，半行不能提前匹配
+                self.request.sendall(b"mWakefulness=Awa")
+                time.sleep(0.05)
+                self.request.sendall(b"ke\r\nmHoldingDisplay=true\n")
+                return
+            code = 0 if "am start" in command else 1
+            self.request.sendall(f"Starting: Intent\r\n\n{marker}:{code}\n".encode())
+            return
+        self._fail(f"unknown service {service}")
+
+
+@pytest.fixture()
+def fake_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeADBHandler)
+    server.daemon_threads = True
+    server.services = []
+    server.track_next = threading.Event()
+    server.track_done = threading.Event()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.track_next.set()
+    server.track_done.set()
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_lists_devices_and_runs_shell(fake_server) -> None:
+    client = ADBServerClient(port=fake_server.server_address[1])
+
+    assert client.devices() == [("tv-1", "device"), ("tablet-2", "offline")]
+
+    result = client.shell("am start -d 'ncm://x'", serial="tv-1")
+    assert result.success is True
+    assert result.data["stdout"] == "Starting: Intent\n"
+    assert fake_server.services[1] == "host:transport:tv-1"
+    assert fake_server.services[2].startswith("shell:am start -d 'ncm://x' 2>&1;")
+
+    failed = client.shell("input keyevent 26")
+    assert failed.success is False
+    assert failed.data["returncode"] == 1
+    assert "host:transport-any" in fake_server.services
+
+
+def test_shell_stop_pattern_only_matches_complete_lines(fake_server) -> None:
+    client = ADBServerClient(port=fake_server.server_address[1])
+
+    result = client.shell(
+        "dumpsys power", serial="tv-1", stop_pattern=re.compile(r"mWakefulness=(\w+)")
+    )
+    assert result.success is True
+    match = re.compile(r"mWakefulness=(\w+)").search(result.data["stdout"])
+    assert match is not None and match.group(1) == "Awake"
+
+
+def test_client_surfaces_fail_status(fake_server) -> None:
+    client = ADBServerClient(port=fake_server.server_address[1])
+
+    result = client.shell("echo hi", serial="missing")
+    assert result.error == "adb_protocol_failed"
+    assert "not found" in result.message
+    with pytest.raises(ADBProtocolError):
+        client.host_query("host:unknown")
+
+
+def test_service_socket_backend_and_fallback(fake_server) -> None:
+    service = ADBService(Logger(), use_shell_pool=False)
+    service.is_available = lambda: True
+    service.configure(
+        AppSettings(adb_backend="socket", adb_server_port=fake_server.server_address[1])
+    )
+
+    devices = service.list_devices()
+    assert devices["devices"] == ["tv-1"]
+    assert service.open_uri("ncm://start").success is True
+
+    calls: list[list[str]] = []
+    service._run = lambda args, timeout=5: calls.append(args) or service._coerce_result(
+        type(
+            "Result", (), {"returncode": 0, "stdout": "List of devices attached\n", "stderr": ""}
+        )()
+    )
+    service.server.port = 1
+    service.list_devices()
+    service.open_uri("ncm://start")
+    assert calls[0] == ["adb", "devices"]
+    assert calls[1][:2] == ["adb", "shell"]
+
+
+def test_tracker_keeps_device_snapshot_in_memory(fake_server) -> None:
+    service = ADBService(Logger(), use_shell_pool=False)
+    service.is_available = lambda: True
+    service.server.port = fake_server.server_address[1]
+    service._run = lambda *_args, **_kwargs: pytest.fail("list_devices must not shell out")
+    changes: list[tuple] = []
+
+    service.start_tracking()
+    service.tracker.add_listener(changes.append)
+    try:
+        for _ in range(100):
+            if service.list_devices()["devices"] == ["tv-1"]:
+                break
+            time.sleep(0.01)
+        assert service.list_devices()["devices"] == ["tv-1"]
+
+        fake_server.track_next.set()
+        for _ in range(100):
+            if len(changes) and len(changes[-1]) == 2:
+                break
+            time.sleep(0.01)
+        assert changes[-1] == (("tv-1", "device"), ("tv-2", "device"))
+        assert service.list_devices()["devices"] == ["tv-1", "tv-2"]
+        assert fake_server.services.count("host:track-devices") == 1
+    finally:
+        service.shutdown()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import re
+import shutil
+import sys
+import time
+
+import pytest
+
+from smartlink.models import ExecutionResult
+from smartlink.services.adb import ADBService
+from smartlink.services.adb_session import ADBShellSession
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32" or shutil.which("sh") is None, reason="需要 POSIX sh 模拟 adb shell"
+)
+
+
+class Logger:
+    def info(self, *_args, **_kwargs):
+        return None
+
+    def warning(self, *_args, **_kwargs):
+        return None
+
+    def error(self, *_args, **_kwargs):
+        return None
+
+
+def test_session_frames_output_and_exit_code() -> None:
+    session = ADBShellSession(["sh"], Logger())
+    try:
+        first = session.execute("echo hello; printf 'no newline'")
+        process = session._process
+        failed = session.execute("echo oops >&2; exit_code() { return 3; }; exit_code")
+
+        assert first.success is True
+        assert first.data["stdout"] == "hello\nno newline"
+        assert failed.success is False
+        assert failed.data["returncode"] == 3
+        assert failed.message == "oops"
+        assert session._process is process
+    finally:
+        session.close()
+
+
+def test_session_survives_stdin_exit_and_bad_quotes() -> None:
+    session = ADBShellSession(["sh"], Logger())
+    try:
+        reads_stdin = session.execute("cat; echo read-done", timeout=2)
+        process = session._process
+        exits = session.execute("exit 4", timeout=2)
+        unbalanced = session.execute('echo "oops', timeout=2)
+        after = session.execute("echo still-here", timeout=2)
+
+        assert reads_stdin.message == "read-done"
+        assert exits.data["returncode"] == 4
+        assert unbalanced.success is False
+        assert after.message == "still-here"
+        assert session._process is process
+    finally:
+        session.close()
+
+
+def test_session_timeout_kills_and_respawns() -> None:
+    session = ADBShellSession(["sh"], Logger())
+    try:
+        timed_out = session.execute("sleep 5", timeout=0.2)
+        assert timed_out.error == "timeout"
+        assert session.alive is False
+
+        recovered = session.execute("echo back")
+        assert recovered.success is True
+        assert recovered.message == "back"
+    finally:
+        session.close()
+
+
+def test_service_routes_shell_lines_through_pool_and_falls_back() -> None:
+    service = ADBService(Logger())
+    service.is_available = lambda: True
+    service.sessions.session_args = lambda serial="": ["sh", "-c", "exit 0"] if serial else ["sh"]
+    one_shot: list[list[str]] = []
+    service._run = lambda args, timeout=5: one_shot.append(args) or ExecutionResult(True, "ok")
+    try:
+        pooled = service.run_action_lines("adb shell echo pooled\nadb shell echo again")
+        fallback = service.run_action_lines("adb -s tv-1 shell input keyevent 26")
+        service.run_action_lines("adb connect 192.168.1.20")
+
+        assert pooled.success is True
+        assert fallback.success is True
+        assert one_shot == [
+            ["adb", "-s", "tv-1", "shell", "input keyevent 26"],
+            ["adb", "connect", "192.168.1.20"],
+        ]
+    finally:
+        service.shutdown()
+
+
+def test_streaming_probe_stops_at_first_match() -> None:
+    service = ADBService(Logger(), use_shell_pool=False)
+    started = time.monotonic()
+
+    result = service._run_streaming(
+        ["sh", "-c", "echo header; echo 'mState=ON'; sleep 5; echo tail"],
+        re.compile(r"mState=(ON|OFF)"),
+    )
+
+    assert time.monotonic() - started < 2
+    assert result.success is True
+    assert result.data["early_exit"] is True
+    assert "tail" not in result.data["stdout"]
+
+
+def test_service_retries_one_shot_after_session_timeout() -> None:
+    service = ADBService(Logger())
+    service.is_available = lambda: True
+    service.sessions.run = lambda command, serial="", timeout=5: ExecutionResult(
+        False, "adb shell timeout", {"command": command}, "timeout"
+    )
+    one_shot: list[list[str]] = []
+    service._run = lambda args, timeout=5: one_shot.append(args) or ExecutionResult(True, "ok")
+    try:
+        result = service.run_action_lines("adb shell input keyevent 26")
+
+        assert result.success is True
+        assert one_shot == [["adb", "shell", "input keyevent 26"]]
+    finally:
+        service.shutdown()
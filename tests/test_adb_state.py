@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from smartlink.models import AppSettings, ExecutionResult
+from smartlink.services.adb import ADBService
+
+
+class Logger:
+    def info(self, *_args, **_kwargs):
+        return None
+
+    def warning(self, *_args, **_kwargs):
+        return None
+
+    def error(self, *_args, **_kwargs):
+        return None
+
+
+class FakeDevice:
+    def __init__(self, screen_on: bool, wake_after_polls: int = 0, has_power: bool = True):
+        self.screen_on = screen_on
+        self.wake_after_polls = wake_after_polls
+        self.has_power = has_power
+        self.commands: list[str] = []
+
+    def _probe(self) -> bool:
+        woken = "input keyevent KEYCODE_POWER" in self.commands
+        if woken and not self.screen_on and self.wake_after_polls == 0:
+            self.screen_on = True
+        self.wake_after_polls = max(0, self.wake_after_polls - 1)
+        return self.screen_on
+
+    def run(self, args: list[str], timeout: int = 5) -> ExecutionResult:
+        command = args[-1]
+        self.commands.append(command)
+        if command.startswith("dumpsys power"):
+            if not self.has_power:
+                return ExecutionResult(
+                    False, "", {"stdout": "", "returncode": 1}, "adb_command_failed"
+                )
+            state = "Awake" if self._probe() else "Asleep"
+            return ExecutionResult(True, "ok", {"stdout": f"  mWakefulness={state}\n"})
+        if command.startswith("dumpsys window"):
+            return ExecutionResult(False, "", {"stdout": "", "returncode": 1}, "adb_command_failed")
+        if command == "dumpsys display":
+            state = "ON" if self._probe() else "OFF"
+            return ExecutionResult(True, "ok", {"stdout": f"Display mState={state}\n"})
+        return ExecutionResult(True, "ok", {"stdout": ""})
+
+
+def probes(device: FakeDevice) -> list[str]:
+    return [command for command in device.commands if command.startswith("dumpsys")]
+
+
+def build_service(device: FakeDevice, monkeypatch) -> ADBService:
+    service = ADBService(Logger(), use_shell_pool=False)
+    service.is_available = lambda: True
+    service._run = device.run
+    service._run_streaming = lambda args, _pattern, timeout=5: device.run(args, timeout)
+    monkeypatch.setattr("smartlink.services.adb.time.sleep", lambda _seconds: None)
+    return service
+
+
+def test_screen_state_is_cached_within_ttl(monkeypatch) -> None:
+    device = FakeDevice(screen_on=True)
+    service = build_service(device, monkeypatch)
+    settings = AppSettings()
+
+    service.ensure_screen_on(settings)
+    service.ensure_screen_on(settings)
+
+    assert len(probes(device)) == 1
+    assert probes(device)[0].startswith("dumpsys power | grep")
+    assert service.device_states()["default"]["screen_on"] is True
+
+    service.run_action_lines("adb shell input keyevent 26")
+    service.ensure_screen_on(settings)
+    assert len(probes(device)) == 2
+
+
+def test_wake_polls_until_screen_reports_on(monkeypatch) -> None:
+    device = FakeDevice(screen_on=False, wake_after_polls=3)
+    service = build_service(device, monkeypatch)
+    settings = AppSettings(unlock_after_screen_on=True, device_password="1234")  # noqa: S106
+
+    service.ensure_screen_on(settings)
+
+    assert "input keyevent KEYCODE_POWER" in device.commands
+    assert device.commands[-1] == "input text 1234"
+    assert len(probes(device)) >= 3
+    assert service.device_states()["default"] == {
+        "screen_on": True,
+        "unlocked": True,
+        "connected": True,
+        "age_seconds": 0.0,
+    }
+
+    service.ensure_screen_on(settings)
+    assert device.commands[-1] == "input text 1234"
+    assert device.commands.count("input text 1234") == 1
+
+
+def test_probe_falls_back_and_remembers_working_strategy(monkeypatch) -> None:
+    device = FakeDevice(screen_on=True, has_power=False)
+    service = build_service(device, monkeypatch)
+
+    assert service.is_screen_on() is True
+    assert [command.split()[1] for command in probes(device)] == ["power", "window", "display"]
+
+    device.commands.clear()
+    assert service.is_screen_on() is True
+    assert probes(device) == ["dumpsys display"]
+
+
+def test_probe_preference_is_kept_per_device(monkeypatch) -> None:
+    old = FakeDevice(screen_on=True, has_power=False)
+    new = FakeDevice(screen_on=True)
+    devices = {"tv-old": old, "tv-new": new}
+    service = build_service(old, monkeypatch)
+    service._run = lambda args, timeout=5: devices[args[2]].run(args, timeout)
+    service._run_streaming = lambda args, _pattern, timeout=5: service._run(args, timeout)
+
+    assert service.is_screen_on("tv-old") is True
+    assert service.is_screen_on("tv-new") is True
+    old.commands.clear()
+    new.commands.clear()
+    service.invalidate_state()
+
+    assert service.is_screen_on("tv-old") is True
+    assert service.is_screen_on("tv-new") is True
+    assert probes(old) == ["dumpsys display"]
+    assert [command.split()[1] for command in probes(new)] == ["power"]
+
+
+def test_targets_insert_serial_for_device_commands(monkeypatch) -> None:
+    device = FakeDevice(screen_on=True)
+    service = build_service(device, monkeypatch)
+    calls: list[list[str]] = []
+    service._run = lambda args, timeout=5: calls.append(args) or ExecutionResult(True, "ok")
+
+    service.run_action_lines("adb install demo.apk\nadb connect 10.0.0.2\nadb shell ls", "tv-1")
+
+    assert calls == [
+        ["adb", "-s", "tv-1", "install", "demo.apk"],
+        ["adb", "connect", "10.0.0.2"],
+        ["adb", "-s", "tv-1", "shell", "ls"],
+    ]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import threading
+
 
 def test_api_requires_token(client):
     response = client.get("/api/health")
@@ -49,3 +51,72 @@ def test_api_logs_limit_and_auth(client, auth_headers):
     assert len(logs) == 50
     assert logs[0] == "log line 30"
     assert any("log line 79" in line for line in logs)
+
+
+def test_api_tasks_submit_and_long_poll(app, client, auth_headers):
+    service = app.extensions["smartlink"].action_service
+    gate = threading.Event()
+    launch = service.launcher.launch
+    service.launcher.launch = lambda command: (gate.wait(1), launch(command))[1]
+
+    submitted = client.post("/api/tasks", headers=auth_headers, json={"action": "打开记事本"})
+    assert submitted.status_code == 202
+    task_id = submitted.get_json()["data"]["task_id"]
+
+    pending = client.get(f"/api/tasks/{task_id}", headers=auth_headers).get_json()
+    assert pending["data"]["status"] in ("queued", "running")
+
+    threading.Timer(0.1, gate.set).start()
+    done = client.get(f"/api/tasks/{task_id}?wait=2", headers=auth_headers).get_json()
+    assert done["data"]["status"] == "finished"
+    assert done["data"]["success"] is True
+
+    missing = client.get("/api/tasks/unknown", headers=auth_headers)
+    assert missing.status_code == 404
+    forbidden = client.post("/api/tasks", headers=auth_headers, json={"action": "私有动作"})
+    assert forbidden.status_code == 400
+    assert forbidden.get_json()["error"] == "action_not_allowed"
+
+
+def test_api_logs_incremental_offsets(app, client, auth_headers):
+    state = app.extensions["smartlink"]
+    log_file = state.paths.log_file
+    state.log_pipeline.flush()
+    log_file.write_text("第一行\nsecond\n", encoding="utf-8")
+
+    first = client.get("/api/logs", headers=auth_headers).get_json()["data"]
+    assert first["logs"] == ["第一行", "second"]
+
+    with log_file.open("a", encoding="utf-8") as handle:
+        handle.write("third\nfour")
+    newer = client.get(f"/api/logs?after={first['offset']}", headers=auth_headers).get_json()
+    lines = newer["data"]["logs"]
+    # 请求日志也会写入同一文件；没写完的最后一行留到下一次
+    assert "third" in lines
+    assert "four" not in lines
+    assert "第一行" not in lines
+
+    state.log_pipeline.flush()
+    log_file.write_text("rotated\n", encoding="utf-8")
+    rotated = client.get(
+        f"/api/logs?after={newer['data']['offset']}", headers=auth_headers
+    ).get_json()["data"]
+    assert rotated["reset"] is True
+    assert rotated["logs"][0] == "rotated"
+
+
+def test_api_logs_search_filters_structured_records(app, client, auth_headers):
+    state = app.extensions["smartlink"]
+    client.post("/api/run/打开记事本", headers=auth_headers, json={})
+    state.log_pipeline.flush()
+
+    response = client.get(
+        "/api/logs/search?action=打开记事本&source=api&limit=5", headers=auth_headers
+    )
+    records = response.get_json()["data"]["records"]
+    assert response.status_code == 200
+    assert records[0]["event"] == "action_run"
+    assert records[0]["status"] == "ok"
+
+    invalid = client.get("/api/logs/search?since=yesterday", headers=auth_headers)
+    assert invalid.status_code == 400
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from smartlink.config import ConfigManager
+from smartlink.services.card_reader import CardFramer, CardReaderEngine, LatencyHistogram
+
+
+def test_framer_handles_terminators_fixed_length_and_partial_reads():
+    framer = CardFramer(b"\r\n")
+    assert framer.feed(b"12345\r") == []
+    assert framer.feed(b"\n678") == ["12345"]
+    assert framer.feed(b"90\r\n\r\n") == ["67890"]
+
+    fixed = CardFramer(frame_length=4)
+    assert fixed.feed(b"\x01\x02") == []
+    assert fixed.feed(b"\xaa\xbbABCD") == ["0102AABB", "ABCD"]
+
+
+def test_latency_histogram_buckets():
+    histogram = LatencyHistogram((1, 10))
+    for seconds in (0.0005, 0.005, 0.5):
+        histogram.observe(seconds)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 3
+    assert snapshot["buckets"] == {"<=1ms": 1, "<=10ms": 1, ">10ms": 1}
+    assert snapshot["max_ms"] == 500.0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="需要 POSIX pty")
+def test_engine_reads_pty_devices_and_hot_reloads(tmp_path: Path, wait_until):
+    pytest.importorskip("serial")
+    ptys = [os.openpty() for _ in range(2)]
+    ports = [os.ttyname(slave) for _master, slave in ptys]
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.update_settings(
+        {"enable_card_reader": True, "serial_port": ports[0], "serial_baudrate": 115200}
+    )
+    swipes: list[str] = []
+    statuses: list[dict] = []
+    engine = CardReaderEngine(
+        manager,
+        swipes.append,
+        logging.getLogger("test"),
+        on_status=lambda **values: statuses.append(values),
+    )
+    engine.start()
+    try:
+        assert wait_until(lambda: engine.stats()["readers"][0]["alive"])
+        first = engine.readers[ports[0]]
+        started = time.perf_counter()
+        os.write(ptys[0][0], b"CARD-1\n")
+        assert wait_until(lambda: swipes == ["CARD-1"])
+        # 不再有 readline 超时 + sleep 的等待，刷卡后很快就能分发
+        assert time.perf_counter() - started < 0.5
+        assert engine.stats()["latency"]["count"] == 1
+        assert {"last_card_id": "CARD-1"}.items() <= statuses[-1].items()
+
+        manager.update_settings({"serial_port": f"{ports[0]}, {ports[1]}"})
+        assert wait_until(lambda: len(engine.readers) == 2)
+        assert engine.readers[ports[0]] is first
+        assert wait_until(lambda: all(item["alive"] for item in engine.stats()["readers"]))
+        os.write(ptys[1][0], b"CARD-2\n")
+        assert wait_until(lambda: swipes == ["CARD-1", "CARD-2"])
+
+        manager.update_settings({"enable_card_reader": False})
+        assert engine.readers == {}
+        assert statuses[-1]["enabled"] is False
+    finally:
+        engine.stop()
+        for master, slave in ptys:
+            os.close(master)
+            os.close(slave)
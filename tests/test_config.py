@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import time
 from pathlib import Path
 
 from smartlink.config import ConfigManager
@@ -51,3 +52,137 @@ def test_legacy_config_is_migrated(tmp_path: Path) -> None:
     payload = manager.load()
     assert payload["version"] == 2
     assert "settings" in payload and "actions" in payload
+
+
+def test_action_registry_indexes_and_version(tmp_path: Path) -> None:
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.upsert_action(
+        ActionConfig(name="打开画图", type="exe", cmd="mspaint.exe", category="办公", tags=["常用"])
+    )
+    manager.upsert_action(
+        ActionConfig(name="投屏", type="adb", cmd="adb shell input keyevent 26", favorite=True)
+    )
+    registry = manager.registry
+
+    assert registry.get("打开画图") == manager.get_action("打开画图")
+    # 调用方改返回的动作不能影响注册表里的条目和索引
+    copy = manager.get_action("打开画图")
+    copy.card_ids.append("C9")
+    copy.category = "影音"
+    assert registry.get("打开画图").card_ids == []
+    assert [action.name for action in manager.list_actions() if action.category == "办公"] == [
+        "打开画图"
+    ]
+    assert registry.actions[0].name == "投屏"
+    assert [action.name for action in registry.in_category("办公")] == ["打开画图"]
+    assert [action.name for action in registry.with_tag("常用")] == ["打开画图"]
+    assert [action.name for action in registry.of_type("adb")] == ["投屏"]
+    assert registry.for_card("unknown") is None
+
+    manager.save(manager.load())
+    assert manager.registry is registry
+
+    manager.delete_actions(["投屏"])
+    assert manager.version == registry.version + 1
+    assert manager.get_action("投屏") is None
+
+
+def test_action_registry_dispatch_tables(tmp_path: Path) -> None:
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.upsert_action(
+        ActionConfig(name="打开画图", type="exe", cmd="mspaint.exe", card_ids=["A1", "B2"])
+    )
+    manager.upsert_action(
+        ActionConfig(
+            name="投屏",
+            type="adb",
+            cmd="adb shell",
+            favorite=True,
+            card_ids=["B2"],
+            bafy_topic="t1",
+        )
+    )
+    registry = manager.registry
+
+    assert registry.for_card("A1").name == "打开画图"
+    # 重复卡号取排序后的第一个动作（收藏优先），与原线性扫描一致
+    assert registry.for_card("B2").name == "投屏"
+    assert registry.for_topic("t1").name == "投屏"
+    assert registry.for_topic("") is None
+    assert registry.topics == {"t1"}
+
+    manager.upsert_action(ActionConfig(name="打开画图", type="exe", cmd="mspaint.exe"), "打开画图")
+    assert manager.registry.for_card("A1") is None
+    assert registry.for_card("A1").name == "打开画图"
+
+
+def test_run_results_are_buffered_outside_config(tmp_path: Path) -> None:
+    config_path = tmp_path / "launcher_config.json"
+    manager = ConfigManager(config_path)
+    manager.upsert_action(ActionConfig(name="打开画图", type="exe", cmd="mspaint.exe"))
+    version = manager.version
+    config_text = config_path.read_text(encoding="utf-8")
+
+    manager.update_action_result("打开画图", True, "ok")
+    manager.update_action_result("打开画图", False, "boom")
+
+    assert manager.version == version
+    assert config_path.read_text(encoding="utf-8") == config_text
+    action = manager.get_action("打开画图")
+    assert action.run_count == 2
+    assert action.last_result is False
+    assert manager.export_payload(["打开画图"])["actions"][0]["run_count"] == 2
+
+    manager.close()
+    reloaded = ConfigManager(config_path)
+    assert reloaded.get_action("打开画图").run_count == 2
+    assert reloaded.get_action("打开画图").last_message == "boom"
+
+
+def test_run_stats_flush_after_max_pending(tmp_path: Path) -> None:
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.stats.max_pending = 2
+    stats_path = manager.stats.path
+
+    manager.update_action_result("关机", True, "ok")
+    assert not stats_path.exists()
+    manager.update_action_result("关机", True, "ok")
+    for _ in range(50):
+        if stats_path.exists():
+            break
+        time.sleep(0.02)
+
+    assert json.loads(stats_path.read_text(encoding="utf-8"))["actions"]["关机"]["run_count"] == 2
+    manager.close()
+
+
+def test_config_writes_keep_backups_and_recover(tmp_path: Path) -> None:
+    config_path = tmp_path / "launcher_config.json"
+    manager = ConfigManager(config_path, backup_count=2)
+    manager.update_settings({"adb_ip": "192.168.1.8:5555"})
+    manager.update_settings({"adb_ip": "192.168.1.9:5555"})
+
+    assert not list(tmp_path.glob("*.tmp"))
+    assert (tmp_path / "launcher_config.json.bak1").exists()
+    assert (tmp_path / "launcher_config.json.bak2").exists()
+    assert not (tmp_path / "launcher_config.json.bak3").exists()
+
+    config_path.write_text('{"settings": {"adb_ip": "192.168', encoding="utf-8")
+    recovered = ConfigManager(config_path, backup_count=2)
+
+    assert recovered.get_settings().adb_ip == "192.168.1.8:5555"
+    assert (tmp_path / "launcher_config.json.broken").exists()
+    assert json.loads(config_path.read_text(encoding="utf-8"))["settings"]["adb_ip"] == (
+        "192.168.1.8:5555"
+    )
+
+
+def test_change_listeners_fire_only_when_content_changes(tmp_path: Path) -> None:
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    versions: list[int] = []
+    manager.add_listener(lambda registry: versions.append(registry.version))
+
+    manager.update_settings({"mqtt_host": "broker.lan"})
+    manager.save(manager.load())
+    assert versions == [manager.version]
+    assert manager.get_settings().mqtt_host == "broker.lan"
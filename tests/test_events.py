@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+
+from smartlink.services.events import EventBus
+
+
+def test_slow_subscriber_buffer_is_bounded():
+    bus = EventBus(buffer_size=3)
+    slow = bus.subscribe()
+    tasks_only = bus.subscribe({"task"})
+    for index in range(10):
+        bus.publish("log", {"line": f"line {index}"})
+    bus.publish("task", {"task_id": "t1"})
+
+    events, missed = slow.get(timeout=0)
+    assert [event.data.get("line") for event in events] == ["line 8", "line 9", None]
+    assert missed == 8
+    assert bus.stats() == {
+        "subscribers": 2,
+        "max_subscribers": 0,
+        "rejected": 0,
+        "published": 11,
+        "dropped": 8,
+    }
+    assert [event.kind for event in tasks_only.get(timeout=0)[0]] == ["task"]
+
+    slow.close()
+    tasks_only.close()
+    assert bus.stats()["subscribers"] == 0
+
+
+def test_events_endpoint_streams_task_lifecycle(app, client, auth_headers):
+    response = client.get("/api/events?topics=task", headers=auth_headers, buffered=False)
+    assert response.mimetype == "text/event-stream"
+    stream = iter(response.response)
+    assert next(stream).startswith(b"retry:")
+
+    task = app.extensions["smartlink"].action_service.run_action_async("打开记事本")
+    statuses: list[str] = []
+    while "finished" not in statuses:
+        chunk = next(stream).decode("utf-8")
+        if chunk.startswith("id:"):
+            payload = json.loads(chunk.split("data: ", 1)[1])
+            assert payload["task_id"] == task.task_id
+            statuses.append(payload["status"])
+    response.close()
+
+    assert statuses[0] == "queued"
+    assert app.extensions["smartlink"].events.stats()["subscribers"] == 0
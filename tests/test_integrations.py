@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import types
+from pathlib import Path
+
+from smartlink.config import ConfigManager
+from smartlink.models import ActionConfig
+from smartlink.services import integrations
+from smartlink.services.integrations import IntegrationManager
+
+
+class RecordingActions:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, int | None, str]] = []
+
+    def run_action_async(self, name, brightness_value=None, source="background"):
+        self.calls.append((name, brightness_value, source))
+
+    def add_task_listener(self, listener) -> None:
+        pass
+
+    def remove_task_listener(self, listener) -> None:
+        pass
+
+
+def test_card_and_topic_dispatch_use_registry(tmp_path: Path):
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.upsert_action(ActionConfig(name="投屏", type="adb", cmd="adb shell", card_ids=["C1"]))
+    manager.upsert_action(
+        ActionConfig(name="设置亮度", type="brightness", cmd="echo XXX", bafy_topic="light")
+    )
+    actions = RecordingActions()
+    integrations = IntegrationManager(manager, actions, logging.getLogger("test"))
+
+    assert integrations.dispatch_card("C1") == "投屏"
+    assert integrations.dispatch_card("C2") is None
+    assert integrations.dispatch_topic("light", "on#40") == "设置亮度"
+    assert integrations.dispatch_topic("other", "on") is None
+    assert actions.calls == [("投屏", None, "card"), ("设置亮度", 40, "mqtt")]
+
+
+class FakeMQTTClient:
+    instances: list[FakeMQTTClient] = []
+
+    def __init__(self, client_id: str) -> None:
+        self.client_id = client_id
+        self.connected_to: tuple[str, int] | None = None
+        self.subscribed: list[list[tuple[str, int]]] = []
+        self.unsubscribed: list[list[str]] = []
+        self._pending_connect = False
+        FakeMQTTClient.instances.append(self)
+
+    def connect(self, host: str, port: int, keepalive: int) -> None:
+        self.connected_to = (host, port)
+        self._pending_connect = True
+
+    def loop(self, timeout: float = 1.0) -> int:
+        if self._pending_connect:
+            self._pending_connect = False
+            self.on_connect(self, None, {}, 0)
+        time.sleep(0.01)
+        return 0
+
+    def is_connected(self) -> bool:
+        return self.connected_to is not None
+
+    def subscribe(self, topics):
+        self.subscribed.append(topics)
+
+    def unsubscribe(self, topics):
+        self.unsubscribed.append(topics)
+
+    def disconnect(self) -> None:
+        self.connected_to = None
+
+
+def test_mqtt_listener_resubscribes_incrementally(tmp_path: Path, monkeypatch, wait_until):
+    FakeMQTTClient.instances.clear()
+    monkeypatch.setattr(
+        integrations,
+        "mqtt",
+        types.SimpleNamespace(Client=FakeMQTTClient, MQTT_ERR_SUCCESS=0),
+    )
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.update_settings({"bafy_uid": "uid", "mqtt_host": "broker.lan", "mqtt_qos": 1})
+    manager.upsert_action(ActionConfig(name="a", type="exe", cmd="echo", bafy_topic="t1"))
+    manager.upsert_action(ActionConfig(name="b", type="exe", cmd="echo", bafy_topic="t2"))
+    service = IntegrationManager(manager, RecordingActions(), logging.getLogger("t"))
+    service._start_mqtt_listener()
+    try:
+        assert wait_until(
+            lambda: FakeMQTTClient.instances and FakeMQTTClient.instances[0].subscribed
+        )
+        client = FakeMQTTClient.instances[0]
+        assert client.connected_to == ("broker.lan", 9501)
+        assert client.subscribed == [[("t1", 1), ("t2", 1)]]
+        assert wait_until(lambda: service.snapshot("mqtt").connected)
+        assert service.snapshot("mqtt").topics == 2
+        # 结果上报借用的就是这条监听连接
+        assert service.mqtt_client is client
+
+        manager.upsert_action(ActionConfig(name="b", type="exe", cmd="echo", bafy_topic="t3"), "b")
+        assert wait_until(lambda: client.unsubscribed)
+        assert client.subscribed[-1] == [("t3", 1)]
+        assert client.unsubscribed == [["t2"]]
+        assert len(FakeMQTTClient.instances) == 1
+
+        manager.update_settings({"mqtt_port": 1883})
+        assert wait_until(lambda: len(FakeMQTTClient.instances) == 2)
+        assert wait_until(lambda: FakeMQTTClient.instances[1].connected_to == ("broker.lan", 1883))
+        assert wait_until(lambda: service.snapshot("mqtt").reconnects == 1)
+    finally:
+        service.stop()
+        service.threads[0].join(2)
+    assert service.mqtt_client is None
+
+
+def test_status_snapshots_are_immutable_and_count_events(tmp_path: Path):
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    service = IntegrationManager(manager, RecordingActions(), logging.getLogger("test"))
+    before = service.snapshot("mqtt")
+    status = service.status()
+
+    def bump() -> None:
+        for _ in range(200):
+            service._update_status("mqtt", bump=("received",), connected=True)
+
+    workers = [threading.Thread(target=bump) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    current = service.snapshot("mqtt")
+    assert current.received == 800
+    assert current.connected is True
+    assert before.received == 0
+    assert status["mqtt"]["received"] == 0
+    assert status["mqtt"]["connected"] is False
+
+    service._update_status("mqtt", connected=True)
+    assert service.snapshot("mqtt") is current
+    assert service.status()["card_reader"]["alive"] is False
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import logging
+from collections import deque
+from pathlib import Path
+
+from smartlink import create_app
+from smartlink.logging_utils import LogPipeline, iter_log_bytes, log_files, tail_log
+
+
+def test_tail_log_matches_full_scan(tmp_path: Path):
+    log_file = tmp_path / "smartlink.log"
+    log_file.write_text("".join(f"第 {index} 行 {'x' * (index % 7)}\n" for index in range(500)))
+    with log_file.open(encoding="utf-8") as handle:
+        expected = list(deque(handle, maxlen=50))
+
+    assert tail_log(log_file, limit=50, block_size=64) == expected
+    assert tail_log(log_file, limit=1000) == log_file.read_text().splitlines(keepends=True)
+
+    log_file.write_text("a\nb\nlast without newline")
+    assert tail_log(log_file, limit=2, block_size=3) == ["b\n", "last without newline"]
+    assert tail_log(tmp_path / "missing.log") == []
+
+
+def test_rotated_logs_stream_oldest_first(tmp_path: Path):
+    log_file = tmp_path / "smartlink.log"
+    for name, text in (("smartlink.log.2", "old\n"), ("smartlink.log.1", "mid\n")):
+        (tmp_path / name).write_text(text)
+    log_file.write_text("new\n")
+    (tmp_path / "smartlink.log.bak").write_text("ignored\n")
+
+    assert [path.name for path in log_files(log_file)] == [
+        "smartlink.log.2",
+        "smartlink.log.1",
+        "smartlink.log",
+    ]
+    assert b"".join(iter_log_bytes(log_file, chunk_size=2)) == b"old\nmid\nnew\n"
+
+
+def test_log_pipeline_counts_drops_and_flushes(tmp_path: Path):
+    target = logging.FileHandler(tmp_path / "pipeline.log", encoding="utf-8")
+    target.setFormatter(logging.Formatter("%(message)s"))
+    pipeline = LogPipeline([target], queue_size=2)
+    logger = logging.getLogger("smartlink.test-pipeline")
+    logger.propagate = False
+    logger.addHandler(pipeline.handler)
+    try:
+        for index in range(5):
+            logger.warning("line %s", index)
+        assert pipeline.stats() == {"running": False, "queued": 2, "capacity": 2, "dropped": 3}
+
+        pipeline.start()
+        assert pipeline.flush(timeout=1)
+        assert (tmp_path / "pipeline.log").read_text(encoding="utf-8") == "line 0\nline 1\n"
+
+        logger.warning("on shutdown")
+        pipeline.stop()
+        assert tail_log(tmp_path / "pipeline.log", limit=1) == ["on shutdown\n"]
+    finally:
+        logger.removeHandler(pipeline.handler)
+        target.close()
+
+
+def test_create_app_with_new_log_dir_replaces_pipeline(tmp_path: Path):
+    first = create_app(tmp_path / "a.json", testing=True, log_dir=tmp_path / "logs-a")
+    first_state = first.extensions["smartlink"]
+    first_state.logger.warning("to first")
+    first_state.log_pipeline.flush()
+
+    second = create_app(tmp_path / "b.json", testing=True, log_dir=tmp_path / "logs-b")
+    second_state = second.extensions["smartlink"]
+    second_state.logger.warning("to second")
+    second_state.log_pipeline.flush()
+
+    assert second_state.log_pipeline is not first_state.log_pipeline
+    assert first_state.log_pipeline.stats()["running"] is False
+    first_text = first_state.paths.log_file.read_text(encoding="utf-8")
+    second_text = second_state.paths.log_file.read_text(encoding="utf-8")
+    assert "to first" in first_text and "to second" not in first_text
+    assert "to second" in second_text and "to first" not in second_text
+    first_state.shutdown()
+    second_state.shutdown()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from smartlink.config import ConfigManager
+from smartlink.models import TaskRecord
+from smartlink.services.mqtt_publisher import ResultPublisher
+
+
+class StubBroker:
+    """进程内的 MQTT 客户端替身，记录发布内容并可模拟断线。"""
+
+    def __init__(self) -> None:
+        self.online = threading.Event()
+        self.online.set()
+        self.messages: list[tuple[str, dict, int, float]] = []
+        self.client_ids: list[str] = []
+        self.endpoints: list[tuple[str, int]] = []
+        self.clients: list = []
+
+    def client(self, client_id: str):
+        self.client_ids.append(client_id)
+        broker = self
+
+        class Client:
+            def connect_async(self, host, port, keepalive):
+                broker.endpoints.append((host, port))
+
+            def loop_start(self):
+                pass
+
+            def loop_stop(self):
+                pass
+
+            def disconnect(self):
+                pass
+
+            def is_connected(self):
+                return broker.online.is_set()
+
+            def publish(self, topic, payload, qos=0):
+                if not broker.online.is_set():
+                    return SimpleNamespace(rc=4)
+                broker.messages.append((topic, json.loads(payload), qos, time.monotonic()))
+                return SimpleNamespace(rc=0)
+
+        client = Client()
+        self.clients.append(client)
+        return client
+
+
+def task(index: int) -> TaskRecord:
+    return TaskRecord(
+        task_id=f"t{index}", source="card", action_name="投屏", status="finished", success=True
+    )
+
+
+def test_results_are_batched_rate_limited_and_survive_reconnects(tmp_path: Path, wait_until):
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.update_settings(
+        {
+            "mqtt_result_topic": "smartlink/results",
+            "mqtt_result_host": "127.0.0.1",
+            "mqtt_result_port": 1883,
+            "mqtt_result_batch": 3,
+            "mqtt_result_rate": 5,
+        }
+    )
+    broker = StubBroker()
+    publisher = ResultPublisher(
+        manager, logging.getLogger("test"), client_factory=broker.client, linger=0.05
+    )
+    publisher.start()
+    try:
+        for index in range(5):
+            publisher.submit(task(index))
+        assert wait_until(lambda: len(broker.messages) == 2)
+        assert broker.endpoints == [("127.0.0.1", 1883)]
+        first, second = broker.messages
+        assert first[0] == "smartlink/results"
+        assert [item["task_id"] for item in first[1]["results"]] == ["t0", "t1", "t2"]
+        assert [item["task_id"] for item in second[1]["results"]] == ["t3", "t4"]
+        assert second[3] - first[3] >= 0.19
+
+        broker.online.clear()
+        publisher.submit(task(5))
+        time.sleep(0.3)
+        assert publisher.stats()["queued"] == 1
+        broker.online.set()
+        assert wait_until(lambda: len(broker.messages) == 3, timeout=5)
+        assert broker.messages[-1][1]["results"][0]["task_id"] == "t5"
+        assert publisher.stats()["published"] == 6
+    finally:
+        publisher.stop()
+
+
+def test_disabled_publisher_ignores_results(tmp_path: Path):
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    broker = StubBroker()
+    publisher = ResultPublisher(manager, logging.getLogger("test"), client_factory=broker.client)
+    publisher.start()
+    publisher.submit(task(1))
+    assert publisher.stats()["queued"] == 0
+    publisher.stop()
+    assert broker.client_ids == []
+
+
+def test_results_share_the_listener_connection(tmp_path: Path, wait_until):
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.update_settings({"bafy_uid": "uid-1", "mqtt_result_topic": "smartlink/results"})
+    broker = StubBroker()
+    listener: list = [None]
+    publisher = ResultPublisher(
+        manager,
+        logging.getLogger("test"),
+        client_factory=broker.client,
+        shared_client=lambda: listener[0],
+        linger=0.01,
+    )
+    publisher.start()
+    try:
+        publisher.submit(task(1))
+        time.sleep(0.1)
+        assert publisher.stats()["queued"] == 1
+        # 巴法云同一私钥只能有一条连接，结果只能借用监听的连接发布
+        listener[0] = StubBroker.client(broker, "uid-1")
+        assert wait_until(lambda: len(broker.messages) == 1)
+        assert broker.client_ids == ["uid-1"]
+        assert publisher.stats()["shared"] is True
+    finally:
+        publisher.stop()
+
+
+def test_result_publisher_logs_missing_broker_and_refused_connection(tmp_path: Path, caplog):
+    manager = ConfigManager(tmp_path / "launcher_config.json")
+    manager.update_settings({"mqtt_result_topic": "smartlink/results"})
+    broker = StubBroker()
+    publisher = ResultPublisher(
+        manager,
+        logging.getLogger("test"),
+        client_factory=broker.client,
+        shared_client=lambda: None,
+    )
+    with caplog.at_level(logging.WARNING, logger="test"):
+        publisher.configure(manager.get_settings())
+        assert publisher.enabled is False
+        assert "set mqtt_result_host or bafy_uid" in caplog.text
+
+        manager.update_settings({"mqtt_result_host": "127.0.0.1", "mqtt_result_port": 1883})
+        publisher.configure(manager.get_settings())
+        assert publisher.enabled is True
+        publisher._connect()
+        broker.clients[0].on_connect(broker.clients[0], None, {}, 5)
+        assert "refused connection 127.0.0.1:1883 rc=5" in caplog.text
+    publisher.stop()
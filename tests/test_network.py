@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from smartlink.services import network
+
+
+def test_lan_addresses_are_cached_until_interfaces_change(monkeypatch):
+    calls: list[int] = []
+    interfaces = [(1, "lo"), (2, "eth0")]
+    monkeypatch.setattr(
+        network, "discover_lan_addresses", lambda: calls.append(1) or ["127.0.0.1", "10.0.0.2"]
+    )
+    monkeypatch.setattr(network.socket, "if_nameindex", lambda: list(interfaces))
+    network.clear_lan_cache()
+
+    assert network.get_lan_addresses() == ["127.0.0.1", "10.0.0.2"]
+    assert network.get_lan_addresses() == ["127.0.0.1", "10.0.0.2"]
+    assert len(calls) == 1
+
+    interfaces.append((3, "wlan0"))
+    network.get_lan_addresses()
+    assert len(calls) == 2
+
+    network.get_lan_addresses(max_age=0)
+    assert len(calls) == 3
+    network.clear_lan_cache()
+
+
+def test_auth_policy_matches_networks_and_caches_decisions():
+    policy = network.AuthPolicy(
+        "secret",
+        allowed_ips=["203.0.113.9"],
+        allowed_networks=["192.168.0.0/16", "10.1.2.0/24", "fd00::/8", "not-a-network"],
+    )
+    assert policy.token_valid("secret")
+    assert not policy.token_valid("secret2")
+    assert not policy.token_valid("")
+
+    assert policy.ip_allowed("192.168.31.5")
+    assert policy.ip_allowed("10.1.2.200")
+    assert not policy.ip_allowed("10.1.3.1")
+    assert policy.ip_allowed("203.0.113.9")
+    assert policy.ip_allowed("fd12::1")
+    assert not policy.ip_allowed("2001:db8::1")
+    assert not policy.ip_allowed("bogus")
+    assert policy._decisions["10.1.3.1"] is False
+
+    assert network.AuthPolicy("", (), ()).ip_allowed("8.8.8.8")
+    assert not network.AuthPolicy("", (), ["bad"]).ip_allowed("8.8.8.8")
+
+
+def test_auth_policy_is_rebuilt_when_config_changes(app, client):
+    state = app.extensions["smartlink"]
+    headers = {"X-SmartLink-Token": "test-token"}
+    assert client.get("/api/actions", headers=headers).status_code == 200
+    policy = state.auth_policy
+    assert client.get("/api/actions", headers=headers).status_code == 200
+    assert state.auth_policy is policy
+
+    state.config_manager.update_settings({"api_token": "rotated-token"})
+    assert client.get("/api/actions", headers=headers).status_code == 401
+    assert state.auth_policy is not policy
+    rotated = client.get("/api/actions", headers={"X-SmartLink-Token": "rotated-token"})
+    assert rotated.status_code == 200
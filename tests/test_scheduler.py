@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from smartlink.models import ActionConfig, ExecutionResult
+from smartlink.services.scheduler import ActionScheduler, LaneSpec, SchedulerFullError
+
+
+def test_lane_runs_by_priority_and_rejects_when_full():
+    scheduler = ActionScheduler({"adb": LaneSpec(workers=1, max_queue=3)})
+    gate = threading.Event()
+    order: list[str] = []
+
+    first = scheduler.submit("adb:tv-1", gate.wait)
+    time.sleep(0.05)
+    futures = [
+        scheduler.submit("adb:tv-1", lambda: order.append("background"), priority=2),
+        scheduler.submit("adb:tv-1", lambda: order.append("web"), priority=1),
+        scheduler.submit("adb:tv-1", lambda: order.append("card"), priority=0),
+    ]
+    with pytest.raises(SchedulerFullError):
+        scheduler.submit("adb:tv-1", lambda: None)
+
+    gate.set()
+    first.result(timeout=1)
+    for future in futures:
+        future.result(timeout=1)
+
+    assert order == ["card", "web", "background"]
+    metrics = scheduler.metrics()["adb:tv-1"]
+    assert metrics["rejected"] == 1
+    assert metrics["max_depth"] == 3
+    assert metrics["completed"] == 4
+    assert metrics["max_wait_ms"] > 0
+    scheduler.shutdown()
+
+
+def test_slow_lane_does_not_block_other_lanes():
+    scheduler = ActionScheduler({"adb": LaneSpec(1, 8), "exe": LaneSpec(4, 8)})
+    gate = threading.Event()
+    scheduler.submit("adb:default", gate.wait)
+
+    started = time.perf_counter()
+    results = [scheduler.submit("exe", lambda: "ok").result(timeout=1) for _ in range(3)]
+
+    assert results == ["ok"] * 3
+    assert time.perf_counter() - started < 0.5
+    gate.set()
+    scheduler.shutdown()
+
+
+def test_rejected_task_is_reported(app):
+    state = app.extensions["smartlink"]
+    state.config_manager.upsert_action(ActionConfig(name="打开画图", type="exe", cmd="mspaint.exe"))
+    service = state.action_service
+    service.scheduler = ActionScheduler({"exe": LaneSpec(workers=1, max_queue=1)})
+    gate = threading.Event()
+    service._execute = lambda *args: ExecutionResult(gate.wait(1), "ok")
+
+    running = service.run_action_async("打开记事本", source="card")
+    time.sleep(0.05)
+    service.run_action_async("私有动作", source="card")
+    rejected = service.run_action_async("打开画图", source="card")
+
+    assert running.lane == "exe"
+    assert running.status == "running"
+    assert rejected.status == "rejected"
+    assert rejected.error == "queue_full"
+    gate.set()
+    service.scheduler.shutdown()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import http.client
+import socket
+import threading
+import time
+
+from smartlink.models import AppSettings
+from smartlink.server import DevServer, PooledWSGIServer, create_server
+from smartlink.services.events import subscriber_limit
+
+
+def slow_app(environ, start_response):
+    if environ["PATH_INFO"] == "/slow":
+        time.sleep(0.3)
+    body = environ["PATH_INFO"].encode()
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def start(server) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_pooled_server_keeps_connections_alive():
+    server = PooledWSGIServer("127.0.0.1", 0, slow_app, threads=2, backlog=16)
+    start(server)
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=2)
+    sockets = set()
+    for path in ("/a", "/b", "/c"):
+        connection.request("GET", path)
+        response = connection.getresponse()
+        assert response.read() == path.encode()
+        assert response.version == 11
+        assert response.getheader("Connection") is None
+        sockets.add(id(connection.sock))
+    assert len(sockets) == 1
+    connection.close()
+    assert server.drain(timeout=2)
+
+
+def test_pooled_server_drains_in_flight_requests():
+    server = PooledWSGIServer("127.0.0.1", 0, slow_app, threads=2, keepalive_timeout=0.2)
+    start(server)
+    results: list[bytes] = []
+
+    def fetch() -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=2)
+        connection.request("GET", "/slow")
+        results.append(connection.getresponse().read())
+
+    client = threading.Thread(target=fetch)
+    client.start()
+    time.sleep(0.1)
+    assert server.drain(timeout=2)
+    client.join(1)
+    assert results == [b"/slow"]
+
+
+def test_idle_keepalive_connections_are_parked_and_expired():
+    server = PooledWSGIServer("127.0.0.1", 0, slow_app, threads=2, keepalive_timeout=0.3)
+    start(server)
+    with socket.create_connection(("127.0.0.1", server.port), timeout=2) as sock:
+        # 两个流水线请求一次发出，第二个已经在缓冲区里，不能等 select
+        sock.sendall(b"GET /a HTTP/1.1\r\nHost: x\r\n\r\nGET /b HTTP/1.1\r\nHost: x\r\n\r\n")
+        received = b""
+        while not received.endswith(b"/b"):
+            chunk = sock.recv(4096)
+            assert chunk
+            received += chunk
+        assert received.count(b"HTTP/1.1 200 OK") == 2
+        assert b"Connection: close" not in received
+        time.sleep(0.1)
+        assert len(server._connections) == 1
+        time.sleep(0.8)
+        assert server._connections == set()
+        assert sock.recv(4096) == b""
+    assert server.drain(timeout=1)
+
+
+def test_sse_and_idle_connections_leave_workers_for_requests(app, auth_headers):
+    state = app.extensions["smartlink"]
+    state.events.max_subscribers = subscriber_limit(2)
+    server = PooledWSGIServer("127.0.0.1", 0, app, threads=2)
+    start(server)
+
+    def connect() -> http.client.HTTPConnection:
+        return http.client.HTTPConnection("127.0.0.1", server.port, timeout=2)
+
+    stream = connect()
+    stream.request("GET", "/api/events?keepalive=1", headers=auth_headers)
+    events = stream.getresponse()
+    assert events.status == 200
+    assert events.readline() == b"retry: 3000\n"
+
+    rejected = connect()
+    rejected.request("GET", "/api/events", headers=auth_headers)
+    response = rejected.getresponse()
+    assert response.status == 503
+    assert b"too_many_subscribers" in response.read()
+
+    idle = connect()
+    for _ in range(2):
+        idle.request("GET", "/api/actions", headers=auth_headers)
+        assert idle.getresponse().read()
+    # 一个线程被 SSE 占着，两个空闲长连接也不能把剩下的线程占住
+    for _ in range(3):
+        fresh = connect()
+        fresh.request("GET", "/api/actions", headers=auth_headers)
+        assert fresh.getresponse().status == 200
+        fresh.close()
+
+    state.events.close()
+    assert server.drain(timeout=1)
+    for connection in (stream, rejected, idle):
+        connection.close()
+
+
+def test_create_server_picks_mode(app):
+    pooled = create_server(app, "127.0.0.1", 0, AppSettings(server_threads=3, server_backlog=7))
+    assert isinstance(pooled, PooledWSGIServer)
+    assert pooled.request_queue_size == 7
+    assert pooled.pool._max_workers == 3
+    pooled.drain(0)
+
+    dev = create_server(app, "127.0.0.1", 0, AppSettings(server_mode="dev"))
+    assert isinstance(dev, DevServer)
+    dev.drain(0)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from smartlink.structured_logs import IndexedJsonHandler, LogSearcher, index_path, log_fields
+
+
+def make_logger(handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"smartlink.test.{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger
+
+
+def test_search_uses_index_across_rotated_files(tmp_path: Path):
+    json_log = tmp_path / "smartlink.jsonl"
+    handler = IndexedJsonHandler(json_log, max_bytes=2000, backup_count=10)
+    logger = make_logger(handler)
+    for index in range(60):
+        source = "card" if index % 3 == 0 else "web"
+        logger.info(
+            "action_run name=%s",
+            f"动作{index % 2}",
+            extra=log_fields("action_run", action=f"动作{index % 2}", source=source, status="ok"),
+        )
+    logger.info("plain text without fields")
+    handler.close()
+
+    rotated = sorted(tmp_path.glob("smartlink.jsonl.*[0-9]"))
+    assert rotated
+    assert all(index_path(path).exists() for path in rotated)
+
+    searcher = LogSearcher(json_log)
+    records = searcher.search({"action": "动作0", "source": "card"}, limit=100)
+    assert len(records) == 10
+    assert all(record["source"] == "card" and record["action"] == "动作0" for record in records)
+
+    assert len(searcher.search({"event": "action_run"}, limit=5)) == 5
+    assert searcher.search({"event": "plain"})[0]["message"] == "plain text without fields"
+    assert searcher.search({}, until=0) == []
+
+
+def test_searcher_picks_up_new_entries(tmp_path: Path):
+    json_log = tmp_path / "smartlink.jsonl"
+    handler = IndexedJsonHandler(json_log)
+    logger = make_logger(handler)
+    searcher = LogSearcher(json_log)
+    assert searcher.search({"action": "a"}) == []
+
+    logger.info("first", extra=log_fields("action_run", action="a", status="fail"))
+    assert len(searcher.search({"action": "a"})) == 1
+    logger.info("second", extra=log_fields("action_run", action="a", status="ok"))
+    records = searcher.search({"action": "a", "status": "ok"})
+    handler.close()
+    assert [record["message"] for record in records] == ["second"]
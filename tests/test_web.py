@@ -7,3 +7,22 @@ def test_dashboard_hides_music_actions(client):
 
     assert response.status_code == 200
     assert "隐藏音乐动作" not in page
+
+
+def test_mobile_qr_is_cacheable(client, monkeypatch):
+    monkeypatch.setattr(
+        "smartlink.routes.web.get_lan_addresses", lambda: ["127.0.0.1", "192.168.1.8"]
+    )
+    response = client.get("/mobile/qr.png")
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    assert response.data.startswith(b"\x89PNG")
+    etag = response.headers["ETag"]
+
+    cached = client.get("/mobile/qr.png", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    monkeypatch.setattr("smartlink.routes.web.get_lan_addresses", lambda: ["192.168.1.9"])
+    moved = client.get("/mobile/qr.png", headers={"If-None-Match": etag})
+    assert moved.status_code == 200
+    assert moved.headers["ETag"] != etag